@@ -0,0 +1,168 @@
+# electre_accord.py - Accord ELECTRE TRI / Nutri-Score : matrices de confusion et indicateurs vectorisés
+import numpy as np
+import pandas as pd
+
+from electri_fixed import CLASSES, NUTRISCORE_LETTRES, PROCEDURES
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+# Produits traités à la fois pour construire les indices du comptage (int32)
+TAILLE_BLOC_ACCORD = 1_000_000
+NB_CLASSES = len(CLASSES)
+
+# =============================================================================
+# MATRICES DE CONFUSION
+# =============================================================================
+# Tenseur de confusion : λ × procédure × Nutri-Score (A..E) × classe ELECTRE (A'..E').
+# Chaque case (λ, procédure, n, c) reçoit un indice entier unique ; un seul
+# np.bincount sur ces indices remplit toutes les matrices à la fois.
+
+def confusion_tensor(codes, nutriscore):
+    """
+    Toutes les matrices de confusion en un comptage.
+
+    Args:
+        codes: uint8 λ × procédure × produit (ElectreResults.codes)
+        nutriscore: codes Nutri-Score par produit (0..4, -1 = absent)
+
+    Returns:
+        np.ndarray: int64 λ × procédure × 5 × 5 (lignes = Nutri-Score, colonnes = ELECTRE)
+    """
+    n_lambdas, n_procedures, n = codes.shape
+    taille = n_lambdas * n_procedures * NB_CLASSES * NB_CLASSES
+    # Décalage de chaque couple (λ, procédure) dans le tenseur aplati
+    decalages = (np.arange(n_lambdas * n_procedures, dtype=np.int32) * NB_CLASSES * NB_CLASSES
+                 ).reshape(n_lambdas, n_procedures, 1)
+    comptes = np.zeros(taille, dtype=np.int64)
+    for debut in range(0, n, TAILLE_BLOC_ACCORD):
+        fin = min(debut + TAILLE_BLOC_ACCORD, n)
+        valides = nutriscore[debut:fin] >= 0
+        lignes = nutriscore[debut:fin][valides].astype(np.int32) * NB_CLASSES
+        indices = decalages + lignes + codes[:, :, debut:fin][:, :, valides]
+        comptes += np.bincount(indices.ravel(), minlength=taille)
+    return comptes.reshape(n_lambdas, n_procedures, NB_CLASSES, NB_CLASSES)
+
+def confusion_tensor_from_frame(df_results, lambda_values):
+    """
+    confusion_tensor pour un DataFrame long (une ligne par produit et par λ) :
+    colonnes converties en codes une seule fois, sans filtrage ni copie par λ.
+    """
+    lambdas = pd.Categorical(df_results['lambda'], categories=lambda_values).codes.astype(np.int64)
+    nutriscore = pd.Categorical(df_results['nutriscore_original'], categories=NUTRISCORE_LETTRES).codes
+    valides = (lambdas >= 0) & (nutriscore >= 0)
+    base = (lambdas * len(PROCEDURES) * NB_CLASSES + nutriscore) * NB_CLASSES
+    taille = len(lambda_values) * len(PROCEDURES) * NB_CLASSES * NB_CLASSES
+    comptes = np.zeros(taille, dtype=np.int64)
+    for p, procedure in enumerate(PROCEDURES):
+        classes = pd.Categorical(df_results[f'classe_{procedure}'], categories=CLASSES).codes
+        ok = valides & (classes >= 0)
+        comptes += np.bincount(base[ok] + p * NB_CLASSES * NB_CLASSES + classes[ok], minlength=taille)
+    return comptes.reshape(len(lambda_values), len(PROCEDURES), NB_CLASSES, NB_CLASSES)
+
+def confusion_dataframe(matrice, nom_colonnes):
+    """Matrice de confusion au format de pd.crosstab(..., margins=True)."""
+    df = pd.DataFrame(matrice, index=CLASSES, columns=CLASSES)
+    # crosstab n'affiche que les classes effectivement observées
+    df = df.loc[df.sum(axis=1) > 0, df.sum(axis=0) > 0]
+    df['All'] = df.sum(axis=1)
+    df.loc['All'] = df.sum(axis=0)
+    df.index.name = 'Nutri-Score'
+    df.columns.name = nom_colonnes
+    return df
+
+# =============================================================================
+# INDICATEURS
+# =============================================================================
+
+def agreement_metrics(confusions):
+    """
+    Indicateurs d'accord calculés d'un bloc sur un tenseur ... × 5 × 5.
+
+    Returns:
+        dict de tableaux (axes de tête de confusions) :
+        - total, exact, adjacent : produits, accords exacts, accords à une classe près
+        - kappa : kappa de Cohen
+        - kappa_lineaire, kappa_quadratique : kappa pondérés (poids |i-j| et (i-j)²)
+        - decalage_moyen : moyenne de (classe ELECTRE - Nutri-Score) en rangs ;
+          > 0 = ELECTRE plus sévère, < 0 = plus indulgent
+        - precision, rappel : ... × 5 par classe (NaN si la classe n'est jamais prédite / observée)
+    """
+    M = confusions.astype(np.float64)
+    rangs = np.arange(NB_CLASSES)
+    ecart = rangs[np.newaxis, :] - rangs[:, np.newaxis]  # colonne - ligne
+    total = M.sum(axis=(-2, -1))
+    lignes = M.sum(axis=-1)    # effectifs Nutri-Score
+    colonnes = M.sum(axis=-2)  # effectifs ELECTRE
+    diagonale = np.diagonal(M, axis1=-2, axis2=-1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        attendu = lignes[..., :, np.newaxis] * colonnes[..., np.newaxis, :] / total[..., np.newaxis, np.newaxis]
+        p_observe = diagonale.sum(axis=-1) / total
+        p_attendu = np.diagonal(attendu, axis1=-2, axis2=-1).sum(axis=-1) / total
+        kappas = {}
+        for nom, poids in (('kappa_lineaire', np.abs(ecart)), ('kappa_quadratique', ecart ** 2.0)):
+            kappas[nom] = 1 - (M * poids).sum(axis=(-2, -1)) / (attendu * poids).sum(axis=(-2, -1))
+        return {
+            'total': total.astype(np.int64),
+            'exact': diagonale.sum(axis=-1).astype(np.int64),
+            'adjacent': (M * (np.abs(ecart) <= 1)).sum(axis=(-2, -1)).astype(np.int64),
+            'kappa': (p_observe - p_attendu) / (1 - p_attendu),
+            **kappas,
+            'decalage_moyen': (M * ecart).sum(axis=(-2, -1)) / total,
+            'precision': diagonale / colonnes,
+            'rappel': diagonale / lignes,
+        }
+
+def _nombre(valeur, decimales=4):
+    """Flottant arrondi, None si indéfini (NaN)."""
+    return None if np.isnan(valeur) else round(float(valeur), decimales)
+
+def comparison_stats_from_confusions(confusions, lambda_values):
+    """
+    Statistiques au format de compare_with_nutriscore à partir du tenseur λ × procédure × 5 × 5,
+    complétées pour chaque procédure par : accord_adjacent_*, taux_accord_adjacent_*,
+    kappa_*, kappa_lineaire_*, kappa_quadratique_*, decalage_moyen_*, precision_* et rappel_*
+    ({classe: valeur}).
+    """
+    indicateurs = agreement_metrics(confusions)
+    stats = {}
+    for i, lambda_val in enumerate(lambda_values):
+        total = int(indicateurs['total'][i, 0])
+        if total == 0:
+            continue
+        exact = {procedure: int(indicateurs['exact'][i, p]) for p, procedure in enumerate(PROCEDURES)}
+        entree = {'total_produits': total}
+        entree.update({f'accord_{procedure}': exact[procedure] for procedure in PROCEDURES})
+        entree.update({f'taux_accord_{procedure}': round(exact[procedure] / total * 100, 1) for procedure in PROCEDURES})
+        entree.update({f'desaccord_{procedure}': total - exact[procedure] for procedure in PROCEDURES})
+        for p, procedure in enumerate(PROCEDURES):
+            entree[f'matrice_confusion_{procedure}'] = confusion_dataframe(
+                confusions[i, p], f'ELECTRE TRI {procedure.capitalize()}')
+        for p, procedure in enumerate(PROCEDURES):
+            adjacent = int(indicateurs['adjacent'][i, p])
+            entree[f'accord_adjacent_{procedure}'] = adjacent
+            entree[f'taux_accord_adjacent_{procedure}'] = round(adjacent / total * 100, 1)
+            for nom in ('kappa', 'kappa_lineaire', 'kappa_quadratique', 'decalage_moyen'):
+                entree[f'{nom}_{procedure}'] = _nombre(indicateurs[nom][i, p])
+            for nom in ('precision', 'rappel'):
+                entree[f'{nom}_{procedure}'] = {classe: _nombre(v) for classe, v in zip(CLASSES, indicateurs[nom][i, p])}
+        stats[f'lambda_{lambda_val}'] = entree
+    return stats
+
+def agreement_table(comparison_stats):
+    """Indicateurs principaux en tableau : une ligne par (λ, procédure)."""
+    lignes = []
+    for lambda_key, stats in comparison_stats.items():
+        for procedure in PROCEDURES:
+            lignes.append({
+                'lambda': float(lambda_key.split('_')[1]),
+                'procedure': procedure,
+                'produits': stats['total_produits'],
+                'accord_%': stats[f'taux_accord_{procedure}'],
+                'accord_adjacent_%': stats.get(f'taux_accord_adjacent_{procedure}'),
+                'kappa': stats.get(f'kappa_{procedure}'),
+                'kappa_quadratique': stats.get(f'kappa_quadratique_{procedure}'),
+                'decalage_moyen': stats.get(f'decalage_moyen_{procedure}'),
+            })
+    return pd.DataFrame(lignes)
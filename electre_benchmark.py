@@ -0,0 +1,365 @@
+# electre_benchmark.py - Mesure du passage à l'échelle de run_electre_tri (temps et mémoire par étape)
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import electri_fixed
+from electri_fixed import (
+    LAMBDA_VALUES, DEFAULT_PROFILES,
+    read_input, extract_criteria_values, classify_products, compare_with_nutriscore,
+    generate_visualizations,
+)
+from electre_export import write_results
+from electre_instrumentation import peak_rss_mb, start_stage_rss, stop_stage_rss
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+TAILLES = [1_000, 100_000, 1_000_000, 10_000_000]
+BENCH_DIR = ".electre_bench"                  # Fichiers générés et sorties des runs
+REFERENCE_JSON = "benchmark_reference.json"   # Référence (baseline) par défaut
+TOLERANCE = 0.30           # Régression si une mesure dépasse la référence de plus de 30 %
+SEUIL_TEMPS_S = 0.05       # ... et d'au moins 50 ms (évite le bruit des étapes très courtes)
+SEUIL_MEMOIRE_MO = 20.0    # ... et d'au moins 20 Mo pour la mémoire
+GENERATEUR_VERSION = 1     # À incrémenter si la génération change (invalide les fichiers générés)
+LIGNES_MAX_EXCEL = 1_048_575
+
+ETAPES = [
+    "chargement", "extract_criteria_values", "classify_products",
+    "compare_with_nutriscore", "write_results", "generate_visualizations",
+]
+
+# =============================================================================
+# GÉNÉRATEUR DE PRODUITS SYNTHÉTIQUES
+# =============================================================================
+# Distributions observées sur le jeu réel (voir doc/Justifications_Parametres_ELECTRE_TRI.md)
+# Percentiles P10..P90, complétés par des bornes plausibles en P0 et P100
+QUANTILES_ENERGIE = ([0.0, 0.10, 0.25, 0.50, 0.75, 0.90, 1.0], [60, 186, 380, 520, 580, 630, 700])
+QUANTILES_SUCRES = ([0.0, 0.10, 0.25, 0.50, 0.75, 0.90, 1.0], [0.0, 0.5, 8.2, 28.5, 48.7, 58.3, 70])
+
+# Segments de marché, du moins sucré au plus sucré : part, fruits/noix (%), graisses saturées,
+# fibres, protéines (g/100g), tirés uniformément dans chaque intervalle
+SEGMENTS = [
+    {"nom": "purees_oleagineux", "part": 0.15, "fruits": (95, 100), "graisses": (3, 5),
+     "fibres": (8, 12), "proteines": (15, 25)},
+    {"nom": "noisettes_artisanales", "part": 0.20, "fruits": (50, 70), "graisses": (6, 12),
+     "fibres": (4, 8), "proteines": (8, 15)},
+    {"nom": "chocolat_premium", "part": 0.25, "fruits": (20, 40), "graisses": (8, 16),
+     "fibres": (2, 6), "proteines": (4, 8)},
+    {"nom": "chocolat_bas_cout", "part": 0.40, "fruits": (0, 15), "graisses": (15, 25),
+     "fibres": (2, 6), "proteines": (4, 8)},
+]
+# Sodium : 78 % < 0.1 g, 15 % entre 0.1 et 0.5 g, 7 % au-delà
+TRANCHES_SODIUM = ([0.78, 0.15, 0.07], [(0.0, 0.1), (0.1, 0.5), (0.5, 1.5)])
+# Additifs : 23 % 0-1, 45 % 2-4, 28 % 5-8, 4 % 9-12
+TRANCHES_ADDITIFS = ([0.23, 0.45, 0.28, 0.04], [(0, 1), (2, 4), (5, 8), (9, 12)])
+
+NUTRISCORE_MIX = {"a": 0.10, "b": 0.20, "c": 0.30, "d": 0.25, "e": 0.15}
+PART_SANS_NUTRISCORE = 0.10
+
+def _tranches(rng, n, parts, intervalles, entier=False):
+    """Tire n valeurs : une tranche selon parts, puis uniformément dans son intervalle."""
+    tranche = rng.choice(len(parts), size=n, p=parts)
+    bas = np.array([i[0] for i in intervalles], dtype=np.float64)[tranche]
+    haut = np.array([i[1] for i in intervalles], dtype=np.float64)[tranche]
+    if entier:
+        return rng.integers(bas.astype(np.int64), haut.astype(np.int64) + 1)
+    return rng.uniform(bas, haut)
+
+def generate_synthetic_products(n, seed=0):
+    """
+    Génère n produits synthétiques reproductibles (mêmes colonnes que le fichier d'entrée).
+
+    Les marges respectent les distributions observées (énergie et sucres par percentiles,
+    sodium et additifs par tranches) ; fruits/noix, graisses, fibres et protéines dépendent
+    du segment de marché, lui-même lié au taux de sucre. Le Nutri-Score suit NUTRISCORE_MIX
+    et se dégrade avec les critères « cost ».
+    """
+    rng = np.random.default_rng(seed)
+
+    # Rang de sucre : les segments occupent des bandes successives de [0, 1]
+    u_sucres = rng.random(n)
+    bornes = np.cumsum([0.0] + [s["part"] for s in SEGMENTS])
+    segment = np.searchsorted(bornes[1:-1], u_sucres, side='right')
+
+    colonnes = {
+        "energy-kcal_100g": np.interp(rng.random(n), *QUANTILES_ENERGIE),
+        "sugars_100g": np.interp(u_sucres, *QUANTILES_SUCRES),
+    }
+    for cle, critere in (("graisses", "fat_100g"), ("fruits", "fruits_vegetables_nuts_100g"),
+                         ("fibres", "fiber_100g"), ("proteines", "proteins_100g")):
+        bas = np.array([s[cle][0] for s in SEGMENTS], dtype=np.float64)[segment]
+        haut = np.array([s[cle][1] for s in SEGMENTS], dtype=np.float64)[segment]
+        colonnes[critere] = rng.uniform(bas, haut)
+    colonnes["sodium_100g"] = _tranches(rng, n, *TRANCHES_SODIUM)
+    colonnes["additives_n"] = _tranches(rng, n, *TRANCHES_ADDITIFS, entier=True)
+
+    df = pd.DataFrame({critere: colonnes[critere] for critere in electri_fixed.CRITERIA.keys()})
+    df.insert(0, "product_name", "Produit synthétique " + pd.RangeIndex(n).astype(str))
+
+    # Nutri-Score : score bruité, découpé selon les proportions de NUTRISCORE_MIX
+    score = (df["sugars_100g"] / 30 + df["fat_100g"] / 10 + df["energy-kcal_100g"] / 300
+             + df["sodium_100g"] * 2 - df["fruits_vegetables_nuts_100g"] / 40
+             - df["fiber_100g"] / 5 - df["proteins_100g"] / 10).to_numpy() + rng.normal(0.0, 0.5, n)
+    lettres = np.array(list(NUTRISCORE_MIX.keys()), dtype=object)
+    coupures = np.quantile(score, np.cumsum(list(NUTRISCORE_MIX.values()))[:-1]) if n else []
+    grades = lettres[np.searchsorted(coupures, score)]
+    grades[rng.random(n) < PART_SANS_NUTRISCORE] = None
+    df["nutriscore_grade"] = grades
+    return df
+
+def synthetic_input_file(n, seed=0, format_entree="csv", bench_dir=BENCH_DIR):
+    """Chemin d'un fichier d'entrée synthétique de n produits, généré une seule fois."""
+    if format_entree == "xlsx" and n > LIGNES_MAX_EXCEL:
+        raise ValueError(f"❌ {n} produits dépassent la limite d'une feuille Excel ({LIGNES_MAX_EXCEL} lignes)")
+    chemin = Path(bench_dir) / f"produits_{n}_s{seed}_v{GENERATEUR_VERSION}.{format_entree}"
+    if not chemin.exists():
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        df = generate_synthetic_products(n, seed)
+        temporaire = chemin.with_name("tmp_" + chemin.name)  # même extension (openpyxl la vérifie)
+        if format_entree == "xlsx":
+            df.to_excel(temporaire, index=False, engine='openpyxl')
+        else:
+            df.to_csv(temporaire, index=False)
+        os.replace(temporaire, chemin)
+    return chemin
+
+# =============================================================================
+# MESURE DES ÉTAPES
+# =============================================================================
+
+def _mesurer(mesures, etape, fonction, *args, **kwargs):
+    """
+    Exécute une étape (sorties console masquées) et enregistre son temps et sa mémoire :
+    rss_pic_mo, pic RSS atteint pendant l'étape, et rss_hausse_mo, hausse de ce pic
+    au-dessus de la mémoire résidente au début de l'étape (ce que l'étape a coûté).
+
+    Sous Linux, le pic du processus est remis à zéro avant chaque étape, qui a donc
+    son propre pic. Ailleurs, seul le pic du processus depuis son démarrage existe :
+    rss_hausse_mo n'y compte que ce qui dépasse le pic des étapes précédentes.
+    """
+    rss_debut = start_stage_rss()
+    debut, debut_cpu = time.perf_counter(), time.process_time()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultat = fonction(*args, **kwargs)
+    except Exception as e:
+        mesures[etape] = {"erreur": f"{type(e).__name__}: {e}"}
+        return None
+    temps_s, cpu_s = time.perf_counter() - debut, time.process_time() - debut_cpu
+    rss_pic, rss_hausse = stop_stage_rss(rss_debut)
+    mesures[etape] = {"temps_s": temps_s, "cpu_s": cpu_s, "rss_pic_mo": rss_pic, "rss_hausse_mo": rss_hausse}
+    return resultat
+
+def benchmark_pipeline(input_file, output_dir, profiles=None, lambda_values=None, format_sortie="xlsx"):
+    """
+    Enchaîne les étapes de run_electre_tri en mesurant chacune séparément.
+
+    Une étape en échec est notée {'erreur': ...} (ex. pyarrow absent pour Parquet),
+    les étapes qui dépendent de son résultat sont alors notées comme ignorées.
+    """
+    if profiles is None:
+        profiles = DEFAULT_PROFILES
+    if lambda_values is None:
+        lambda_values = LAMBDA_VALUES
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    mesures = {}
+    df = _mesurer(mesures, "chargement", read_input, input_file)
+    df_criteria = None if df is None else _mesurer(mesures, "extract_criteria_values", extract_criteria_values, df)
+    df_results = None if df_criteria is None else _mesurer(
+        mesures, "classify_products", classify_products, df, df_criteria, profiles, lambda_values)
+    stats = None if df_results is None else _mesurer(
+        mesures, "compare_with_nutriscore", compare_with_nutriscore, df_results, lambda_values)
+    if df_results is not None:
+        _mesurer(mesures, "write_results", write_results,
+                 df_results, output_dir / f"resultats.{format_sortie}", profiles, lambda_values)
+    if stats is not None:
+        _mesurer(mesures, "generate_visualizations", generate_visualizations,
+                 df_results, stats, str(output_dir / "graphiques"), lambda_values, use_cache=False)
+
+    for etape in ETAPES:
+        mesures.setdefault(etape, {"erreur": "ignorée (étape précédente en échec)"})
+    if "temps_s" in mesures["classify_products"] and df is not None:
+        mesures["classify_products"]["produits_par_s"] = len(df) / max(mesures["classify_products"]["temps_s"], 1e-9)
+    return mesures
+
+def _benchmark_taille(n, seed, repetitions, format_entree, format_sortie, bench_dir):
+    """Mesures pour une taille (exécuté dans un processus neuf : pic RSS propre à cette taille)."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+    input_file = synthetic_input_file(n, seed, format_entree, bench_dir)
+    runs = [benchmark_pipeline(input_file, Path(bench_dir) / f"run_{n}", format_sortie=format_sortie)
+            for _ in range(repetitions)]
+
+    # Meilleur temps sur les répétitions (le moins bruité), mémoire maximale
+    etapes = {}
+    for etape in ETAPES:
+        reussis = [run[etape] for run in runs if "temps_s" in run[etape]]
+        if not reussis:
+            etapes[etape] = runs[-1][etape]
+            continue
+        etapes[etape] = min(reussis, key=lambda m: m["temps_s"])
+        for mesure in ("rss_pic_mo", "rss_hausse_mo"):
+            if reussis[0][mesure] is not None:
+                etapes[etape][mesure] = max(m[mesure] for m in reussis)
+    return {
+        "produits": n,
+        "etapes": etapes,
+        "total_s": sum(m.get("temps_s", 0.0) for m in etapes.values()),
+        # Le pic système est remis à zéro à chaque étape : pic du processus = plus haut pic d'étape
+        "rss_pic_mo": max((m["rss_pic_mo"] for run in runs for m in run.values() if m.get("rss_pic_mo") is not None),
+                          default=peak_rss_mb()),
+    }
+
+def machine_info():
+    """Description de la machine et des versions (les références ne sont comparables qu'entre machines proches)."""
+    return {
+        "plateforme": platform.platform(),
+        "processeur": platform.processor() or platform.machine(),
+        "coeurs": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+def run_benchmark(tailles=None, seed=0, repetitions=1, format_entree="csv", format_sortie="xlsx",
+                  bench_dir=BENCH_DIR):
+    """
+    Mesure chaque étape du pipeline pour chaque taille de jeu synthétique.
+
+    Returns:
+        dict: rapport {'machine', 'seed', 'date', 'tailles': {n: mesures}}, sérialisable en JSON
+    """
+    if tailles is None:
+        tailles = TAILLES
+
+    rapport = {"machine": machine_info(), "seed": seed, "generateur": GENERATEUR_VERSION, "format_sortie": format_sortie,
+               "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "tailles": {}}
+    for n in tailles:
+        print(f"⏱️  Benchmark sur {n} produits...")
+        # Un processus neuf par taille : le pic RSS d'une taille n'influence pas la suivante
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            mesures = pool.submit(_benchmark_taille, n, seed, repetitions, format_entree, format_sortie,
+                                  bench_dir).result()
+        rapport["tailles"][str(n)] = mesures
+        print_measures(mesures)
+    return rapport
+
+def print_measures(mesures):
+    """Affiche les mesures d'une taille."""
+    for etape, m in mesures["etapes"].items():
+        if "temps_s" in m:
+            memoire = (f", pic RSS {m['rss_pic_mo']:.0f} Mo (+{m['rss_hausse_mo']:.0f} Mo pendant l'étape)"
+                       if m["rss_pic_mo"] is not None else "")
+            print(f"    {etape:<26} {m['temps_s']:>9.3f} s{memoire}")
+        else:
+            print(f"    {etape:<26} ⚠️  {m['erreur']}")
+    print(f"    {'total':<26} {mesures['total_s']:>9.3f} s")
+
+# =============================================================================
+# RÉFÉRENCES ET DÉTECTION DES RÉGRESSIONS
+# =============================================================================
+
+def save_baseline(rapport, chemin=REFERENCE_JSON):
+    """Enregistre un rapport comme référence."""
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, indent=2, ensure_ascii=False)
+
+def load_baseline(chemin=REFERENCE_JSON):
+    with open(chemin, encoding="utf-8") as f:
+        return json.load(f)
+
+def check_regressions(rapport, reference, tolerance=TOLERANCE,
+                      seuil_temps_s=SEUIL_TEMPS_S, seuil_memoire_mo=SEUIL_MEMOIRE_MO):
+    """
+    Compare un rapport à une référence, taille par taille et étape par étape.
+
+    Une mesure régresse si elle dépasse la référence de plus de tolerance (en relatif)
+    et du seuil absolu correspondant. La mémoire comparée est la hausse pendant l'étape
+    (rss_hausse_mo), qui ne dépend pas des étapes précédentes. Une étape qui réussissait et échoue désormais
+    est aussi une régression. Les tailles absentes de la référence sont ignorées.
+
+    Returns:
+        list: une entrée par régression {'taille', 'etape', 'mesure', 'reference', 'actuel'}
+    """
+    regressions = []
+    for taille, mesures in rapport["tailles"].items():
+        if taille not in reference["tailles"]:
+            continue
+        etapes_reference = reference["tailles"][taille]["etapes"]
+        for etape, actuel in mesures["etapes"].items():
+            ref = etapes_reference.get(etape)
+            if ref is None or "temps_s" not in ref:
+                continue
+            if "temps_s" not in actuel:
+                regressions.append({"taille": taille, "etape": etape, "mesure": "erreur",
+                                    "reference": None, "actuel": actuel["erreur"]})
+                continue
+            for mesure, seuil in (("temps_s", seuil_temps_s), ("rss_hausse_mo", seuil_memoire_mo)):
+                if ref.get(mesure) is None or actuel.get(mesure) is None:
+                    continue
+                if actuel[mesure] > ref[mesure] * (1 + tolerance) and actuel[mesure] - ref[mesure] > seuil:
+                    regressions.append({"taille": taille, "etape": etape, "mesure": mesure,
+                                        "reference": ref[mesure], "actuel": actuel[mesure]})
+    return regressions
+
+def print_regressions(regressions):
+    if not regressions:
+        print("✅ Aucune régression par rapport à la référence")
+        return
+    print(f"❌ {len(regressions)} régression(s) :")
+    for r in regressions:
+        if r["mesure"] == "erreur":
+            print(f"    {r['taille']} produits, {r['etape']}: échoue désormais ({r['actuel']})")
+        else:
+            print(f"    {r['taille']} produits, {r['etape']}: {r['mesure']} "
+                  f"{r['reference']:.3f} → {r['actuel']:.3f} (+{(r['actuel'] / r['reference'] - 1) * 100:.0f}%)")
+
+# =============================================================================
+# LIGNE DE COMMANDE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ELECTRE TRI par étape et par taille")
+    parser.add_argument("--tailles", type=int, nargs="+", default=TAILLES, help="nombres de produits")
+    parser.add_argument("--repetitions", type=int, default=1, help="exécutions par taille (meilleur temps retenu)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv", help="format du fichier d'entrée")
+    parser.add_argument("--format-sortie", choices=["xlsx", "csv", "parquet", "arrow"], default="xlsx",
+                        help="format des résultats écrits par write_results")
+    parser.add_argument("--sortie", help="fichier JSON où écrire le rapport")
+    parser.add_argument("--sauver-reference", nargs="?", const=REFERENCE_JSON, metavar="JSON",
+                        help="enregistrer le rapport comme référence")
+    parser.add_argument("--verifier", nargs="?", const=REFERENCE_JSON, metavar="JSON",
+                        help="comparer à une référence et échouer en cas de régression")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="écart relatif toléré (0.3 = 30 %%)")
+    args = parser.parse_args(argv)
+
+    rapport = run_benchmark(args.tailles, args.seed, args.repetitions, args.format, args.format_sortie)
+    if args.sortie:
+        save_baseline(rapport, args.sortie)
+    if args.sauver_reference:
+        save_baseline(rapport, args.sauver_reference)
+        print(f"💾 Référence enregistrée dans {args.sauver_reference}")
+    if args.verifier:
+        regressions = check_regressions(rapport, load_baseline(args.verifier), args.tolerance)
+        print_regressions(regressions)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
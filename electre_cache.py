@@ -0,0 +1,222 @@
+# electre_cache.py - Cache disque colonnaire des données d'entrée ELECTRE TRI
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from electri_fixed import CRITERIA, extract_criteria_values, read_input
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+CACHE_DIR = ".electre_cache"
+CACHE_MAX_BYTES = 2 * 1024 ** 3  # 2 Go au total
+# À incrémenter si le format des fichiers du cache change
+CACHE_VERSION = 2
+
+COLONNES_TEXTE = ["product_name", "nutriscore_grade"]
+# Séparateur des valeurs d'une colonne texte dans son blob (absent des textes usuels)
+SEPARATEUR_TEXTE = "\x00"
+INDEX_FICHIERS = "index_fichiers.json"
+
+# =============================================================================
+# EMPREINTE DU FICHIER D'ENTRÉE
+# =============================================================================
+
+def file_content_hash(chemin, taille_bloc=1024 * 1024):
+    """Empreinte BLAKE2b du contenu d'un fichier (lecture par blocs)."""
+    empreinte = hashlib.blake2b(digest_size=20)
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+def _cached_content_hash(chemin, cache_dir):
+    """
+    Empreinte du contenu, mémorisée par (chemin, taille, date de modification).
+    
+    Le fichier n'est relu en entier que s'il a été modifié depuis le dernier calcul.
+    """
+    infos = os.stat(chemin)
+    chemin_index = Path(cache_dir) / INDEX_FICHIERS
+    try:
+        index = json.loads(chemin_index.read_text())
+    except (OSError, ValueError):
+        index = {}
+    
+    cle = str(Path(chemin).resolve())
+    entree = index.get(cle)
+    if entree and entree['size'] == infos.st_size and entree['mtime_ns'] == infos.st_mtime_ns:
+        return entree['hash']
+    
+    empreinte = file_content_hash(chemin)
+    index[cle] = {'size': infos.st_size, 'mtime_ns': infos.st_mtime_ns, 'hash': empreinte}
+    # Remplacement atomique : un autre processus lit l'ancien index ou le nouveau, jamais un mélange
+    temporaire = chemin_index.with_name(chemin_index.name + f".tmp{os.getpid()}")
+    temporaire.write_text(json.dumps(index, indent=1))
+    os.replace(temporaire, chemin_index)
+    return empreinte
+
+def _entry_key(empreinte_contenu):
+    """Clé d'entrée : contenu du fichier + liste des critères + version du format."""
+    cle = hashlib.blake2b(digest_size=20)
+    cle.update(empreinte_contenu.encode())
+    cle.update(json.dumps(list(CRITERIA.keys())).encode())
+    cle.update(str(CACHE_VERSION).encode())
+    return cle.hexdigest()
+
+# =============================================================================
+# ÉCRITURE / LECTURE D'UNE ENTRÉE
+# =============================================================================
+# Chaque entrée est un dossier <clé>/ contenant :
+#   - un .npy par critère (mémoire mappable)
+#   - pour les colonnes texte : un blob UTF-8 (valeurs séparées par SEPARATEUR_TEXTE),
+#     les offsets de début et un masque des valeurs manquantes
+#   - meta.json (nombre de lignes, colonnes présentes, fichier source)
+
+def _write_text_column(dossier, nom, serie):
+    """Stocke une colonne texte sous forme colonnaire (blob + offsets + masque)."""
+    manquants = serie.isna().to_numpy()
+    textes = [b'' if manque else str(valeur).encode('utf-8')
+              for valeur, manque in zip(serie.to_numpy(dtype=object), manquants)]
+    # offsets[i] = début de la valeur i ; chaque valeur est suivie d'un séparateur
+    offsets = np.zeros(len(textes) + 1, dtype=np.int64)
+    np.cumsum([len(t) + 1 for t in textes], out=offsets[1:])
+    np.save(dossier / f"{nom}.offsets.npy", offsets)
+    np.save(dossier / f"{nom}.manquants.npy", manquants)
+    separateur = SEPARATEUR_TEXTE.encode('utf-8')
+    (dossier / f"{nom}.blob").write_bytes(separateur.join(textes) + separateur if textes else b'')
+
+def _read_text_column(dossier, nom):
+    """
+    Relit une colonne texte (valeurs manquantes → NaN).
+
+    Le blob est décodé en une fois puis découpé sur le séparateur (en C) ; les
+    offsets ne servent que si une valeur contient elle-même le séparateur.
+    """
+    offsets = np.load(dossier / f"{nom}.offsets.npy", mmap_mode='r')
+    manquants = np.load(dossier / f"{nom}.manquants.npy")
+    blob = (dossier / f"{nom}.blob").read_bytes()
+    n = len(manquants)
+    parties = blob.decode('utf-8').split(SEPARATEUR_TEXTE)[:-1] if n else []
+    if len(parties) != n:
+        parties = [blob[offsets[i]:offsets[i + 1] - 1].decode('utf-8') for i in range(n)]
+    valeurs = np.empty(n, dtype=object)
+    valeurs[:] = parties
+    valeurs[manquants] = np.nan
+    return valeurs
+
+def _write_entry(dossier, df, df_criteria, source):
+    """Écrit une entrée complète dans un dossier temporaire puis la publie."""
+    temporaire = dossier.with_name(dossier.name + f".tmp{os.getpid()}")
+    temporaire.mkdir(parents=True, exist_ok=True)
+    
+    for i, critere in enumerate(CRITERIA.keys()):
+        np.save(temporaire / f"critere_{i}.npy", df_criteria[critere].to_numpy())
+    
+    colonnes_texte = [col for col in COLONNES_TEXTE if col in df.columns]
+    for col in colonnes_texte:
+        _write_text_column(temporaire, col, df[col])
+    
+    meta = {
+        'version': CACHE_VERSION,
+        'source': str(source),
+        'nb_lignes': len(df),
+        'criteres': list(CRITERIA.keys()),
+        'colonnes_texte': colonnes_texte,
+    }
+    (temporaire / "meta.json").write_text(json.dumps(meta, indent=1, ensure_ascii=False))
+    
+    # Publication atomique : une entrée à moitié écrite n'est jamais visible
+    try:
+        temporaire.rename(dossier)
+    except OSError:
+        shutil.rmtree(temporaire, ignore_errors=True)  # Un autre processus l'a écrite entre-temps
+
+def _read_entry(dossier):
+    """Relit une entrée : retourne (df, df_criteria) comme le chargement classique."""
+    meta = json.loads((dossier / "meta.json").read_text())
+    df_criteria = pd.DataFrame({
+        critere: np.load(dossier / f"critere_{i}.npy", mmap_mode='r')
+        for i, critere in enumerate(meta['criteres'])
+    })
+    df = pd.DataFrame({col: _read_text_column(dossier, col) for col in meta['colonnes_texte']},
+                      index=pd.RangeIndex(meta['nb_lignes']))
+    # Date d'accès pour l'éviction LRU
+    os.utime(dossier / "meta.json")
+    return df, df_criteria
+
+# =============================================================================
+# ENTRETIEN DU CACHE
+# =============================================================================
+
+def _entry_size(dossier):
+    """Taille totale d'une entrée en octets."""
+    return sum(f.stat().st_size for f in dossier.iterdir() if f.is_file())
+
+def enforce_cache_limit(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, garder=None):
+    """Supprime les entrées les moins récemment utilisées jusqu'à passer sous max_bytes."""
+    entrees = [d for d in Path(cache_dir).iterdir() if (d / "meta.json").exists()]
+    entrees.sort(key=lambda d: (d / "meta.json").stat().st_mtime)
+    taille = sum(_entry_size(d) for d in entrees)
+    for dossier in entrees:
+        if taille <= max_bytes:
+            break
+        if dossier.name == garder:
+            continue
+        taille -= _entry_size(dossier)
+        shutil.rmtree(dossier, ignore_errors=True)
+
+def _remove_stale_entries(cache_dir, chemin, cle_actuelle):
+    """Supprime les entrées d'anciennes versions du même fichier source."""
+    source = str(Path(chemin).resolve())
+    for dossier in Path(cache_dir).iterdir():
+        meta = dossier / "meta.json"
+        if dossier.name == cle_actuelle or not meta.exists():
+            continue
+        if json.loads(meta.read_text()).get('source') == source:
+            shutil.rmtree(dossier, ignore_errors=True)
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """Vide entièrement le cache."""
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+# =============================================================================
+# API
+# =============================================================================
+
+def load_input_cached(input_file, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """
+    Chargement du fichier d'entrée avec cache disque.
+    
+    Au premier appel le fichier est lu (pd.read_excel / pd.read_csv) et les
+    critères, product_name et nutriscore_grade sont stockés en colonnes binaires.
+    Les appels suivants sur un fichier au contenu identique relisent ces
+    colonnes (critères en mémoire mappée) sans repasser par pandas.
+    
+    Returns:
+        (df, df_criteria): df ne contient que product_name et nutriscore_grade
+    """
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    debut = time.perf_counter()
+    cle = _entry_key(_cached_content_hash(input_file, cache_dir))
+    dossier = Path(cache_dir) / cle
+    
+    if (dossier / "meta.json").exists():
+        df, df_criteria = _read_entry(dossier)
+        print(f"⚡ {len(df)} produits chargés depuis le cache ({(time.perf_counter() - debut) * 1000:.0f} ms)")
+        return df, df_criteria
+    
+    df = read_input(input_file)
+    df_criteria = extract_criteria_values(df)
+    
+    _remove_stale_entries(cache_dir, input_file, cle)
+    _write_entry(dossier, df, df_criteria, Path(input_file).resolve())
+    enforce_cache_limit(cache_dir, max_bytes, garder=cle)
+    print(f"💾 Entrée mise en cache dans {dossier}")
+    
+    return df[[col for col in COLONNES_TEXTE if col in df.columns]], df_criteria
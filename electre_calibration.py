@@ -0,0 +1,371 @@
+# electre_calibration.py - Calibrage des profils et des poids sur l'accord avec le Nutri-Score
+import time
+import numpy as np
+import pandas as pd
+
+from electri_fixed import (
+    CRITERIA, LAMBDA_VALUES, DEFAULT_PROFILES, PROCEDURES, INPUT_XLSX, NUTRISCORE_LETTRES,
+    read_input, extract_criteria_values, build_criteria_matrix, build_profiles_matrix,
+    clean_nutriscore_series,
+)
+from electre_compile import PROFILS_MOBILES, weight_tables, pessimistic_codes, optimistic_codes, class_tables
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+N_CANDIDATS = 100_000        # Nombre total de jeux de paramètres évalués
+TAILLE_LOT = 1_000           # Candidats évalués ensemble (une génération)
+N_ELITES = 50                # Meilleurs candidats conservés d'une génération à l'autre
+SIGMA_PROFILS = 0.15         # Amplitude des mutations de profils (fraction de l'écart b2-b5)
+SIGMA_POIDS = 0.25           # Amplitude des mutations de poids (log-normale)
+# Candidats évalués avec les mêmes états de produits (au plus 4 valeurs de profil
+# chacun par critère : 1 024 valeurs et 2 050 états, soit 16 Ko de table par critère)
+CANDIDATS_PAR_TABLE = 256
+
+OBJECTIFS = ("exact", "adjacent")
+
+# =============================================================================
+# ÉVALUATION EN LOT
+# =============================================================================
+
+def batch_pass_masks(X, P):
+    """
+    Masques des critères favorables pour un lot de candidats.
+    
+    Le bit j du masque vaut 1 si le critère j (ordre de CRITERIA) est favorable.
+    
+    Args:
+        X: produits × critères
+        P: candidats × profils × critères
+    
+    Returns:
+        (M_ab, M_ba): uint8 de forme candidats × produits × 4 (profils b2 à b5,
+        les seuls testés par les procédures)
+    """
+    forme = (P.shape[0], X.shape[0], 4)
+    M_ab = np.zeros(forme, dtype=np.uint8)
+    M_ba = np.zeros(forme, dtype=np.uint8)
+    
+    for j, critere_config in enumerate(CRITERIA.values()):
+        produits = X[np.newaxis, :, j, np.newaxis]              # (1, n, 1)
+        profils = P[:, np.newaxis, PROFILS_MOBILES, j]          # (c, 1, 4)
+        
+        if critere_config["direction"] == "benefit":
+            a_meilleur = produits >= profils
+            b_meilleur = profils >= produits
+        else:
+            a_meilleur = produits <= profils
+            b_meilleur = profils <= produits
+        
+        M_ab |= a_meilleur.view(np.uint8) << j
+        M_ba |= b_meilleur.view(np.uint8) << j
+    
+    return M_ab, M_ba
+
+def lookup_verdicts(verdicts, masques):
+    """
+    Surclassement lu dans les tables de verdicts (candidats × 2^m) pour chaque masque.
+    
+    masques: candidats × produits × profils (l'axe candidats peut valoir 1) ; les
+    masques uint8 servent directement d'indices, table par table, sans construire
+    d'index candidats × produits × profils
+    """
+    if masques.shape[0] == 1:
+        return np.take(verdicts, masques[0], axis=1)
+    resultat = np.empty(masques.shape, dtype=verdicts.dtype)
+    for i in range(masques.shape[0]):
+        np.take(verdicts[i], masques[i], out=resultat[i])
+    return resultat
+
+# Évaluation rapide : pour un groupe de candidats, chaque produit reçoit par critère
+# un état (son rang parmi toutes les valeurs de profils du groupe). Pour un candidat,
+# une table état → bits donne alors, en une lecture par critère, sa contribution aux
+# 8 masques du produit (b2..b5, deux sens), rangés comme 8 octets d'un uint64 : le
+# bit j de l'octet d est le critère j face au profil-sens d. Les verdicts des 8 masques
+# et l'accord avec le Nutri-Score sont ensuite lus dans des tables, par paire de λ.
+
+def _sorted_columns(X):
+    """Ordre de tri (NaN à la fin) et valeurs triées de chaque critère."""
+    ordres = [np.argsort(colonne, kind="stable") for colonne in X.T]
+    return ordres, [colonne[ordre] for colonne, ordre in zip(X.T, ordres)]
+
+def _rank_states(ordre, valeurs_triees, valeurs):
+    """
+    État de chaque produit sur un critère parmi des valeurs de profils triées et
+    distinctes : 2i + 1 si x = valeurs[i], 2i si x est strictement entre valeurs[i - 1]
+    et valeurs[i], 2 × len(valeurs) + 1 si x est manquant.
+    
+    Les états sont constants par tranche de la colonne triée : les bornes des tranches
+    sont trouvées par dichotomie, puis les états sont recopiés dans l'ordre des produits.
+    """
+    bornes = np.empty(2 * len(valeurs) + 2, dtype=np.int64)
+    bornes[0:-2:2] = np.searchsorted(valeurs_triees, valeurs, "left")
+    bornes[1:-2:2] = np.searchsorted(valeurs_triees, valeurs, "right")
+    bornes[-2] = len(valeurs_triees) - np.isnan(valeurs_triees).sum()
+    bornes[-1] = len(valeurs_triees)
+    etats = np.empty(len(ordre), dtype=np.uint16)
+    etats[ordre] = np.repeat(np.arange(len(bornes), dtype=np.uint16), np.diff(bornes, prepend=0))
+    return etats
+
+def _state_tables(egal, n_etats, j, benefice):
+    """
+    Bits du critère j dans les masques d'un produit, pour chaque état et chaque candidat.
+    
+    Bit 8k + j : le produit est au moins aussi bon que b(k+2) ; bit 8(k + 4) + j :
+    b(k+2) est au moins aussi bon que le produit (k = 0..3). Un produit d'état e vérifie
+    x ≥ p ⇔ e ≥ egal et x ≤ p ⇔ e ≤ egal : chaque bit est une fonction en escalier de
+    l'état, construite par différences puis somme cumulée (modulo 2^64, exacte car les
+    bits sont disjoints).
+    
+    Args:
+        egal: candidats × 4, état d'un produit égal à b2..b5
+        n_etats: nombre d'états (le dernier, valeur manquante, n'a aucun bit)
+    """
+    bits = np.uint64(1) << (np.uint64(8) * np.arange(4, dtype=np.uint64) + np.uint64(j))
+    bits_superieur, bits_inferieur = (bits, bits << np.uint64(32)) if benefice else (bits << np.uint64(32), bits)
+    lignes = np.arange(egal.shape[0])[:, np.newaxis]
+    differences = np.zeros((egal.shape[0], n_etats + 1), dtype=np.uint64)
+    np.add.at(differences, (lignes, egal), bits_superieur)
+    differences[:, 0] += np.bitwise_or.reduce(bits_inferieur)
+    np.subtract.at(differences, (lignes, egal + 1), bits_inferieur)
+    tables = np.cumsum(differences, axis=1, dtype=np.uint64)[:, :n_etats]
+    tables[:, -1] = 0
+    return tables
+
+def _agreement_table(n_lambdas, procedures, objectif):
+    """
+    Accords avec le Nutri-Score pour toutes les combinaisons de verdicts d'une paire de λ.
+    
+    Returns:
+        uint8 de taille 5 × 2^16 : indice Nutri-Score × 2^16 + ab | ba << 8, où ab et ba
+        portent les verdicts a S bk et bk S a du λ g dans les bits 4g à 4g + 3 ;
+        valeur = nombre de (λ, procédure) dont la classe est acceptée
+    """
+    table_pessimiste, table_optimiste = class_tables()
+    tolerance = 1 if objectif == "adjacent" else 0
+    combinaisons = np.arange(2 ** 16)
+    ab, ba = combinaisons & 0xFF, combinaisons >> 8
+    nutriscores = np.arange(len(NUTRISCORE_LETTRES))[:, np.newaxis]
+    accords = np.zeros((len(nutriscores), len(combinaisons)), dtype=np.uint8)
+    for g in range(n_lambdas):
+        index_ab, index_ba = (ab >> 4 * g) & 0xF, (ba >> 4 * g) & 0xF
+        for procedure in procedures:
+            codes = (table_pessimiste[index_ab] if procedure == "pessimiste"
+                     else table_optimiste[index_ab | index_ba << 4]).astype(np.int16)
+            accords += np.abs(codes[np.newaxis] - nutriscores) <= tolerance
+    return accords.ravel()
+
+def evaluate_candidates(X, codes_nutriscore, W, P, lambda_values=None, procedures=PROCEDURES,
+                        objectif="exact"):
+    """
+    Score de chaque candidat : taux d'accord moyen avec le Nutri-Score.
+    
+    Les candidats sont évalués un par un, par groupes de CANDIDATS_PAR_TABLE qui
+    partagent les états des produits (_rank_states) : par candidat, 8 lectures de
+    table donnent les masques (_state_tables), 8 autres les verdicts d'une paire de
+    λ, une dernière les accords (_agreement_table). Les concordances sont celles de
+    weight_tables : mêmes résultats que la classification exacte, sans tableau
+    candidats × produits.
+    
+    Args:
+        X: produits × critères (uniquement des produits avec Nutri-Score valide)
+        codes_nutriscore: code 0..4 du Nutri-Score de chaque produit
+        W: candidats × critères (poids)
+        P: candidats × profils × critères
+        lambda_values: seuils λ évalués (moyenne des taux)
+        procedures: procédures évaluées (moyenne des taux)
+        objectif: "exact" (même classe) ou "adjacent" (au plus une classe d'écart)
+    
+    Returns:
+        np.ndarray: taux d'accord (0 à 1) par candidat
+    """
+    if objectif not in OBJECTIFS:
+        raise ValueError(f"❌ Objectif inconnu : {objectif} (attendu : {OBJECTIFS})")
+    if lambda_values is None:
+        lambda_values = LAMBDA_VALUES
+    n_candidats, n_produits = W.shape[0], X.shape[0]
+    if X.shape[1] > 8:
+        raise ValueError(f"❌ Calibrage limité à 8 critères (masques sur un octet), {X.shape[1]} définis")
+    
+    tables_poids = weight_tables(W)
+    groupes = [list(lambda_values[i:i + 2]) for i in range(0, len(lambda_values), 2)]
+    tables_accord = {len(groupe): _agreement_table(len(groupe), procedures, objectif) for groupe in groupes}
+    reference = np.asarray(codes_nutriscore, dtype=np.uint32) << np.uint32(16)
+    # Masque d (profil b(d % 4 + 2), sens a S b si d < 4) : verdict au bit 8 × (d // 4) + d % 4
+    # de l'index, plus 4g pour le λ g de la paire
+    decalages = np.array([8 * (d // 4) + d % 4 for d in range(8)], dtype=np.uint16)[:, np.newaxis]
+    n_sens = 2 if "optimiste" in procedures else 1
+    
+    ordres, colonnes_triees = _sorted_columns(X)
+    masques = np.empty(n_produits, dtype=np.uint64)
+    lecture_masques = np.empty(n_produits, dtype=np.uint64)
+    colonnes_masques = np.empty((8, n_produits), dtype=np.uint8)
+    index = np.empty(n_produits, dtype=np.uint16)
+    lecture = np.empty(n_produits, dtype=np.uint16)
+    index_accord = np.empty(n_produits, dtype=np.uint32)
+    accords_produits = np.empty(n_produits, dtype=np.uint8)
+    accords = np.zeros(n_candidats)
+    
+    for debut in range(0, n_candidats, CANDIDATS_PAR_TABLE):
+        fin = min(debut + CANDIDATS_PAR_TABLE, n_candidats)
+        profils = P[debut:fin, PROFILS_MOBILES]
+        etats, tables = [], []
+        for j, critere_config in enumerate(CRITERIA.values()):
+            valeurs = np.unique(profils[:, :, j])
+            etats.append(_rank_states(ordres[j], colonnes_triees[j], valeurs))
+            egal = 2 * np.searchsorted(valeurs, profils[:, :, j]) + 1
+            tables.append(_state_tables(egal, 2 * len(valeurs) + 2, j, critere_config["direction"] == "benefit"))
+        
+        for c in range(debut, fin):
+            np.take(tables[0][c - debut], etats[0], out=masques, mode="clip")
+            for j in range(1, len(tables)):
+                masques |= np.take(tables[j][c - debut], etats[j], out=lecture_masques, mode="clip")
+            # Octet d du uint64 = masque du profil-sens d : une ligne contiguë par masque
+            np.copyto(colonnes_masques, masques.view(np.uint8).reshape(n_produits, 8).T)
+            for groupe in groupes:
+                surclassement = sum((tables_poids[c] >= lambda_val).astype(np.uint16) << np.uint16(4 * g)
+                                    for g, lambda_val in enumerate(groupe))
+                verdicts = surclassement[np.newaxis] << decalages
+                np.take(verdicts[0], colonnes_masques[0], out=index, mode="clip")
+                for d in range(1, 4 * n_sens):
+                    index |= np.take(verdicts[d], colonnes_masques[d], out=lecture, mode="clip")
+                np.add(reference, index, out=index_accord)
+                accords[c] += np.take(tables_accord[len(groupe)], index_accord, out=accords_produits,
+                                      mode="clip").sum()
+    
+    return accords / (n_produits * len(lambda_values) * len(procedures))
+
+# =============================================================================
+# CONTRAINTES
+# =============================================================================
+
+def repair_candidates(W, P, P_reference):
+    """
+    Ramène un lot de candidats dans le domaine admissible.
+    
+    - poids positifs de somme 1
+    - b1 et b6 fixés (bornes inatteignables)
+    - dominance : pour chaque critère, b2..b5 triés du moins bon au meilleur
+      et compris entre b1 et b6
+    """
+    W = np.clip(W, 1e-6, None)
+    W = W / W.sum(axis=1, keepdims=True)
+    
+    P = P.copy()
+    P[:, 0] = P_reference[0]
+    P[:, -1] = P_reference[-1]
+    milieu = np.sort(P[:, PROFILS_MOBILES], axis=1)
+    for j, critere_config in enumerate(CRITERIA.values()):
+        if critere_config["direction"] == "cost":
+            milieu[:, :, j] = milieu[:, ::-1, j]  # Coût : valeurs décroissantes de b2 à b5
+        bas, haut = sorted((P_reference[0, j], P_reference[-1, j]))
+        milieu[:, :, j] = np.clip(milieu[:, :, j], bas, haut)
+    P[:, PROFILS_MOBILES] = milieu
+    return W, P
+
+def _mutate(W, P, echelle_profils, rng, calibrer_poids, calibrer_profils):
+    """Perturbe un lot de candidats (bruit log-normal sur les poids, gaussien sur les profils)."""
+    if calibrer_poids:
+        W = W * np.exp(rng.normal(0.0, SIGMA_POIDS, W.shape))
+    if calibrer_profils:
+        P = P.copy()
+        bruit = rng.normal(0.0, SIGMA_PROFILS, P[:, PROFILS_MOBILES].shape)
+        P[:, PROFILS_MOBILES] += bruit * echelle_profils
+    return W, P
+
+# =============================================================================
+# RECHERCHE
+# =============================================================================
+
+def calibrate(df_criteria, nutriscores, profiles=None, lambda_values=None, procedures=PROCEDURES,
+              objectif="exact", n_candidats=N_CANDIDATS, taille_lot=TAILLE_LOT, n_elites=N_ELITES,
+              calibrer_poids=True, calibrer_profils=True, seed=0):
+    """
+    Recherche évolutionnaire des poids et profils maximisant l'accord avec le Nutri-Score.
+    
+    Chaque génération mute les meilleurs candidats connus, répare les
+    contraintes puis évalue tout le lot en une fois (evaluate_candidates).
+    
+    Args:
+        df_criteria: critères extraits (extract_criteria_values)
+        nutriscores: Nutri-Score nettoyé de chaque produit ('A'..'E' ou 'N/A')
+        profiles: profils de départ (DEFAULT_PROFILES par défaut)
+    
+    Returns:
+        dict: 'weights' (critère → poids), 'profiles' (liste de dicts),
+              'score', 'score_initial', 'historique' (meilleur score par génération)
+    """
+    if profiles is None:
+        profiles = DEFAULT_PROFILES
+    rng = np.random.default_rng(seed)
+    criteres = list(CRITERIA.keys())
+    
+    codes_nutriscore = pd.Categorical(nutriscores, categories=NUTRISCORE_LETTRES).codes
+    valides = codes_nutriscore >= 0
+    if not valides.any():
+        raise ValueError("❌ Aucun produit avec un Nutri-Score valide pour le calibrage")
+    X = build_criteria_matrix(df_criteria)[valides]
+    codes_nutriscore = codes_nutriscore[valides].astype(np.int16)
+    
+    P0 = build_profiles_matrix(profiles)
+    W0 = np.array([CRITERIA[critere]["weight"] for critere in criteres])
+    echelle_profils = np.abs(P0[1] - P0[4]) + 1e-9  # Écart b2-b5 par critère
+    
+    def evaluer(W, P):
+        return evaluate_candidates(X, codes_nutriscore, W, P, lambda_values, procedures, objectif)
+    
+    elites_W, elites_P = W0[np.newaxis], P0[np.newaxis]
+    elites_score = evaluer(elites_W, elites_P)
+    score_initial = float(elites_score[0])
+    historique = [score_initial]
+    
+    debut = time.perf_counter()
+    n_generations = max(1, n_candidats // taille_lot)
+    for generation in range(n_generations):
+        parents = rng.integers(0, len(elites_score), taille_lot)
+        W, P = _mutate(elites_W[parents], elites_P[parents], echelle_profils, rng,
+                       calibrer_poids, calibrer_profils)
+        W, P = repair_candidates(W, P, P0)
+        scores = evaluer(W, P)
+        
+        # (μ + λ) : les élites survivent tant qu'elles ne sont pas battues
+        tous_W = np.concatenate([elites_W, W])
+        tous_P = np.concatenate([elites_P, P])
+        tous_scores = np.concatenate([elites_score, scores])
+        meilleurs = np.argsort(-tous_scores, kind='stable')[:n_elites]
+        elites_W, elites_P, elites_score = tous_W[meilleurs], tous_P[meilleurs], tous_scores[meilleurs]
+        historique.append(float(elites_score[0]))
+        
+        if (generation + 1) % 10 == 0 or generation == n_generations - 1:
+            print(f"  Génération {generation + 1}/{n_generations}: meilleur accord {elites_score[0] * 100:.1f}% "
+                  f"({(generation + 1) * taille_lot / (time.perf_counter() - debut):.0f} candidats/s)")
+    
+    return {
+        'weights': dict(zip(criteres, elites_W[0].tolist())),
+        'profiles': [dict(zip(criteres, profil.tolist())) for profil in elites_P[0]],
+        'score': float(elites_score[0]),
+        'score_initial': score_initial,
+        'historique': historique,
+    }
+
+def calibrated_criteria(resultat):
+    """Copie de CRITERIA avec les poids calibrés."""
+    return {critere: {**config, "weight": resultat['weights'][critere]} for critere, config in CRITERIA.items()}
+
+def run_calibration(input_file=INPUT_XLSX, **options):
+    """Charge le fichier d'entrée et lance calibrate (mêmes options)."""
+    print("🔄 Calibrage ELECTRE TRI sur le Nutri-Score")
+    df = read_input(input_file)
+    df_criteria = extract_criteria_values(df)
+    resultat = calibrate(df_criteria, clean_nutriscore_series(df), **options)
+    
+    print(f"\n✅ Accord: {resultat['score_initial'] * 100:.1f}% → {resultat['score'] * 100:.1f}%")
+    print("⚖️  Poids calibrés:")
+    for critere, poids in resultat['weights'].items():
+        print(f"    {critere}: {poids:.3f}")
+    print("📏 Profils calibrés:")
+    print(pd.DataFrame(resultat['profiles'], index=[f'b{i + 1}' for i in range(len(resultat['profiles']))]).round(3))
+    return resultat
+
+if __name__ == "__main__":
+    run_calibration()
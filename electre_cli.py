@@ -0,0 +1,171 @@
+# electre_cli.py - Ligne de commande ELECTRE TRI (démarrage rapide, dépendances lourdes différées)
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Ce module n'importe rien de lourd au chargement : pandas / numpy arrivent avec
+# electri_fixed au moment de l'exécution, matplotlib / seaborn uniquement si les
+# graphiques sont demandés, openpyxl uniquement pour lire ou écrire de l'Excel.
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+FORMATS_SORTIE = ["xlsx", "csv", "parquet", "arrow", "sqlite"]
+# Modules importés par une classification sans graphiques
+MODULES_CLASSIFICATION = ("electri_fixed", "electre_export")
+# Modules qui ne doivent pas être chargés par ces imports
+MODULES_DIFFERES = ("matplotlib", "seaborn", "openpyxl", "pyarrow", "scipy")
+# Budget de temps d'import (secondes, interpréteur neuf)
+BUDGET_IMPORT_S = 0.6
+
+# =============================================================================
+# PARAMÈTRES
+# =============================================================================
+
+def parse_lambdas(texte):
+    """'0.6,0.7' → [0.6, 0.7] (virgules ou espaces)."""
+    try:
+        valeurs = [float(v) for v in texte.replace(",", " ").split()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"liste de λ invalide : {texte!r}")
+    if not valeurs or any(not 0.5 <= v <= 1.0 for v in valeurs):
+        raise argparse.ArgumentTypeError(f"λ attendus dans [0.5, 1] : {texte!r}")
+    return valeurs
+
+def load_profiles(chemin):
+    """
+    Lit les profils limites b1 à b6 depuis un JSON : une liste de 6 objets
+    {critère: valeur}, ou un objet avec une clé 'profiles' (sortie de calibrate).
+    """
+    from electri_fixed import CRITERIA, DEFAULT_PROFILES
+
+    with open(chemin, encoding="utf-8") as f:
+        contenu = json.load(f)
+    profils = contenu["profiles"] if isinstance(contenu, dict) else contenu
+    if len(profils) != len(DEFAULT_PROFILES):
+        raise ValueError(f"❌ {chemin}: {len(profils)} profils au lieu de {len(DEFAULT_PROFILES)} (b1 à b6)")
+    for i, profil in enumerate(profils):
+        manquants = [c for c in CRITERIA if c not in profil]
+        if manquants:
+            raise ValueError(f"❌ {chemin}: profil b{i + 1} sans {', '.join(manquants)}")
+    return profils
+
+def default_output(input_file, format_sortie):
+    """<entrée>_electre.<format> à côté du fichier d'entrée."""
+    entree = Path(input_file)
+    return entree.with_name(f"{entree.stem}_electre.{format_sortie}")
+
+# =============================================================================
+# BUDGET D'IMPORT
+# =============================================================================
+
+def measure_import_time(modules=MODULES_CLASSIFICATION):
+    """
+    Importe modules dans un interpréteur neuf et mesure le temps d'import.
+
+    Returns:
+        dict: 'temps_s' et 'differes_charges' (modules de MODULES_DIFFERES chargés malgré tout)
+    """
+    code = (
+        "import sys, time, json\n"
+        "debut = time.perf_counter()\n"
+        f"for m in {list(modules)!r}: __import__(m)\n"
+        "temps = time.perf_counter() - debut\n"
+        f"charges = sorted(m for m in {list(MODULES_DIFFERES)!r} if m in sys.modules)\n"
+        "print(json.dumps({'temps_s': temps, 'differes_charges': charges}))\n"
+    )
+    sortie = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=str(Path(__file__).resolve().parent))
+    return json.loads(sortie.stdout.strip().splitlines()[-1])
+
+def check_import_budget(budget=BUDGET_IMPORT_S, repetitions=3):
+    """Meilleur temps d'import sur plusieurs interpréteurs neufs, comparé au budget. Renvoie True si respecté."""
+    mesures = [measure_import_time() for _ in range(repetitions)]
+    meilleur = min(m["temps_s"] for m in mesures)
+    differes = sorted(set().union(*(m["differes_charges"] for m in mesures)))
+    print(f"⏱️  Import de {', '.join(MODULES_CLASSIFICATION)}: {meilleur * 1000:.0f} ms "
+          f"(budget {budget * 1000:.0f} ms, meilleur de {repetitions})")
+    if differes:
+        print(f"❌ Modules qui devraient être différés: {', '.join(differes)}")
+    elif meilleur <= budget:
+        print("✅ Budget respecté, aucune dépendance lourde chargée")
+    else:
+        print("❌ Budget dépassé")
+    return meilleur <= budget and not differes
+
+# =============================================================================
+# LIGNE DE COMMANDE
+# =============================================================================
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Classification ELECTRE TRI de produits alimentaires")
+    parser.add_argument("entree", nargs="?", help="fichier d'entrée (.csv, .tsv, .parquet ou .xlsx)")
+    parser.add_argument("-o", "--sortie", help="fichier de résultats (défaut : <entrée>_electre.<format>)")
+    parser.add_argument("-f", "--format", choices=FORMATS_SORTIE, default="csv",
+                        help="format des résultats si --sortie n'est pas donné")
+    parser.add_argument("-l", "--lambdas", type=parse_lambdas, help="seuils λ, ex. '0.6,0.7' (défaut : 0.6 et 0.7)")
+    parser.add_argument("-p", "--profils", help="profils limites b1 à b6 (JSON)")
+    parser.add_argument("--disposition", choices=["wide", "long"], default="wide",
+                        help="une ligne par produit (wide) ou par produit et par λ (long)")
+    parser.add_argument("--graphiques", action=argparse.BooleanOptionalAction, default=False,
+                        help="générer les graphiques (importe matplotlib)")
+    parser.add_argument("--credibilite", action="store_true", help="indice de crédibilité σ (seuils q, p, v)")
+    parser.add_argument("--compile", action="store_true",
+                        help="classifieur par tables précalculées (concordance classique, le plus rapide)")
+    parser.add_argument("--dedoublonner", action="store_true",
+                        help="classer une seule fois chaque vecteur de critères distinct")
+    parser.add_argument("--expliquer", action="append", type=int, metavar="PRODUIT",
+                        help="expliquer la classe d'un produit (indice de ligne, répétable)")
+    parser.add_argument("--workers", type=int, default=1, help="processus de classification")
+    parser.add_argument("--cache", action="store_true", help="relire les critères depuis le cache disque")
+    parser.add_argument("--rapport", metavar="JSON", help="mesurer chaque étape et écrire le rapport")
+    parser.add_argument("--verifier-import", action="store_true",
+                        help="mesurer le temps d'import et échouer si le budget est dépassé")
+    parser.add_argument("--budget-import", type=float, default=BUDGET_IMPORT_S, metavar="S",
+                        help="budget de temps d'import en secondes")
+    return parser
+
+def main(argv=None):
+    debut = time.perf_counter()
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.verifier_import:
+        return 0 if check_import_budget(args.budget_import) else 1
+    if args.entree is None:
+        parser.error("fichier d'entrée requis")
+
+    from electri_fixed import run_electre_tri
+    print(f"⚡ Modules chargés en {(time.perf_counter() - debut) * 1000:.0f} ms")
+
+    instrumentation = None
+    if args.rapport:
+        from electre_instrumentation import Instrumentation
+        instrumentation = Instrumentation(rapport=args.rapport)
+
+    resultats = run_electre_tri(
+        input_file=args.entree,
+        output_file=args.sortie or default_output(args.entree, args.format),
+        profiles=load_profiles(args.profils) if args.profils else None,
+        lambda_values=args.lambdas,
+        n_workers=args.workers,
+        use_cache=args.cache,
+        credibility=args.credibilite,
+        instrumentation=instrumentation,
+        output_layout=args.disposition,
+        plots=args.graphiques,
+        compiled=args.compile,
+        dedupe=args.dedoublonner,
+        explain=bool(args.expliquer),
+    )
+    for produit in args.expliquer or []:
+        for lambda_val in resultats.lambda_values:
+            print(resultats.explain(produit, lambda_val))
+    print(f"⏱️  Durée totale: {time.perf_counter() - debut:.2f} s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
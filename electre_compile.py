@@ -0,0 +1,217 @@
+# electre_compile.py - Classifieur ELECTRE TRI compilé (masques de bits et tables de correspondance)
+import numpy as np
+
+from electri_fixed import CRITERIA, LAMBDA_VALUES, DEFAULT_PROFILES, build_profiles_matrix
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+# Produits traités à la fois (les masques d'un bloc restent dans le cache processeur)
+TAILLE_BLOC_COMPILE = 65_536
+# En dessous, les masques sont calculés en une comparaison diffusée (_pass_masks_small)
+PETIT_LOT = 1_024
+# Profils réellement testés par les procédures (b2 à b5)
+PROFILS_MOBILES = slice(1, 5)
+N_PROFILS_MOBILES = 4
+
+# =============================================================================
+# TABLES
+# =============================================================================
+# En mode classique, la relation d'un produit à un profil est entièrement décrite
+# par le masque des critères où il est au moins aussi bon (un bit par critère).
+# La concordance est alors une simple lecture dans une table de 2^m poids, et
+# chaque procédure ne dépend que des 4 (pessimiste) ou 8 (optimiste) verdicts
+# de surclassement sur b2..b5 : trois tables suffisent à classer un produit.
+
+def weight_tables(W):
+    """
+    Concordance de chaque masque possible, pour chaque candidat (candidats × 2^m).
+
+    Les poids sont sommés dans l'ordre de CRITERIA, comme calculate_concordance :
+    les comparaisons avec λ donnent exactement les mêmes résultats.
+    """
+    masques = np.arange(2 ** W.shape[1])
+    tables = np.zeros((W.shape[0], len(masques)))
+    for j in range(W.shape[1]):
+        tables += np.where((masques >> j) & 1, W[:, j, np.newaxis], 0.0)
+    return tables
+
+def pessimistic_codes(a_S_b):
+    """Procédure pessimiste à partir des verdicts a S bk (colonnes b2..b5)."""
+    codes = np.full(a_S_b.shape[:-1], 4, dtype=np.int16)  # E' par défaut
+    for colonne in range(4):                              # b2 → b5 : le plus haut l'emporte
+        codes[a_S_b[..., colonne]] = 3 - colonne
+    return codes
+
+def optimistic_codes(a_S_b, b_S_a):
+    """Procédure optimiste à partir des verdicts a S bk et bk S a (colonnes b2..b5)."""
+    codes = np.zeros(a_S_b.shape[:-1], dtype=np.int16)    # A' par défaut
+    for colonne in range(3, -1, -1):                      # b5 → b2 : le plus bas l'emporte
+        codes[b_S_a[..., colonne] & ~a_S_b[..., colonne]] = 4 - colonne
+    return codes
+
+def class_tables():
+    """
+    Classe de chaque combinaison de verdicts sur b2..b5.
+
+    Returns:
+        (pessimiste, optimiste): uint8 de tailles 16 (bit k = a S b(k+2))
+        et 256 (bits 0-3 = a S b, bits 4-7 = b S a)
+    """
+    combinaisons = np.arange(2 ** (2 * N_PROFILS_MOBILES))
+    bits = ((combinaisons[:, np.newaxis] >> np.arange(2 * N_PROFILS_MOBILES)) & 1).astype(bool)
+    a_S_b, b_S_a = bits[:, :N_PROFILS_MOBILES], bits[:, N_PROFILS_MOBILES:]
+    table_pessimiste = pessimistic_codes(a_S_b[:2 ** N_PROFILS_MOBILES]).astype(np.uint8)
+    table_optimiste = optimistic_codes(a_S_b, b_S_a).astype(np.uint8)
+    return table_pessimiste, table_optimiste
+
+def _pass_masks_small(X, P):
+    """pass_masks pour quelques produits : une comparaison diffusée produits × profils × critères."""
+    # Critères coût : x ≤ p ⇔ -x ≥ -p (négation exacte), un seul sens de comparaison
+    signes = np.array([1.0 if config["direction"] == "benefit" else -1.0 for config in CRITERIA.values()])
+    produits = (X * signes)[:, np.newaxis, :]
+    profils = (P * signes)[np.newaxis, :, :]
+    M_ab = np.packbits(produits >= profils, axis=-1, bitorder="little")[..., 0].T
+    M_ba = np.packbits(profils >= produits, axis=-1, bitorder="little")[..., 0].T
+    return M_ab, M_ba
+
+def pass_masks(X, P):
+    """
+    Masques des critères favorables de chaque produit face à chaque profil de P.
+
+    Le bit j vaut 1 si le critère j (ordre de CRITERIA) est favorable, comme
+    batch_pass_masks de electre_calibration. Pour un gros bloc, le calcul se fait
+    profil par profil sur des colonnes contiguës (X transposé une fois), dans des
+    tampons réutilisés ; en dessous de PETIT_LOT produits, une seule comparaison
+    diffusée coûte moins d'appels NumPy.
+
+    Returns:
+        (M_ab, M_ba): uint8 de forme profils × produits
+    """
+    if len(X) < PETIT_LOT:
+        return _pass_masks_small(X, P)
+    colonnes = np.ascontiguousarray(X.T)
+    M_ab = np.zeros((P.shape[0], X.shape[0]), dtype=np.uint8)
+    M_ba = np.zeros_like(M_ab)
+    favorable = np.empty(X.shape[0], dtype=bool)
+    bit = np.empty(X.shape[0], dtype=np.uint8)
+    for j, critere_config in enumerate(CRITERIA.values()):
+        a_meilleur, b_meilleur = ((np.greater_equal, np.less_equal) if critere_config["direction"] == "benefit"
+                                  else (np.less_equal, np.greater_equal))
+        for k in range(P.shape[0]):
+            for comparaison, M in ((a_meilleur, M_ab), (b_meilleur, M_ba)):
+                comparaison(colonnes[j], P[k, j], out=favorable)
+                np.left_shift(favorable.view(np.uint8), j, out=bit)
+                M[k] |= bit
+    return M_ab, M_ba
+
+class CompiledClassifier:
+    """
+    Classifieur par tables pour la concordance classique (credibility=False).
+
+    Pour un jeu de poids (CRITERIA), de profils et de seuils λ, il précalcule :
+    - la concordance de chacun des 2^m masques (weight_tables, sommes dans l'ordre
+      de CRITERIA : mêmes flottants que compute_concordance_matrices) ;
+    - pour chaque λ, le verdict de surclassement de chaque masque, décalé du rang
+      du profil pour être combiné par OU ;
+    - les classes de chaque combinaison de verdicts (class_tables).
+
+    Classer un produit revient alors à comparer ses critères aux profils (masques),
+    puis à indexer. Les tables sont reconstruites automatiquement si les poids,
+    les directions, les profils ou les λ ont changé depuis le dernier appel.
+    """
+
+    def __init__(self, profiles=None, lambda_values=None):
+        self.profiles = DEFAULT_PROFILES if profiles is None else profiles
+        self.lambda_values = list(LAMBDA_VALUES if lambda_values is None else lambda_values)
+        self._signature = None
+
+    @property
+    def profiles(self):
+        return self._profiles
+
+    @profiles.setter
+    def profiles(self, profiles):
+        """Profils en liste de dicts (comme DEFAULT_PROFILES) ou en matrice profils × critères."""
+        self._profiles = profiles
+        self.P = np.asarray(profiles, dtype=np.float64) if isinstance(profiles, np.ndarray) \
+            else build_profiles_matrix(profiles)
+
+    def _ensure_tables(self):
+        """Reconstruit les tables si les poids, directions, profils ou λ ont changé ; renvoie les profils."""
+        signature = (tuple((nom, config["direction"], config["weight"]) for nom, config in CRITERIA.items()),
+                     tuple(self.lambda_values), self.P.tobytes())
+        if signature != self._signature:
+            if len(CRITERIA) > 8:
+                raise ValueError(f"❌ Classifieur compilé limité à 8 critères (masques sur un octet), {len(CRITERIA)} définis")
+            self.table_poids = weight_tables(
+                np.array([[config["weight"] for config in CRITERIA.values()]]))[0]
+            # verdicts_decales[i, k, masque] = (concordance(masque) >= λ_i) << k
+            verdicts = (self.table_poids[np.newaxis, :] >= np.array(self.lambda_values)[:, np.newaxis])
+            self.verdicts_decales = (verdicts[:, np.newaxis, :].astype(np.uint8)
+                                     << np.arange(N_PROFILS_MOBILES, dtype=np.uint8)[np.newaxis, :, np.newaxis])
+            self.table_pessimiste, self.table_optimiste = class_tables()
+            self._signature = signature
+        return self.P
+
+    def prepare(self):
+        """Construit les tables (ou vérifie qu'elles sont à jour) sans rien classer ; renvoie le classifieur."""
+        self._ensure_tables()
+        return self
+
+    def _lookup(self, M_ab, M_ba):
+        """Classes par λ à partir des masques sur b2..b5 (tables supposées à jour)."""
+        resultats = {}
+        for i, lambda_val in enumerate(self.lambda_values):
+            index_ab = np.zeros(M_ab.shape[1], dtype=np.uint8)
+            index_ba = np.zeros(M_ab.shape[1], dtype=np.uint8)
+            for k in range(N_PROFILS_MOBILES):
+                table = self.verdicts_decales[i, k]
+                index_ab |= table[M_ab[k]]
+                index_ba |= table[M_ba[k]]
+            index_optimiste = index_ab | (index_ba << N_PROFILS_MOBILES)
+            resultats[lambda_val] = (self.table_pessimiste[index_ab], self.table_optimiste[index_optimiste])
+        return resultats
+
+    def classify(self, X):
+        """
+        Classe une matrice produits × critères, par blocs de TAILLE_BLOC_COMPILE produits.
+
+        Returns:
+            dict: λ → (codes pessimistes, codes optimistes), identique à
+            classify_lambdas(*compute_concordance_matrices(X, P), lambda_values)
+        """
+        P = self._ensure_tables()[PROFILS_MOBILES]
+        n = len(X)
+        resultats = {lambda_val: (np.empty(n, dtype=np.uint8), np.empty(n, dtype=np.uint8))
+                     for lambda_val in self.lambda_values}
+        for debut in range(0, n, TAILLE_BLOC_COMPILE):
+            fin = min(debut + TAILLE_BLOC_COMPILE, n)
+            bloc = self._lookup(*pass_masks(X[debut:fin], P))
+            for lambda_val, (pessimiste, optimiste) in bloc.items():
+                resultats[lambda_val][0][debut:fin] = pessimiste
+                resultats[lambda_val][1][debut:fin] = optimiste
+        return resultats
+
+    def score(self, X):
+        """
+        Concordances avec les 6 profils (lues dans la table des poids) et classes par λ.
+
+        Returns:
+            (C_ab, C_ba, codes): comme compute_concordance_matrices puis classify_lambdas
+        """
+        M_ab, M_ba = pass_masks(X, self._ensure_tables())
+        codes = self._lookup(M_ab[PROFILS_MOBILES], M_ba[PROFILS_MOBILES])
+        return self.table_poids[M_ab.T], self.table_poids[M_ba.T], codes
+
+# Classifieur partagé par classify_compiled (tables gardées d'un appel à l'autre)
+_CLASSIFIEUR = CompiledClassifier()
+
+def classify_compiled(X, P, lambda_values):
+    """
+    Équivalent compilé de classify_lambdas(*compute_concordance_matrices(X, P), lambda_values).
+    Les tables ne sont recalculées que si P, λ ou CRITERIA ont changé.
+    """
+    _CLASSIFIEUR.profiles = P
+    _CLASSIFIEUR.lambda_values = list(lambda_values)
+    return _CLASSIFIEUR.classify(X)
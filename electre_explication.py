@@ -0,0 +1,234 @@
+# electre_explication.py - Traces d'explication compactes : pourquoi un produit est-il dans sa classe ?
+import sys
+
+import numpy as np
+import pandas as pd
+
+from electri_fixed import (
+    CRITERIA, CLASSES, LAMBDA_VALUES, DEFAULT_PROFILES, INPUT_XLSX,
+    read_input, extract_criteria_values, build_criteria_matrix, build_profiles_matrix, get_product_names,
+)
+from electre_compile import PROFILS_MOBILES, TAILLE_BLOC_COMPILE, weight_tables
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+# Bits par critère dans une trace : rang du produit parmi les valeurs des profils
+BITS_PAR_CRITERE = 4
+# Rang réservé aux valeurs manquantes (NaN : aucune comparaison n'est vraie)
+RANG_ABSENT = 2 ** BITS_PAR_CRITERE - 1
+
+# =============================================================================
+# ENCODAGE
+# =============================================================================
+# En concordance classique, la trace complète d'un produit est l'ensemble de ses
+# masques de critères favorables (voir electre_compile.py) : 6 profils × 2 sens,
+# soit 12 octets. Mais sur un critère, ces 12 bits ne dépendent que de la position
+# de x parmi les (au plus 6) valeurs distinctes des profils u_0 < ... < u_{k-1} :
+# sous u_0, égal à u_0, entre u_0 et u_1, ..., au-dessus de u_{k-1}, soit 2k + 1 ≤ 13
+# rangs, qui tiennent sur 4 bits. Un produit tient donc en 8 × 4 bits = 4 octets
+# (uint32, 40 Mo pour 10 millions de produits), et les masques se relisent
+# exactement par une table rang → bits, quel que soit l'ordre des profils.
+
+def _trace_dtype(n_criteres):
+    """Entier non signé assez large pour BITS_PAR_CRITERE bits par critère."""
+    for dtype in (np.uint16, np.uint32, np.uint64):
+        if n_criteres * BITS_PAR_CRITERE <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"❌ Traces limitées à {64 // BITS_PAR_CRITERE} critères, {n_criteres} définis")
+
+def encode_traces(X, P):
+    """
+    Rang de chaque produit parmi les valeurs des profils, 4 bits par critère.
+
+    Args:
+        X: produits × critères (ordre de CRITERIA)
+        P: profils × critères
+
+    Returns:
+        np.ndarray: une trace par produit (uint32 jusqu'à 8 critères), critère j
+        dans les bits 4j à 4j + 3
+    """
+    dtype = _trace_dtype(X.shape[1])
+    traces = np.zeros(X.shape[0], dtype=dtype)
+    for debut in range(0, X.shape[0], TAILLE_BLOC_COMPILE):
+        bloc = X[debut:debut + TAILLE_BLOC_COMPILE]
+        sortie = traces[debut:debut + TAILLE_BLOC_COMPILE]
+        for j in range(X.shape[1]):
+            valeurs = np.unique(P[:, j])
+            x = bloc[:, j]
+            # x égal à u_i → 2i + 1 ; x strictement entre u_{i-1} et u_i → 2i
+            rangs = np.searchsorted(valeurs, x, "left") + np.searchsorted(valeurs, x, "right")
+            rangs[np.isnan(x)] = RANG_ABSENT
+            sortie |= rangs.astype(dtype) << dtype(BITS_PAR_CRITERE * j)
+    return traces
+
+def rank_tables(P):
+    """
+    Bits de masque associés à chaque rang, critère par critère.
+
+    Returns:
+        (table_ab, table_ba): uint8 critères × 2^4 rangs × profils ; table_ab[j, r, k]
+        vaut 1 << j si un produit de rang r sur le critère j est au moins aussi bon
+        que le profil k (table_ba : le profil au moins aussi bon que le produit)
+    """
+    n_profils, n_criteres = P.shape
+    rangs = np.arange(2 ** BITS_PAR_CRITERE)[:, np.newaxis]
+    table_ab = np.zeros((n_criteres, len(rangs), n_profils), dtype=np.uint8)
+    table_ba = np.zeros_like(table_ab)
+    for j, critere_config in enumerate(CRITERIA.values()):
+        valeurs = np.unique(P[:, j])
+        # Rang d'un produit égal à chaque profil
+        egal = (2 * np.searchsorted(valeurs, P[:, j]) + 1)[np.newaxis, :]
+        present = rangs != RANG_ABSENT
+        x_superieur, x_inferieur = (rangs >= egal) & present, (rangs <= egal) & present
+        a_meilleur, b_meilleur = ((x_superieur, x_inferieur) if critere_config["direction"] == "benefit"
+                                  else (x_inferieur, x_superieur))
+        table_ab[j] = a_meilleur.astype(np.uint8) << j
+        table_ba[j] = b_meilleur.astype(np.uint8) << j
+    return table_ab, table_ba
+
+# =============================================================================
+# TRACES
+# =============================================================================
+
+class ExplanationTraces:
+    """
+    Traces d'explication de tous les produits (concordance classique).
+
+    Stocke une trace de 4 octets par produit (encode_traces), les profils et les λ.
+    Les masques de critères favorables (produit, profil, sens), les concordances,
+    les verdicts de surclassement et les classes en sont relus à la demande :
+    explain_frame / explain pour un produit, pass_masks pour un lot.
+    """
+
+    def __init__(self, traces, profiles=None, lambda_values=None, product_names=None):
+        self.traces = traces
+        # Profils en liste de dicts (comme DEFAULT_PROFILES) ou en matrice profils × critères
+        profiles = DEFAULT_PROFILES if profiles is None else profiles
+        self.P = np.asarray(profiles, dtype=np.float64) if isinstance(profiles, np.ndarray) \
+            else build_profiles_matrix(profiles)
+        self.lambda_values = list(LAMBDA_VALUES if lambda_values is None else lambda_values)
+        self.product_names = product_names
+        self.criteres = list(CRITERIA.keys())
+        self.table_ab, self.table_ba = rank_tables(self.P)
+        self.table_poids = weight_tables(np.array([[config["weight"] for config in CRITERIA.values()]]))[0]
+
+    @property
+    def n_products(self):
+        return len(self.traces)
+
+    @property
+    def nbytes(self):
+        """Mémoire des traces (les tables de décodage sont négligeables)."""
+        return self.traces.nbytes
+
+    def pass_masks(self, produits=None):
+        """
+        Masques des critères favorables relus dans les traces.
+
+        Returns:
+            (M_ab, M_ba): uint8 profils × produits, identiques à
+            electre_compile.pass_masks(X[produits], P)
+        """
+        traces = self.traces if produits is None else self.traces[np.atleast_1d(produits)]
+        M_ab = np.zeros((self.P.shape[0], len(traces)), dtype=np.uint8)
+        M_ba = np.zeros_like(M_ab)
+        for j in range(len(self.criteres)):
+            rangs = ((traces >> traces.dtype.type(BITS_PAR_CRITERE * j)) & RANG_ABSENT).astype(np.intp)
+            M_ab |= self.table_ab[j][rangs].T
+            M_ba |= self.table_ba[j][rangs].T
+        return M_ab, M_ba
+
+    def concordances(self, produits=None):
+        """Concordances c(a, b) et c(b, a) avec chaque profil (produits × profils)."""
+        M_ab, M_ba = self.pass_masks(produits)
+        return self.table_poids[M_ab.T], self.table_poids[M_ba.T]
+
+    def _criteria_names(self, masque):
+        return [critere for j, critere in enumerate(self.criteres) if masque >> j & 1]
+
+    def explain_frame(self, produit, lambda_val):
+        """
+        Détail d'un produit face à chaque profil pour un λ : critères favorables,
+        concordance et verdict de surclassement dans les deux sens.
+        """
+        M_ab, M_ba = self.pass_masks(produit)
+        lignes = []
+        for k in range(self.P.shape[0]):
+            c_ab, c_ba = self.table_poids[M_ab[k, 0]], self.table_poids[M_ba[k, 0]]
+            lignes.append({
+                "profil": f"b{k + 1}",
+                "c_ab": c_ab, "a_S_b": bool(c_ab >= lambda_val),
+                "criteres_produit": ", ".join(self._criteria_names(M_ab[k, 0])),
+                "c_ba": c_ba, "b_S_a": bool(c_ba >= lambda_val),
+                "criteres_profil": ", ".join(self._criteria_names(M_ba[k, 0])),
+            })
+        return pd.DataFrame(lignes)
+
+    def explain_classes(self, produit, lambda_val):
+        """
+        Classes d'un produit pour un λ et profil qui les décide (mêmes règles que
+        classify_pessimistic_batch et classify_optimistic_batch).
+
+        Returns:
+            dict: procédure → (classe, indice du profil décisif ou None)
+        """
+        detail = self.explain_frame(produit, lambda_val)
+        # Pessimiste : de b5 vers b2, le premier profil surclassé fixe la classe
+        pessimiste = (CLASSES[-1], None)
+        for k in range(PROFILS_MOBILES.stop - 1, PROFILS_MOBILES.start - 1, -1):
+            if detail.at[k, "a_S_b"]:
+                pessimiste = (CLASSES[PROFILS_MOBILES.stop - 1 - k], k)
+                break
+        # Optimiste : de b2 vers b5, le premier profil strictement préféré fixe la classe
+        optimiste = (CLASSES[0], None)
+        for k in range(PROFILS_MOBILES.start, PROFILS_MOBILES.stop):
+            if detail.at[k, "b_S_a"] and not detail.at[k, "a_S_b"]:
+                optimiste = (CLASSES[PROFILS_MOBILES.stop - k], k)
+                break
+        return {"pessimiste": pessimiste, "optimiste": optimiste}
+
+    def explain(self, produit, lambda_val):
+        """Explication lisible du classement d'un produit pour un λ."""
+        detail = self.explain_frame(produit, lambda_val)
+        nom = f" « {self.product_names[produit]} »" if self.product_names is not None else ""
+        lignes = [f"🔍 Produit {produit}{nom} — λ = {lambda_val}"]
+        for procedure, (classe, k) in self.explain_classes(produit, lambda_val).items():
+            if k is None:
+                raison = ("aucun profil de b2 à b5 n'est surclassé" if procedure == "pessimiste"
+                          else "aucun profil de b2 à b5 n'est strictement préféré au produit")
+            elif procedure == "pessimiste":
+                raison = (f"b{k + 1} est le profil le plus haut surclassé : "
+                          f"c(a, b{k + 1}) = {detail.at[k, 'c_ab']:.2f} ≥ {lambda_val}")
+            else:
+                raison = (f"b{k + 1} est le profil le plus bas strictement préféré : "
+                          f"c(b{k + 1}, a) = {detail.at[k, 'c_ba']:.2f} ≥ {lambda_val} "
+                          f"et c(a, b{k + 1}) = {detail.at[k, 'c_ab']:.2f} < {lambda_val}")
+            lignes.append(f"  {procedure.capitalize()} : {classe} ({raison})")
+        lignes.append(detail.to_string(index=False, float_format=lambda c: f"{c:.2f}"))
+        return "\n".join(lignes)
+
+def record_traces(X, P, lambda_values=None, product_names=None):
+    """Enregistre les traces d'explication d'une matrice produits × critères."""
+    return ExplanationTraces(encode_traces(X, P), P, lambda_values, product_names)
+
+def open_traces(input_file=INPUT_XLSX, profiles=None, lambda_values=None):
+    """Charge un fichier d'entrée et enregistre les traces de ses produits."""
+    df = read_input(input_file)
+    X = build_criteria_matrix(extract_criteria_values(df))
+    P = build_profiles_matrix(DEFAULT_PROFILES if profiles is None else profiles)
+    traces = record_traces(X, P, lambda_values, get_product_names(df))
+    print(f"🧾 Traces de {traces.n_products} produits : {traces.nbytes / 1e6:.1f} Mo "
+          f"({traces.traces.itemsize} octets par produit)")
+    return traces
+
+# =============================================================================
+# EXEMPLE D'UTILISATION
+# =============================================================================
+
+if __name__ == "__main__":
+    traces = open_traces(sys.argv[1] if len(sys.argv) > 1 else INPUT_XLSX)
+    produit = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    for lambda_val in traces.lambda_values:
+        print(traces.explain(produit, lambda_val))
@@ -0,0 +1,201 @@
+# electre_export.py - Écriture des résultats ELECTRE TRI (Parquet, Arrow, CSV, Excel en flux)
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from electri_fixed import CRITERIA, CLASSES, PROCEDURES, ElectreResults
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+# Format déduit de l'extension du fichier de sortie
+FORMATS = {
+    ".parquet": "parquet",
+    ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow",
+    ".csv": "csv",
+    ".xlsx": "excel",
+    ".sqlite": "sqlite", ".db": "sqlite",
+}
+# Lignes de données par feuille Excel (1 048 576 lignes moins l'en-tête)
+LIGNES_MAX_FEUILLE = 1_048_575
+# Lignes converties à la fois pour l'écriture Excel en flux
+TAILLE_BLOC_EXCEL = 50_000
+FEUILLE_RESULTATS = "Resultats_ELECTRE_TRI"
+
+# =============================================================================
+# DISPOSITION DES RÉSULTATS
+# =============================================================================
+
+def wide_column_name(procedure, lambda_val):
+    """Nom de la colonne de classe d'une procédure pour un λ (disposition large)."""
+    return f"classe_{procedure}_lambda_{lambda_val}"
+
+def results_to_wide(df_results, lambda_values=None):
+    """
+    Passe du format long de classify_products (une ligne par produit et par λ)
+    au format large : une ligne par produit, une colonne de classe par (λ, procédure).
+
+    Les classes sont des catégories sur CLASSES (un octet par valeur en Parquet/Arrow).
+    """
+    if lambda_values is None:
+        lambda_values = list(pd.unique(df_results['lambda']))
+    # classify_products empile les produits dans le même ordre pour chaque λ
+    blocs = {lambda_val: df_results[df_results['lambda'] == lambda_val] for lambda_val in lambda_values}
+    premier = blocs[lambda_values[0]]
+
+    colonnes_produit = [c for c in df_results.columns
+                        if c not in ('lambda', 'classe_pessimiste', 'classe_optimiste')]
+    wide = premier[colonnes_produit].reset_index(drop=True)
+    for lambda_val, bloc in blocs.items():
+        if len(bloc) != len(wide):
+            raise ValueError(f"❌ λ = {lambda_val}: {len(bloc)} lignes au lieu de {len(wide)}")
+        for procedure in PROCEDURES:
+            wide[wide_column_name(procedure, lambda_val)] = pd.Categorical(
+                bloc[f'classe_{procedure}'].to_numpy(), categories=CLASSES)
+    return wide
+
+def _metadata(profiles, lambda_values, layout, table):
+    """Description de la sortie (profils, critères, λ, colonnes) pour les formats sans onglets."""
+    return {
+        "layout": layout,
+        "lambda_values": list(lambda_values),
+        "classes": CLASSES,
+        "profils": profiles,
+        "criteres": CRITERIA,
+        "colonnes": list(table.columns),
+        "lignes": len(table),
+    }
+
+def metadata_path(output_file):
+    """Fichier JSON accompagnant une sortie Parquet / Arrow / CSV."""
+    output_file = Path(output_file)
+    return output_file.with_name(output_file.stem + ".meta.json")
+
+# =============================================================================
+# ÉCRIVAINS
+# =============================================================================
+
+def _require_pyarrow(format_sortie):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(f"❌ Le format {format_sortie} nécessite pyarrow (pip install pyarrow)") from e
+
+def _write_parquet(table, output_file):
+    _require_pyarrow("Parquet")
+    table.to_parquet(output_file, index=False)
+
+def _write_arrow(table, output_file):
+    _require_pyarrow("Arrow IPC")
+    table.to_feather(output_file)  # Feather v2 = format de fichier Arrow IPC
+
+def _write_csv(table, output_file):
+    table.to_csv(output_file, index=False)
+
+def _excel_rows(table):
+    """Lignes de table en listes Python prêtes pour openpyxl (NaN → cellule vide), bloc par bloc."""
+    for debut in range(0, len(table), TAILLE_BLOC_EXCEL):
+        bloc = table.iloc[debut:debut + TAILLE_BLOC_EXCEL].astype(object)
+        bloc = bloc.where(bloc.notna(), None)
+        yield from bloc.itertuples(index=False, name=None)
+
+def _write_excel_streaming(table, output_file, profiles):
+    """
+    Écrit table avec openpyxl en mode write_only (lignes écrites au fil de l'eau,
+    sans garder les cellules en mémoire). Au-delà de LIGNES_MAX_FEUILLE lignes,
+    la suite est écrite dans Resultats_ELECTRE_TRI_2, _3, ...
+    """
+    from openpyxl import Workbook
+
+    classeur = Workbook(write_only=True)
+    en_tete = list(table.columns)
+    feuille, lignes_feuille, numero = None, LIGNES_MAX_FEUILLE, 0
+    for ligne in _excel_rows(table):
+        if lignes_feuille == LIGNES_MAX_FEUILLE:
+            numero += 1
+            feuille = classeur.create_sheet(FEUILLE_RESULTATS if numero == 1 else f"{FEUILLE_RESULTATS}_{numero}")
+            feuille.append(en_tete)
+            lignes_feuille = 0
+        feuille.append(ligne)
+        lignes_feuille += 1
+    if feuille is None:
+        classeur.create_sheet(FEUILLE_RESULTATS).append(en_tete)
+
+    # Feuille des profils
+    feuille = classeur.create_sheet("Profils_Limites")
+    criteres = list(CRITERIA.keys())
+    feuille.append([""] + criteres)
+    for i, profil in enumerate(profiles):
+        feuille.append([f"π{i+1}"] + [profil.get(critere) for critere in criteres])
+
+    # Configuration des critères
+    feuille = classeur.create_sheet("Configuration_Criteres")
+    proprietes = list(dict.fromkeys(cle for config in CRITERIA.values() for cle in config))
+    feuille.append([""] + proprietes)
+    for critere, config in CRITERIA.items():
+        feuille.append([critere] + [config.get(cle) for cle in proprietes])
+
+    classeur.save(output_file)
+    return max(numero, 1)
+
+# =============================================================================
+# API
+# =============================================================================
+
+def write_results(df_results, output_file, profiles, lambda_values=None, layout="wide"):
+    """
+    Écrit les résultats sans dupliquer de lignes, dans le format donné par l'extension
+    (.parquet, .arrow / .feather / .ipc, .csv, .xlsx, ou .sqlite / .db pour une base
+    indexée interrogeable, voir electre_requetes.py).
+
+    Args:
+        df_results: ElectreResults de classify_products, ou DataFrame au format long
+        lambda_values: λ à écrire (par défaut tous ceux des résultats)
+        layout: "wide" (une ligne par produit, une colonne par (λ, procédure))
+                ou "long" (une ligne par produit et par λ, sans feuilles par λ)
+
+    Les profils et la configuration des critères vont dans des feuilles dédiées
+    en Excel, et dans un fichier <nom>.meta.json pour les autres formats.
+
+    Returns:
+        Path: fichier écrit
+    """
+    # Par défaut, les λ des résultats eux-mêmes ; une liste explicite en écrit un sous-ensemble
+    if isinstance(df_results, ElectreResults):
+        if lambda_values is not None:
+            df_results = df_results.select_lambdas(lambda_values)
+        lambda_values = df_results.lambda_values
+    elif lambda_values is None:
+        lambda_values = list(pd.unique(df_results['lambda']))
+    else:
+        df_results = df_results[df_results['lambda'].isin(lambda_values)]
+    output_file = Path(output_file)
+    format_sortie = FORMATS.get(output_file.suffix.lower())
+    if format_sortie is None:
+        raise ValueError(f"❌ Extension non prise en charge: {output_file.suffix} (attendu: {', '.join(FORMATS)})")
+    if layout not in ("wide", "long"):
+        raise ValueError(f"❌ Disposition inconnue: {layout} (attendu: 'wide' ou 'long')")
+
+    if format_sortie == "sqlite":
+        # Base indexée : une table produits et une table (λ, produit), quelle que soit la disposition
+        from electre_requetes import write_store
+        return write_store(df_results, output_file, profiles, lambda_values)
+
+    if isinstance(df_results, ElectreResults):
+        table = df_results.to_wide() if layout == "wide" else df_results.frame
+    else:
+        table = results_to_wide(df_results, lambda_values) if layout == "wide" else df_results
+    print(f"\n💾 Sauvegarde des résultats dans {output_file} ({format_sortie}, {len(table)} lignes)...")
+
+    if format_sortie == "excel":
+        nb_feuilles = _write_excel_streaming(table, output_file, profiles)
+        if nb_feuilles > 1:
+            print(f"   📄 {nb_feuilles} feuilles de résultats (limite de {LIGNES_MAX_FEUILLE} lignes par feuille)")
+        return output_file
+
+    ecrivains = {"parquet": _write_parquet, "arrow": _write_arrow, "csv": _write_csv}
+    ecrivains[format_sortie](table, output_file)
+    with open(metadata_path(output_file), "w", encoding="utf-8") as f:
+        json.dump(_metadata(profiles, lambda_values, layout, table), f, indent=2, ensure_ascii=False)
+    return output_file
@@ -0,0 +1,300 @@
+# electre_graphiques.py - Graphiques ELECTRE TRI : agrégats calculés une fois, rendu parallèle et cache
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from electri_fixed import CRITERIA, CLASSES, LAMBDA_VALUES, PROCEDURES, ElectreResults
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+# Niveaux de rendu : sous-dossier de sortie ("" = dossier principal) et résolution
+TIERS = {
+    "apercu": {"dossier": "apercu", "dpi": 72},
+    "publication": {"dossier": "", "dpi": 300},
+}
+# Empreintes des graphiques déjà rendus (dans le dossier de sortie)
+MANIFESTE = ".empreintes_graphiques.json"
+# À incrémenter quand l'apparence d'un graphique change (invalide le cache)
+VERSION_RENDU = 1
+
+COULEURS_CLASSES = ['#2E8B57', '#32CD32', '#FFD700', '#FF8C00', '#DC143C']
+NB_INTERVALLES_HISTOGRAMME = 30
+
+# =============================================================================
+# AGRÉGATS (petits, sérialisables en JSON)
+# =============================================================================
+
+def _counts_dict(codes):
+    """Effectifs {classe: n} triés par effectif décroissant, comme value_counts().to_dict()."""
+    compteurs = np.bincount(codes, minlength=len(CLASSES))
+    ordre = np.argsort(-compteurs, kind='stable')
+    return {CLASSES[i]: int(compteurs[i]) for i in ordre if compteurs[i] > 0}
+
+def _class_codes(classes):
+    """Libellés de classe (A' à E') → codes dans CLASSES."""
+    import pandas as pd
+    codes = pd.Categorical(classes, categories=CLASSES).codes
+    return codes[codes >= 0]
+
+def _confusion_aggregate(matrice):
+    """Matrice de confusion sans les totaux, en listes."""
+    sans_totaux = matrice.iloc[:-1, :-1]
+    return {"lignes": list(sans_totaux.index), "colonnes": list(sans_totaux.columns),
+            "valeurs": sans_totaux.to_numpy().astype(int).tolist()}
+
+def chart_aggregates(df_results, comparison_stats, lambda_values=None):
+    """
+    Calcule une seule fois toutes les entrées des graphiques.
+
+    Args:
+        df_results: ElectreResults ou DataFrame long de classify_products
+        comparison_stats: résultat de compare_with_nutriscore
+
+    Returns:
+        dict: {'repartition': {λ: {procédure: effectifs}}, 'confusion': {λ: {procédure: matrice}},
+               'taux': {λ: {procédure: %}}, 'histogrammes': {critère: (effectifs, bornes)}}
+    """
+    if lambda_values is None:
+        lambda_values = LAMBDA_VALUES
+
+    repartition = {}
+    if isinstance(df_results, ElectreResults):
+        for lambda_val in lambda_values:
+            repartition[str(lambda_val)] = {p: df_results.class_counts(lambda_val, p) for p in PROCEDURES}
+        criteres = df_results.df_criteria
+    else:
+        # Un seul filtrage par λ pour tous les graphiques
+        for lambda_val in lambda_values:
+            df_lambda = df_results[df_results['lambda'] == lambda_val]
+            repartition[str(lambda_val)] = {
+                p: _counts_dict(_class_codes(df_lambda[f'classe_{p}'])) for p in PROCEDURES
+            }
+        criteres = df_results[df_results['lambda'] == lambda_values[0]]
+
+    histogrammes = {}
+    for critere in CRITERIA.keys():
+        effectifs, bornes = np.histogram(np.asarray(criteres[critere], dtype=np.float64), bins=NB_INTERVALLES_HISTOGRAMME)
+        histogrammes[critere] = {"effectifs": effectifs.tolist(), "bornes": bornes.tolist()}
+
+    confusion, taux = {}, {}
+    for lambda_key, stats in (comparison_stats or {}).items():
+        lambda_val = lambda_key.split('_')[1]
+        confusion[lambda_val] = {p: _confusion_aggregate(stats[f'matrice_confusion_{p}']) for p in PROCEDURES}
+        taux[lambda_val] = {p: float(stats[f'taux_accord_{p}']) for p in PROCEDURES}
+
+    return {"repartition": repartition, "confusion": confusion, "taux": taux, "histogrammes": histogrammes}
+
+# =============================================================================
+# RENDU (une fonction par graphique, exécutable dans un autre processus)
+# =============================================================================
+# Les figures sont créées sans pyplot (matplotlib.figure.Figure) : pas de backend
+# interactif, pas d'état global partagé entre graphiques.
+
+def _figure(figsize):
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
+
+def _render_repartition(agregat, chemin, dpi):
+    repartition = agregat["repartition"]
+    fig = _figure((15, 6 * len(repartition)))
+    axes = fig.subplots(len(repartition), 2, squeeze=False)
+    fig.suptitle('Répartition des Classifications ELECTRE TRI', fontsize=16, fontweight='bold')
+    for idx, (lambda_val, par_procedure) in enumerate(repartition.items()):
+        for col, (procedure, titre) in enumerate((("pessimiste", "Pessimiste"), ("optimiste", "Optimiste"))):
+            effectifs = par_procedure[procedure]
+            axes[idx, col].pie(list(effectifs.values()), labels=list(effectifs.keys()), autopct='%1.1f%%',
+                               colors=COULEURS_CLASSES)
+            axes[idx, col].set_title(f'{titre} λ={lambda_val}')
+    fig.tight_layout()
+    fig.savefig(chemin, dpi=dpi, bbox_inches='tight')
+
+def _render_comparaison(agregat, chemin, dpi):
+    repartition = agregat["repartition"]
+    fig = _figure((12, 8))
+    ax = fig.subplots()
+    lambda_labels = [f'λ={lam}' for lam in repartition]
+    x = np.arange(len(lambda_labels))
+    width = 0.35
+    bottom_pess = np.zeros(len(lambda_labels))
+    bottom_opt = np.zeros(len(lambda_labels))
+    for i, class_name in enumerate(CLASSES):
+        pess_vals = [r["pessimiste"].get(class_name, 0) for r in repartition.values()]
+        opt_vals = [r["optimiste"].get(class_name, 0) for r in repartition.values()]
+        ax.bar(x - width/2, pess_vals, width, bottom=bottom_pess,
+               label=f'{class_name} (Pess)', color=COULEURS_CLASSES[i], alpha=0.8)
+        ax.bar(x + width/2, opt_vals, width, bottom=bottom_opt,
+               label=f'{class_name} (Opt)', color=COULEURS_CLASSES[i], alpha=0.5)
+        bottom_pess += pess_vals
+        bottom_opt += opt_vals
+    ax.set_xlabel('Seuil Lambda')
+    ax.set_ylabel('Nombre de produits')
+    ax.set_title('Comparaison Pessimiste vs Optimiste par Seuil Lambda')
+    ax.set_xticks(x)
+    ax.set_xticklabels(lambda_labels)
+    ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    fig.tight_layout()
+    fig.savefig(chemin, dpi=dpi, bbox_inches='tight')
+
+def _render_confusion(agregat, chemin, dpi):
+    import pandas as pd
+    import seaborn as sns
+    matrice = pd.DataFrame(agregat["valeurs"], index=agregat["lignes"], columns=agregat["colonnes"])
+    fig = _figure((10, 8))
+    ax = fig.subplots()
+    sns.heatmap(matrice, annot=True, fmt='d', cmap=agregat["palette"], ax=ax,
+                cbar_kws={'label': 'Nombre de produits'})
+    ax.set_title(f'Matrice de Confusion - {agregat["titre"]} (λ={agregat["lambda"]})')
+    ax.set_xlabel('ELECTRE TRI Prédiction')
+    ax.set_ylabel('Nutri-Score Réel')
+    fig.tight_layout()
+    fig.savefig(chemin, dpi=dpi, bbox_inches='tight')
+
+def _render_taux(agregat, chemin, dpi):
+    taux = agregat["taux"]
+    fig = _figure((10, 6))
+    ax = fig.subplots()
+    lambdas = [f'λ={lam}' for lam in taux]
+    x = np.arange(len(lambdas))
+    width = 0.35
+    bars1 = ax.bar(x - width/2, [t["pessimiste"] for t in taux.values()], width, label='Pessimiste',
+                   color='#4169E1', alpha=0.8)
+    bars2 = ax.bar(x + width/2, [t["optimiste"] for t in taux.values()], width, label='Optimiste',
+                   color='#FF6347', alpha=0.8)
+    # Ajouter les valeurs sur les barres
+    for bar in [*bars1, *bars2]:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 0.5, f'{height:.1f}%', ha='center', va='bottom')
+    ax.set_xlabel('Seuil Lambda')
+    ax.set_ylabel('Taux d\'accord (%)')
+    ax.set_title('Taux d\'accord avec le Nutri-Score par Méthode et Seuil')
+    ax.set_xticks(x)
+    ax.set_xticklabels(lambdas)
+    ax.legend()
+    ax.set_ylim(0, 100)
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(chemin, dpi=dpi, bbox_inches='tight')
+
+def _render_distribution(agregat, chemin, dpi):
+    fig = _figure((20, 10))
+    axes = fig.subplots(2, 4).flatten()
+    fig.suptitle('Distribution des Valeurs des Critères', fontsize=16, fontweight='bold')
+    for idx, (criterion, histogramme) in enumerate(agregat["histogrammes"].items()):
+        bornes = histogramme["bornes"]
+        # Histogramme précalculé : une valeur par intervalle, pondérée par son effectif
+        axes[idx].hist(bornes[:-1], bins=bornes, weights=histogramme["effectifs"],
+                       alpha=0.7, color='skyblue', edgecolor='black')
+        axes[idx].set_title(f'{criterion}\n({CRITERIA[criterion]["direction"]} criterion)')
+        axes[idx].set_xlabel('Valeur')
+        axes[idx].set_ylabel('Fréquence')
+        axes[idx].grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(chemin, dpi=dpi, bbox_inches='tight')
+
+def chart_tasks(agregats):
+    """Liste des graphiques à produire : (nom de fichier, fonction de rendu, entrée)."""
+    taches = [
+        ("repartition_classifications.png", _render_repartition, {"repartition": agregats["repartition"]}),
+        ("comparaison_pessimiste_optimiste.png", _render_comparaison, {"repartition": agregats["repartition"]}),
+    ]
+    for lambda_val, par_procedure in agregats["confusion"].items():
+        for procedure, titre, palette in (("pessimiste", "Pessimiste", "Blues"), ("optimiste", "Optimiste", "Oranges")):
+            taches.append((f'confusion_{procedure}_lambda_{lambda_val.replace(".", "_")}.png', _render_confusion,
+                           {**par_procedure[procedure], "titre": titre, "palette": palette, "lambda": lambda_val}))
+    if agregats["taux"]:
+        taches.append(("taux_accord_nutriscore.png", _render_taux, {"taux": agregats["taux"]}))
+    taches.append(("distribution_criteres.png", _render_distribution, {"histogrammes": agregats["histogrammes"]}))
+    return taches
+
+# =============================================================================
+# CACHE ET EXÉCUTION
+# =============================================================================
+
+def chart_fingerprint(nom, agregat, dpi):
+    """Empreinte d'un graphique : son entrée, sa résolution et la version du rendu."""
+    empreinte = hashlib.blake2b(digest_size=16)
+    empreinte.update(json.dumps([VERSION_RENDU, nom, dpi, agregat], sort_keys=True, ensure_ascii=False).encode())
+    return empreinte.hexdigest()
+
+def _load_manifest(output_dir):
+    try:
+        with open(Path(output_dir) / MANIFESTE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(output_dir, manifeste):
+    chemin = Path(output_dir) / MANIFESTE
+    temporaire = chemin.with_name(chemin.name + ".tmp")
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump(manifeste, f, indent=2, sort_keys=True)
+    os.replace(temporaire, chemin)
+
+def _render(fonction, agregat, chemin, dpi):
+    """Rendu d'un graphique (dans le processus courant ou un processus du pool)."""
+    import matplotlib
+    with matplotlib.rc_context({'font.size': 10}):
+        fonction(agregat, chemin, dpi)
+    return chemin
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")  # backend non interactif
+
+def render_charts(df_results, comparison_stats, output_dir="graphiques", lambda_values=None,
+                  tiers=("apercu", "publication"), n_workers=None, use_cache=True):
+    """
+    Produit tous les graphiques de l'analyse.
+
+    Les entrées sont agrégées une seule fois (chart_aggregates), puis chaque graphique
+    de chaque niveau de TIERS est rendu dans un pool de processus. Un graphique dont
+    l'entrée, la résolution et la version n'ont pas changé depuis le dernier rendu
+    (et dont le fichier existe encore) n'est pas redessiné.
+
+    Args:
+        tiers: niveaux à produire ('apercu' = 72 dpi dans <output_dir>/apercu,
+               'publication' = 300 dpi dans <output_dir>)
+        n_workers: nombre de processus (None = autant que de graphiques, dans la limite des cœurs ; 1 = séquentiel)
+        use_cache: ignorer les graphiques inchangés
+
+    Returns:
+        str: output_dir
+    """
+    agregats = chart_aggregates(df_results, comparison_stats, lambda_values)
+    taches = chart_tasks(agregats)
+    manifeste = _load_manifest(output_dir) if use_cache else {}
+
+    a_rendre, inchanges, empreintes = [], 0, {}
+    for tier in tiers:
+        dossier = Path(output_dir) / TIERS[tier]["dossier"]
+        dossier.mkdir(parents=True, exist_ok=True)
+        dpi = TIERS[tier]["dpi"]
+        for nom, fonction, agregat in taches:
+            chemin = dossier / nom
+            cle = str(chemin.relative_to(output_dir))
+            empreintes[cle] = chart_fingerprint(nom, agregat, dpi)
+            if use_cache and manifeste.get(cle) == empreintes[cle] and chemin.exists():
+                inchanges += 1
+            else:
+                a_rendre.append((fonction, agregat, str(chemin), dpi))
+
+    if n_workers is None:
+        n_workers = min(len(a_rendre), os.cpu_count() or 1)
+    if n_workers <= 1 or len(a_rendre) <= 1:
+        for tache in a_rendre:
+            _render(*tache)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker) as pool:
+            # list() propage la première exception levée dans un processus
+            list(pool.map(_render, *zip(*a_rendre)))
+
+    manifeste.update(empreintes)
+    _save_manifest(output_dir, manifeste)
+    print(f"📊 Graphiques sauvegardés dans le dossier '{output_dir}/' "
+          f"({len(a_rendre)} rendus, {inchanges} inchangés)")
+    return output_dir
@@ -0,0 +1,239 @@
+# electre_incremental.py - Classification incrémentale avec stockage persistant des résultats
+import hashlib
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from electri_fixed import (
+    CRITERIA, CLASSES, LAMBDA_VALUES, DEFAULT_PROFILES, INPUT_XLSX, NUTRISCORE_LETTRES, PROCEDURES,
+    read_input, extract_criteria_values, build_criteria_matrix, build_profiles_matrix,
+    compute_concordance_matrices, classify_lambdas, clean_nutriscore_series,
+    get_product_names, print_comparison_results,
+)
+from electre_streaming import init_aggregates, aggregates_to_comparison_stats
+from electre_export import write_results
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+STORE_PATH = "electre_tri_resultats.sqlite"
+# Identifiant stable des produits (code-barres OpenFoodFacts), product_name à défaut
+ID_COLUMNS = ["code", "product_name"]
+
+# =============================================================================
+# EMPREINTES
+# =============================================================================
+
+def model_fingerprint(profiles):
+    """Empreinte des paramètres du modèle (CRITERIA et profils), indépendante de λ."""
+    contenu = json.dumps({'criteres': CRITERIA, 'profils': profiles}, sort_keys=True)
+    return hashlib.blake2b(contenu.encode(), digest_size=16).hexdigest()
+
+def criteria_fingerprints(df_criteria):
+    """Empreinte 64 bits du vecteur de critères de chaque produit."""
+    valeurs = pd.DataFrame(build_criteria_matrix(df_criteria))
+    return pd.util.hash_pandas_object(valeurs, index=False).to_numpy().view(np.int64)
+
+def product_ids(df, id_column=None):
+    """Identifiants texte des produits (les codes numériques lus en float sont normalisés)."""
+    colonnes = [id_column] if id_column else ID_COLUMNS
+    for colonne in colonnes:
+        if colonne in df.columns:
+            ids = df[colonne]
+            if pd.api.types.is_float_dtype(ids):
+                ids = ids.astype('Int64')
+            return ids.astype(str).to_numpy(dtype=object)
+    raise ValueError(f"❌ Aucune colonne d'identifiant trouvée parmi {colonnes}")
+
+# =============================================================================
+# STOCKAGE SQLITE
+# =============================================================================
+
+def _colonnes_criteres():
+    return ", ".join(f'"{critere}" REAL' for critere in CRITERIA.keys())
+
+def open_store(store_path=STORE_PATH):
+    """Ouvre (et crée si besoin) la base des résultats."""
+    connexion = sqlite3.connect(store_path)
+    connexion.executescript(f"""
+        CREATE TABLE IF NOT EXISTS produits (
+            product_id TEXT PRIMARY KEY,
+            product_name TEXT,
+            nutriscore_original TEXT,
+            empreinte_criteres INTEGER,
+            {_colonnes_criteres()}
+        );
+        CREATE TABLE IF NOT EXISTS resultats (
+            product_id TEXT,
+            lambda REAL,
+            empreinte_modele TEXT,
+            empreinte_criteres INTEGER,
+            classe_pessimiste INTEGER,
+            classe_optimiste INTEGER,
+            PRIMARY KEY (product_id, lambda)
+        );
+    """)
+    return connexion
+
+def _changed_products(connexion, ids, noms, nutriscores, empreintes):
+    """Masque des produits absents du stock ou dont la fiche a changé."""
+    stockes = pd.read_sql_query(
+        "SELECT product_id, product_name, nutriscore_original, empreinte_criteres FROM produits", connexion)
+    courants = pd.DataFrame({'product_id': ids, 'nom': noms, 'nutriscore': nutriscores, 'empreinte': empreintes})
+    fusion = courants.merge(stockes, on='product_id', how='left')
+    identiques = ((fusion['empreinte_criteres'] == fusion['empreinte'])
+                  & (fusion['nutriscore_original'] == fusion['nutriscore'])
+                  & ((fusion['product_name'] == fusion['nom'].astype(str)) | fusion['nom'].isna()))
+    return ~identiques.to_numpy()
+
+def _upsert_products(connexion, ids, noms, nutriscores, empreintes, df_criteria):
+    """Insère ou met à jour la fiche des produits."""
+    colonnes = ", ".join(f'"{critere}"' for critere in CRITERIA.keys())
+    marqueurs = ", ".join("?" * (4 + len(CRITERIA)))
+    lignes = zip(ids, noms, nutriscores, empreintes.tolist(),
+                 *(df_criteria[critere].astype(float).tolist() for critere in CRITERIA.keys()))
+    connexion.executemany(
+        f"INSERT OR REPLACE INTO produits (product_id, product_name, nutriscore_original, "
+        f"empreinte_criteres, {colonnes}) VALUES ({marqueurs})",
+        ((i, None if pd.isna(n) else str(n), *reste) for i, n, *reste in lignes))
+
+def _stale_products(connexion, lambda_val, empreinte_modele):
+    """
+    Produits stockés dont le résultat pour lambda_val est absent ou périmé.
+    
+    Un résultat est périmé si le vecteur de critères du produit ou les
+    paramètres du modèle (CRITERIA, profils) ont changé depuis son calcul.
+    """
+    colonnes = ", ".join(f'p."{critere}"' for critere in CRITERIA.keys())
+    return pd.read_sql_query(f"""
+        SELECT p.product_id, p.empreinte_criteres, {colonnes}
+        FROM produits p
+        WHERE NOT EXISTS (
+            SELECT 1 FROM resultats r
+            WHERE r.product_id = p.product_id AND abs(r.lambda - ?) < 1e-9
+              AND r.empreinte_modele = ? AND r.empreinte_criteres = p.empreinte_criteres
+        )""", connexion, params=(lambda_val, empreinte_modele))
+
+def _upsert_results(connexion, ids, lambda_val, empreinte_modele, empreintes, codes_pessimiste, codes_optimiste):
+    """Insère ou remplace les résultats d'un λ."""
+    connexion.executemany(
+        "INSERT OR REPLACE INTO resultats VALUES (?, ?, ?, ?, ?, ?)",
+        zip(ids, [lambda_val] * len(ids), [empreinte_modele] * len(ids), empreintes.tolist(),
+            codes_pessimiste.tolist(), codes_optimiste.tolist()))
+
+# =============================================================================
+# LECTURE DES RÉSULTATS STOCKÉS
+# =============================================================================
+
+def stored_aggregates(connexion, profiles, lambda_values):
+    """Recalcule répartitions et matrices de confusion par agrégation SQL (sans tout recharger)."""
+    agregats = init_aggregates(lambda_values)
+    empreinte_modele = model_fingerprint(profiles)
+    for lambda_val, agregat in agregats.items():
+        for procedure in PROCEDURES:
+            comptes = connexion.execute(f"""
+                SELECT p.nutriscore_original, r.classe_{procedure}, COUNT(*)
+                FROM resultats r JOIN produits p USING (product_id)
+                WHERE abs(r.lambda - ?) < 1e-9 AND r.empreinte_modele = ?
+                GROUP BY 1, 2""", (lambda_val, empreinte_modele)).fetchall()
+            for nutriscore, code, nombre in comptes:
+                agregat[f'repartition_{procedure}'][code] += nombre
+                if nutriscore in NUTRISCORE_LETTRES:
+                    agregat[f'confusion_{procedure}'][NUTRISCORE_LETTRES.index(nutriscore), code] += nombre
+        agregat['nb_produits'] = int(agregat['repartition_pessimiste'].sum())
+    return agregats
+
+def load_results(connexion, profiles, lambda_values):
+    """
+    Résultats stockés à jour, au format long de classify_products.
+    
+    Les produits sont triés dans le même ordre pour chaque λ (ordre de la table
+    produits) : les résultats d'un λ ajouté plus tard, ou d'un produit reclassé,
+    sont insérés ailleurs dans resultats, mais la disposition large et la base
+    indexée alignent les blocs λ ligne à ligne.
+    """
+    colonnes = ", ".join(f'p."{critere}"' for critere in CRITERIA.keys())
+    df = pd.read_sql_query(f"""
+        SELECT p.product_name, p.nutriscore_original, r.lambda,
+               r.classe_pessimiste, r.classe_optimiste, {colonnes}
+        FROM resultats r JOIN produits p USING (product_id)
+        WHERE r.empreinte_modele = ?
+        ORDER BY r.lambda, p.rowid""", connexion, params=(model_fingerprint(profiles),))
+    df = df[np.isin(df['lambda'], lambda_values)].reset_index(drop=True)
+    labels = np.array(CLASSES, dtype=object)
+    for procedure in PROCEDURES:
+        df[f'classe_{procedure}'] = labels[df[f'classe_{procedure}'].to_numpy()]
+    return df
+
+# =============================================================================
+# PIPELINE INCRÉMENTAL
+# =============================================================================
+
+def run_electre_tri_incremental(input_file=INPUT_XLSX, store_path=STORE_PATH, profiles=None,
+                                lambda_values=None, id_column=None, output_file=None):
+    """
+    Classe uniquement les produits nouveaux ou modifiés et fusionne avec le stock.
+    
+    Chaque résultat est stocké par (identifiant produit, λ) avec l'empreinte
+    du vecteur de critères et celle du modèle (CRITERIA + profils). Ajouter
+    un λ ne calcule que ce λ ; changer un produit ne recalcule que lui ;
+    changer poids ou profils recalcule tous les produits stockés, y compris
+    ceux absents du fichier d'entrée (à partir de leurs critères stockés).
+    
+    Args:
+        output_file: si fourni, export de tous les résultats stockés (format selon l'extension, voir write_results)
+    
+    Returns:
+        dict: statistiques au format de compare_with_nutriscore, sur tout le stock
+    """
+    if profiles is None:
+        profiles = DEFAULT_PROFILES
+    if lambda_values is None:
+        lambda_values = LAMBDA_VALUES
+    
+    print("🔄 Début de l'analyse ELECTRE TRI (mode incrémental)")
+    df = read_input(input_file)
+    # Un identifiant en double : la dernière occurrence l'emporte
+    df = df[~pd.Series(product_ids(df, id_column)).duplicated(keep='last').to_numpy()].reset_index(drop=True)
+    ids = product_ids(df, id_column)
+    df_criteria = extract_criteria_values(df)
+    empreintes = criteria_fingerprints(df_criteria)
+    empreinte_modele = model_fingerprint(profiles)
+    P = build_profiles_matrix(profiles)
+    
+    connexion = open_store(store_path)
+    try:
+        with connexion:
+            # Étape 1: mettre à jour les fiches produits nouvelles ou modifiées
+            noms = get_product_names(df)
+            nutriscores = clean_nutriscore_series(df)
+            modifies = _changed_products(connexion, ids, noms, nutriscores, empreintes)
+            _upsert_products(connexion, ids[modifies], noms[modifies], nutriscores[modifies],
+                             empreintes[modifies], df_criteria[modifies])
+            print(f"📊 {len(df)} produits lus, {modifies.sum()} nouveaux ou modifiés")
+            
+            # Étape 2: reclasser uniquement les entrées (produit, λ) périmées
+            for lambda_val in lambda_values:
+                perimes = _stale_products(connexion, lambda_val, empreinte_modele)
+                if len(perimes) > 0:
+                    C_ab, C_ba = compute_concordance_matrices(build_criteria_matrix(perimes), P)
+                    codes_pessimiste, codes_optimiste = classify_lambdas(C_ab, C_ba, [lambda_val])[lambda_val]
+                    _upsert_results(connexion, perimes['product_id'].to_numpy(), lambda_val, empreinte_modele,
+                                    perimes['empreinte_criteres'].to_numpy(), codes_pessimiste, codes_optimiste)
+                print(f"  λ = {lambda_val}: {len(perimes)} résultats mis à jour")
+        
+        comparison_stats = aggregates_to_comparison_stats(stored_aggregates(connexion, profiles, lambda_values))
+        print("\n📊 Comparaison avec le Nutri-Score original (tous les produits stockés):")
+        print_comparison_results(comparison_stats)
+        
+        if output_file:
+            write_results(load_results(connexion, profiles, lambda_values), output_file, profiles, lambda_values)
+            print(f"✅ Résultats exportés dans {output_file}")
+    finally:
+        connexion.close()
+    
+    return comparison_stats
+
+if __name__ == "__main__":
+    run_electre_tri_incremental()
@@ -0,0 +1,300 @@
+# electre_ingestion.py - Ingestion en flux d'un export Open Food Facts (CSV ou JSONL, .gz accepté)
+import argparse
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.nut_col_recup import nutriments_cles
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+# Octets lus à la fois dans le dump (mémoire bornée : un bloc brut + ses lignes retenues)
+TAILLE_BLOC_LECTURE = 32 * 1024 * 1024
+# Ligne de progression : à chaque point de pourcentage, ou tous les N blocs pour un .gz (taille inconnue)
+BLOCS_PAR_PROGRESSION = 16
+# Champs texte projetés, en plus des nutriments de nutriments_cles
+CHAMPS_TEXTE = ["product_name", "nutriscore_grade"]
+CHAMP_CATEGORIES = "categories_tags"
+# Colonnes produites, dans l'ordre attendu par le classifieur (COLONNES_UTILES de electre_streaming)
+COLONNES_SORTIE = CHAMPS_TEXTE + list(nutriments_cles.values())
+FORMATS_SORTIE = ["csv", "parquet"]
+
+# =============================================================================
+# FILTRE PAR CATÉGORIE
+# =============================================================================
+# Deux niveaux : un test d'octets sur la ligne brute (sur-ensemble, avant tout
+# parsing), puis le test exact sur le champ categories_tags une fois la ligne lue.
+# Sur un filtre sélectif, l'essentiel du dump n'est jamais parsé.
+
+def normalize_tags(categories):
+    """'spreads, fr:pates-a-tartiner' → ['en:spreads', 'fr:pates-a-tartiner'] (préfixe en: par défaut)."""
+    if categories is None:
+        return None
+    if isinstance(categories, str):
+        categories = categories.split(",")
+    tags = []
+    for categorie in categories:
+        tag = categorie.strip().lower().replace(" ", "-")
+        if tag:
+            tags.append(tag if ":" in tag else f"en:{tag}")
+    return tags or None
+
+def _tags_match(series_tags, tags):
+    """Masque des lignes dont categories_tags ('en:a,en:b') contient au moins un des tags."""
+    entourees = "," + series_tags.fillna("").astype(str) + ","
+    masque = np.zeros(len(series_tags), dtype=bool)
+    for tag in tags:
+        masque |= entourees.str.contains(f",{tag},", regex=False).to_numpy()
+    return masque
+
+# =============================================================================
+# LECTURE PAR BLOCS D'OCTETS
+# =============================================================================
+
+def _open_binary(chemin):
+    chemin = Path(chemin)
+    return gzip.open(chemin, "rb") if chemin.suffix == ".gz" else open(chemin, "rb")
+
+def dump_format(chemin):
+    """'csv' ou 'jsonl' d'après l'extension (.gz ignoré)."""
+    suffixes = [s.lower() for s in Path(chemin).suffixes if s.lower() != ".gz"]
+    suffixe = suffixes[-1] if suffixes else ""
+    if suffixe in (".csv", ".tsv", ".txt"):
+        return "csv"
+    if suffixe in (".jsonl", ".json", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"❌ Format de dump non reconnu : {chemin} (.csv, .tsv ou .jsonl, éventuellement .gz)")
+
+def iter_line_blocks(fichier, taille_bloc=TAILLE_BLOC_LECTURE):
+    """Blocs d'octets du fichier, chacun complété jusqu'à la fin de sa dernière ligne."""
+    while True:
+        bloc = fichier.read(taille_bloc)
+        if not bloc:
+            break
+        if not bloc.endswith(b"\n"):
+            bloc += fichier.readline()
+        yield bloc
+
+def _prefilter(bloc, motifs):
+    """
+    Lignes d'un bloc contenant au moins un motif (sans motifs : le bloc tel quel).
+
+    On cherche les motifs (bytes.find, à la vitesse de la mémoire) puis on remonte
+    aux bornes de leur ligne, au lieu de découper et tester chaque ligne.
+    """
+    if not motifs:
+        return bloc
+    bornes = set()
+    for motif in motifs:
+        position = bloc.find(motif)
+        while position >= 0:
+            debut = bloc.rfind(b"\n", 0, position) + 1
+            fin = bloc.find(b"\n", position)
+            if fin < 0:
+                fin = len(bloc)
+            bornes.add((debut, fin))
+            position = bloc.find(motif, fin)
+    return b"\n".join(bloc[debut:fin] for debut, fin in sorted(bornes))
+
+def _finalize(df, tags, statistiques):
+    """Filtre exact par catégorie, valeurs numériques, colonnes et ordre de sortie."""
+    if tags is not None:
+        df = df.loc[_tags_match(df[CHAMP_CATEGORIES], tags)]
+    sortie = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for champ in CHAMPS_TEXTE:
+        sortie[champ] = df[champ].to_numpy() if champ in df.columns else None
+    for cle, colonne in nutriments_cles.items():
+        valeurs = df[cle] if cle in df.columns else pd.Series(np.nan, index=df.index)
+        sortie[colonne] = pd.to_numeric(valeurs, errors="coerce").to_numpy(dtype=np.float64)
+    statistiques["produits_retenus"] += len(sortie)
+    return sortie
+
+# =============================================================================
+# EXPORT CSV (séparateur tabulation, une ligne par produit)
+# =============================================================================
+
+def _csv_header(fichier, tags=None):
+    entete = fichier.readline().decode("utf-8").rstrip("\r\n").split("\t")
+    if tags and CHAMP_CATEGORIES not in entete:
+        raise ValueError(f"❌ Filtre par catégorie impossible : colonne {CHAMP_CATEGORIES} absente du dump")
+    manquants = [c for c in CHAMPS_TEXTE + list(nutriments_cles) if c not in entete]
+    if manquants:
+        print(f"⚠️  Colonnes absentes du dump (valeurs vides) : {', '.join(manquants)}")
+    return entete
+
+def _iter_csv_frames(fichier, tags, motifs, statistiques, taille_bloc):
+    """Blocs du CSV Open Food Facts, projetés sur les colonnes utiles par le parseur C de pandas."""
+    entete = _csv_header(fichier, tags)
+    utiles = set(CHAMPS_TEXTE) | set(nutriments_cles) | ({CHAMP_CATEGORIES} if tags else set())
+    colonnes = [c for c in entete if c in utiles]
+    texte = {c: str for c in colonnes if c in CHAMPS_TEXTE or c == CHAMP_CATEGORIES}
+    for bloc in iter_line_blocks(fichier, taille_bloc):
+        statistiques["octets_lus"] += len(bloc)
+        donnees = _prefilter(bloc, motifs)
+        if not donnees.strip():
+            continue
+        # Les champs OFF ne contiennent ni tabulation ni saut de ligne : pas de guillemets à interpréter
+        df = pd.read_csv(io.BytesIO(donnees), sep="\t", header=None, names=entete, usecols=colonnes,
+                         dtype=texte, quoting=csv.QUOTE_NONE, on_bad_lines="skip", low_memory=False)
+        yield _finalize(df, tags, statistiques)
+
+# =============================================================================
+# EXPORT JSONL (un objet produit par ligne, nutriments imbriqués)
+# =============================================================================
+
+def _project_product(produit):
+    """Champs utiles d'un objet produit OFF (nutriments lus dans 'nutriments', sinon à la racine)."""
+    nutriments = produit.get("nutriments") or {}
+    ligne = {champ: produit.get(champ) for champ in CHAMPS_TEXTE}
+    categories = produit.get(CHAMP_CATEGORIES)
+    ligne[CHAMP_CATEGORIES] = ",".join(categories) if isinstance(categories, list) else categories
+    for cle in nutriments_cles:
+        ligne[cle] = nutriments.get(cle, produit.get(cle))
+    return ligne
+
+def _iter_jsonl_frames(fichier, tags, motifs, statistiques, taille_bloc):
+    """Blocs du JSONL Open Food Facts : seules les lignes retenues par le préfiltre sont décodées."""
+    for bloc in iter_line_blocks(fichier, taille_bloc):
+        statistiques["octets_lus"] += len(bloc)
+        lignes = []
+        for ligne in _prefilter(bloc, motifs).split(b"\n"):
+            if not ligne.strip():
+                continue
+            try:
+                lignes.append(_project_product(json.loads(ligne)))
+            except (ValueError, AttributeError):
+                statistiques["lignes_illisibles"] += 1
+        if lignes:
+            yield _finalize(pd.DataFrame(lignes), tags, statistiques)
+
+def iter_off_frames(dump, categories=None, taille_bloc=TAILLE_BLOC_LECTURE, statistiques=None):
+    """
+    Parcourt un dump Open Food Facts bloc par bloc.
+
+    Args:
+        dump: export CSV (tabulations) ou JSONL, éventuellement compressé en .gz
+        categories: tags de catégorie à garder (au moins un), None = tous les produits
+        taille_bloc: octets lus à la fois
+        statistiques: dict mis à jour (octets_lus, produits_retenus, lignes_illisibles)
+
+    Yields:
+        DataFrame aux colonnes COLONNES_SORTIE (nutriments renommés comme dans
+        nutriments_cles, valeurs float64, NaN si absentes)
+    """
+    tags = normalize_tags(categories)
+    motifs = [tag.encode("utf-8") for tag in tags] if tags else None
+    if statistiques is None:
+        statistiques = {}
+    for cle in ("octets_lus", "produits_retenus", "lignes_illisibles"):
+        statistiques.setdefault(cle, 0)
+    lecteur = _iter_csv_frames if dump_format(dump) == "csv" else _iter_jsonl_frames
+    with _open_binary(dump) as fichier:
+        yield from lecteur(fichier, tags, motifs, statistiques, taille_bloc)
+
+# =============================================================================
+# ÉCRITURE
+# =============================================================================
+
+class _CsvSink:
+    def __init__(self, chemin):
+        self.fichier = open(chemin, "w", encoding="utf-8", newline="")
+        self.entete = True
+
+    def write(self, df):
+        df.to_csv(self.fichier, index=False, header=self.entete)
+        self.entete = False
+
+    def close(self):
+        if self.entete:  # aucun produit retenu : fichier avec l'en-tête seul
+            pd.DataFrame(columns=COLONNES_SORTIE).to_csv(self.fichier, index=False)
+        self.fichier.close()
+
+class _ParquetSink:
+    def __init__(self, chemin):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("❌ Le format Parquet nécessite pyarrow (pip install pyarrow)") from e
+        self.pa = pa
+        schema = pa.schema([(c, pa.string()) for c in CHAMPS_TEXTE] +
+                           [(c, pa.float64()) for c in nutriments_cles.values()])
+        self.writer = pq.ParquetWriter(chemin, schema)
+
+    def write(self, df):
+        self.writer.write_table(self.pa.Table.from_pandas(df, schema=self.writer.schema, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
+
+def ingest_off_dump(dump, output_file, categories=None, taille_bloc=TAILLE_BLOC_LECTURE):
+    """
+    Convertit un dump Open Food Facts en fichier d'entrée du classifieur, en flux.
+
+    Seules les colonnes utiles sont gardées (product_name, nutriscore_grade et les
+    nutriments de nutriments_cles, déjà renommés en critères ELECTRE TRI) ; la
+    mémoire reste bornée par taille_bloc quelle que soit la taille du dump.
+    Le résultat (.csv ou .parquet) se lit avec read_input ou iter_input_chunks.
+
+    Returns:
+        dict: octets_lus, produits_retenus, lignes_illisibles, temps_s, mo_par_s
+    """
+    format_sortie = Path(output_file).suffix.lower().lstrip(".")
+    if format_sortie not in FORMATS_SORTIE:
+        raise ValueError(f"❌ Format de sortie non supporté : {output_file} ({', '.join(FORMATS_SORTIE)})")
+    print(f"📥 Ingestion de {dump}" + (f" (catégories : {', '.join(normalize_tags(categories))})"
+                                       if normalize_tags(categories) else ""))
+
+    statistiques = {}
+    # Octets décompressés inconnus pour un .gz : progression par paliers de blocs, sans pourcentage
+    taille_dump = None if Path(dump).suffix == ".gz" else Path(dump).stat().st_size
+    palier = max(taille_dump // 100, 1) if taille_dump else BLOCS_PAR_PROGRESSION * taille_bloc
+    dernier_palier = 0
+    debut = time.perf_counter()
+    sortie = _ParquetSink(output_file) if format_sortie == "parquet" else _CsvSink(output_file)
+    try:
+        for df in iter_off_frames(dump, categories, taille_bloc, statistiques):
+            if len(df):
+                sortie.write(df)
+            if statistiques["octets_lus"] // palier == dernier_palier:
+                continue
+            dernier_palier = statistiques["octets_lus"] // palier
+            pourcentage = f" ({min(dernier_palier, 100)} %)" if taille_dump else ""
+            print(f"   {statistiques['octets_lus'] / 1024 ** 2:>10,.0f} Mo lus{pourcentage}, "
+                  f"{statistiques['produits_retenus']:,} produits retenus", end="\r")
+    finally:
+        sortie.close()
+    statistiques["temps_s"] = time.perf_counter() - debut
+    statistiques["mo_par_s"] = statistiques["octets_lus"] / 1024 ** 2 / max(statistiques["temps_s"], 1e-9)
+    print(f"\n✅ {statistiques['produits_retenus']:,} produits écrits dans {output_file} "
+          f"({statistiques['octets_lus'] / 1024 ** 2:.0f} Mo en {statistiques['temps_s']:.1f} s, "
+          f"{statistiques['mo_par_s']:.0f} Mo/s)")
+    if statistiques["lignes_illisibles"]:
+        print(f"   ⚠️  {statistiques['lignes_illisibles']} lignes illisibles ignorées")
+    return statistiques
+
+# =============================================================================
+# LIGNE DE COMMANDE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestion d'un dump Open Food Facts pour ELECTRE TRI")
+    parser.add_argument("dump", help="export OFF (.csv / .jsonl, éventuellement .gz)")
+    parser.add_argument("sortie", help="fichier produit (.csv ou .parquet)")
+    parser.add_argument("-c", "--categories", help="tags à garder, ex. 'en:spreads,en:sweet-spreads'")
+    parser.add_argument("--taille-bloc", type=int, default=TAILLE_BLOC_LECTURE // 1024 ** 2, metavar="MO",
+                        help="mégaoctets lus à la fois")
+    args = parser.parse_args(argv)
+    ingest_off_dump(args.dump, args.sortie, args.categories, args.taille_bloc * 1024 ** 2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
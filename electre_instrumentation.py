@@ -0,0 +1,288 @@
+# electre_instrumentation.py - Mesures par étape de run_electre_tri (temps, CPU, mémoire, débit)
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows : pas de pic RSS
+    resource = None
+
+# =============================================================================
+# MÉMOIRE
+# =============================================================================
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus depuis son démarrage (Mo), None si indisponible."""
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sous macOS, kilo-octets sous Linux
+    return pic / (1024 * 1024) if sys.platform == "darwin" else pic / 1024
+
+def _proc_status_mb(champ):
+    """Champ mémoire de /proc/self/status (Mo), None hors Linux."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for ligne in f:
+                if ligne.startswith(champ + ":"):
+                    return int(ligne.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def current_rss_mb():
+    """Mémoire résidente actuelle du processus (Mo), None si indisponible."""
+    return _proc_status_mb("VmRSS")
+
+def reset_peak_rss():
+    """
+    Ramène le pic RSS du processus à la mémoire résidente actuelle (Linux ≥ 4.0),
+    pour mesurer le pic propre à l'étape qui suit. False si impossible.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+def stage_peak_rss_mb():
+    """Pic RSS depuis le dernier reset_peak_rss (Mo), None hors Linux."""
+    return _proc_status_mb("VmHWM")
+
+def start_stage_rss():
+    """
+    Début de la mesure mémoire d'une étape : relève la mémoire résidente et le pic
+    du processus, puis remet le pic à zéro (Linux) pour que l'étape ait le sien.
+    """
+    rss_debut = current_rss_mb()
+    pic_processus = peak_rss_mb()
+    pic_propre = rss_debut is not None and reset_peak_rss()
+    return rss_debut, pic_propre, pic_processus
+
+def stop_stage_rss(debut):
+    """
+    Fin de la mesure commencée par start_stage_rss.
+
+    Returns:
+        (rss_pic_mo, rss_hausse_mo): pic RSS atteint pendant l'étape et sa hausse
+        au-dessus de la mémoire résidente du début d'étape. Sans remise à zéro
+        (hors Linux), pic du processus et hausse de ce pic pendant l'étape, qui ne
+        compte que ce qui dépasse le pic des étapes précédentes. None si indisponible.
+    """
+    rss_debut, pic_propre, pic_avant = debut
+    if pic_propre:
+        pic = stage_peak_rss_mb()
+        return pic, pic - rss_debut
+    pic = peak_rss_mb()
+    return pic, None if pic is None else pic - pic_avant
+
+# =============================================================================
+# PROFILEUR PAR ÉCHANTILLONNAGE
+# =============================================================================
+
+class StackSampler:
+    """
+    Profileur par échantillonnage minimal, sans dépendance : un thread relève toutes
+    les `intervalle` secondes la pile du thread mesuré et compte les fonctions vues.
+
+    Même interface que pyinstrument.Profiler (start / stop / output_text), donc
+    interchangeable avec lui dans Instrumentation(profiler=...).
+    """
+
+    def __init__(self, intervalle=0.005, profondeur=8):
+        self.intervalle = intervalle
+        self.profondeur = profondeur
+        self.echantillons = 0
+        self.en_tete = Counter()   # fonction en cours d'exécution
+        self.cumule = Counter()    # fonction présente dans la pile
+        self._arret = threading.Event()
+        self._thread = None
+        self._cible = None
+
+    def start(self):
+        self._cible = threading.get_ident()
+        self._arret.clear()
+        self._thread = threading.Thread(target=self._boucle, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._arret.set()
+        self._thread.join()
+
+    def _boucle(self):
+        while not self._arret.wait(self.intervalle):
+            frame = sys._current_frames().get(self._cible)
+            vues = []
+            while frame is not None and len(vues) < self.profondeur:
+                code = frame.f_code
+                vues.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if vues:
+                self.echantillons += 1
+                self.en_tete[vues[0]] += 1
+                self.cumule.update(set(vues))
+
+    def output_text(self, limite=15):
+        """Fonctions les plus échantillonnées (en propre et cumulé), en pourcentage des relevés."""
+        total = max(self.echantillons, 1)
+        lignes = [f"{self.echantillons} échantillons toutes les {self.intervalle * 1000:.0f} ms"]
+        for fonction, n in self.en_tete.most_common(limite):
+            lignes.append(f"{n / total * 100:6.1f}% propre  {self.cumule[fonction] / total * 100:6.1f}% cumulé  {fonction}")
+        return "\n".join(lignes)
+
+def _make_profiler(profiler):
+    """Crée le profileur demandé : 'echantillonnage', 'pyinstrument', une fabrique ou un objet start/stop."""
+    if profiler == "echantillonnage":
+        return StackSampler()
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError as e:
+            raise ImportError("❌ pyinstrument n'est pas installé (pip install pyinstrument)") from e
+        return Profiler()
+    if callable(profiler) and not hasattr(profiler, "start"):
+        return profiler()
+    return profiler
+
+# =============================================================================
+# INSTRUMENTATION
+# =============================================================================
+
+class Instrumentation:
+    """
+    Relevé des étapes d'une exécution, transmis à run_electre_tri(instrumentation=...).
+
+    Pour chaque étape : temps réel, temps CPU, pic RSS atteint pendant l'étape (et
+    sa hausse au-dessus de la mémoire du début d'étape), pic tracemalloc si trace_memoire=True, lignes par seconde si
+    le nombre de lignes traitées est connu.
+
+    Args:
+        trace_memoire: active tracemalloc (pic exact par étape, mais ralentit le calcul)
+        profiler: profileur lancé pendant les étapes de profiler_etapes :
+            'echantillonnage' (StackSampler), 'pyinstrument', une fabrique ou un objet
+            avec start() / stop()
+        profiler_etapes: étapes profilées (la classification par défaut)
+        rapport: fichier JSON où écrire le rapport à la fin de run_electre_tri
+    """
+
+    def __init__(self, trace_memoire=False, profiler=None, profiler_etapes=("classify_products",), rapport=None):
+        self.trace_memoire = trace_memoire
+        self.profiler = profiler
+        self.profiler_etapes = set(profiler_etapes)
+        self.chemin_rapport = rapport
+        self.etapes = []
+        self.contexte = {}
+        self.debut = None
+        # Pic du processus sur toute l'exécution (le pic système est remis à zéro à chaque étape)
+        self.rss_pic_processus = None
+
+    @contextmanager
+    def etape(self, nom, lignes=None):
+        """Mesure le bloc encadré ; lignes = nombre d'éléments traités (pour le débit)."""
+        if self.debut is None:
+            self.debut = time.time()
+        profileur = _make_profiler(self.profiler) if self.profiler and nom in self.profiler_etapes else None
+        demarre_tracemalloc = self.trace_memoire and not tracemalloc.is_tracing()
+        if demarre_tracemalloc:
+            tracemalloc.start()
+        if self.trace_memoire:
+            tracemalloc.reset_peak()
+
+        rss_debut = start_stage_rss()
+        self._note_process_peak(rss_debut[2])
+        debut, debut_cpu = time.perf_counter(), time.process_time()
+        if profileur is not None:
+            profileur.start()
+        mesure = {"etape": nom}
+        try:
+            yield mesure
+            mesure["statut"] = "ok"
+        except BaseException as e:
+            mesure["statut"] = f"erreur: {type(e).__name__}: {e}"
+            raise
+        finally:
+            if profileur is not None:
+                profileur.stop()
+            mesure["temps_s"] = time.perf_counter() - debut
+            mesure["cpu_s"] = time.process_time() - debut_cpu
+            mesure["rss_pic_mo"], mesure["rss_hausse_mo"] = stop_stage_rss(rss_debut)
+            self._note_process_peak(mesure["rss_pic_mo"])
+            if self.trace_memoire:
+                mesure["tracemalloc_pic_mo"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+                if demarre_tracemalloc:
+                    tracemalloc.stop()
+            # Le bloc peut préciser le nombre de lignes une fois connu (mesure['lignes'] = ...)
+            lignes = mesure.get("lignes", lignes)
+            if lignes is not None:
+                mesure["lignes"] = int(lignes)
+                mesure["lignes_par_s"] = lignes / mesure["temps_s"] if mesure["temps_s"] > 0 else None
+            if profileur is not None and hasattr(profileur, "output_text"):
+                mesure["profil"] = profileur.output_text()
+            self.etapes.append(mesure)
+
+    def _note_process_peak(self, pic):
+        if pic is not None:
+            self.rss_pic_processus = max(pic, self.rss_pic_processus or 0.0)
+
+    def process_peak_rss_mb(self):
+        """Pic RSS du processus depuis son démarrage, remises à zéro par étape comprises."""
+        self._note_process_peak(peak_rss_mb())
+        return self.rss_pic_processus
+
+    def report(self):
+        """Rapport structuré (sérialisable en JSON) de l'exécution."""
+        return {
+            "debut": None if self.debut is None else time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.debut)),
+            "machine": {
+                "plateforme": platform.platform(),
+                "coeurs": os.cpu_count(),
+                "python": platform.python_version(),
+            },
+            "contexte": self.contexte,
+            "etapes": self.etapes,
+            "total_s": sum(m["temps_s"] for m in self.etapes),
+            "rss_pic_mo": self.process_peak_rss_mb(),
+        }
+
+    def save_report(self, chemin=None):
+        """Écrit le rapport JSON (dans chemin, ou le fichier donné au constructeur)."""
+        chemin = chemin or self.chemin_rapport
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False, default=str)
+        return chemin
+
+    def finish(self):
+        """Fin d'exécution : affiche le résumé et écrit le rapport si un fichier a été donné."""
+        self.print_summary()
+        if self.chemin_rapport:
+            self.save_report()
+            print(f"📝 Rapport d'exécution écrit dans {self.chemin_rapport}")
+
+    def print_summary(self):
+        """Affiche le temps de chaque étape."""
+        print("\n⏱️  Temps par étape:")
+        for m in self.etapes:
+            debit = f", {m['lignes_par_s']:.0f} lignes/s" if m.get("lignes_par_s") else ""
+            memoire = (f", pic RSS {m['rss_pic_mo']:.0f} Mo (+{m['rss_hausse_mo']:.0f} Mo)"
+                       if m["rss_pic_mo"] is not None else "")
+            print(f"    {m['etape']:<26} {m['temps_s']:>8.3f} s (CPU {m['cpu_s']:.3f} s){memoire}{debit}")
+
+class NoInstrumentation:
+    """Instrumentation désactivée : chaque étape est un contexte vide, aucune mesure."""
+
+    def etape(self, nom, lignes=None):
+        return nullcontext({})
+
+    def finish(self):
+        pass
+
+# Instance partagée utilisée par défaut par run_electre_tri
+NO_INSTRUMENTATION = NoInstrumentation()
@@ -0,0 +1,123 @@
+# electre_parallele.py - Classification ELECTRE TRI sur plusieurs cœurs (mémoire partagée)
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import electri_fixed
+from electri_fixed import CRITERIA, compute_concordance_matrices, compute_credibility_matrices, classify_lambdas
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+# En dessous de ce nombre de produits, le démarrage des processus coûte plus qu'il ne rapporte
+MIN_PRODUITS_PARALLELE = 20_000
+# Nombre de tranches par processus (équilibrage de charge)
+TRANCHES_PAR_PROCESSUS = 4
+
+# =============================================================================
+# MÉMOIRE PARTAGÉE
+# =============================================================================
+
+def _to_shared(array):
+    """Copie un tableau NumPy dans un segment de mémoire partagée."""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm
+
+def _attach(description):
+    """Rattache un processus à un segment décrit par (nom, forme, dtype)."""
+    nom, forme, dtype = description
+    # Les processus fils partagent le resource_tracker du processus principal,
+    # qui reste seul responsable de la suppression du segment (unlink)
+    shm = shared_memory.SharedMemory(name=nom)
+    return shm, np.ndarray(forme, dtype=dtype, buffer=shm.buf)
+
+# =============================================================================
+# PROCESSUS DE TRAVAIL
+# =============================================================================
+# État propre à chaque processus, initialisé une seule fois par _init_worker
+_WORKER = {}
+
+def _init_worker(criteria, desc_X, desc_P, desc_sortie, lambda_values, credibility=False):
+    """Rattache le processus aux matrices partagées et aligne la configuration."""
+    # Les poids/directions du processus principal font foi (même en mode spawn)
+    electri_fixed.CRITERIA = criteria
+    shm_X, X = _attach(desc_X)
+    shm_P, P = _attach(desc_P)
+    shm_sortie, sortie = _attach(desc_sortie)
+    _WORKER.update(shm=[shm_X, shm_P, shm_sortie], X=X, P=P, sortie=sortie, lambda_values=lambda_values,
+                   calcul=compute_credibility_matrices if credibility else compute_concordance_matrices)
+
+def _classify_range(debut, fin):
+    """Classe les produits [debut, fin[ et écrit leurs codes dans la sortie partagée."""
+    C_ab, C_ba = _WORKER['calcul'](_WORKER['X'][debut:fin], _WORKER['P'])
+    codes = classify_lambdas(C_ab, C_ba, _WORKER['lambda_values'])
+    for i, (codes_pessimiste, codes_optimiste) in enumerate(codes.values()):
+        _WORKER['sortie'][i, 0, debut:fin] = codes_pessimiste
+        _WORKER['sortie'][i, 1, debut:fin] = codes_optimiste
+    return fin - debut
+
+# =============================================================================
+# API
+# =============================================================================
+
+def classify_parallel(X, P, lambda_values, n_workers=None, credibility=False):
+    """
+    Équivalent multi-cœurs de classify_lambdas(*compute_concordance_matrices(X, P), lambda_values)
+    (compute_credibility_matrices avec credibility=True).
+    
+    X, P et le tableau des codes de sortie sont placés en mémoire partagée :
+    chaque processus ne reçoit que des bornes de tranche, jamais de données.
+    
+    Args:
+        X: matrice produits × critères
+        P: matrice profils × critères
+        lambda_values: seuils λ
+        n_workers: nombre de processus (os.cpu_count() par défaut)
+        credibility: utiliser l'indice de crédibilité σ au lieu de la concordance
+    
+    Returns:
+        dict: λ → (codes pessimistes, codes optimistes), identique au calcul séquentiel
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    n = X.shape[0]
+    
+    if n_workers == 1 or n < MIN_PRODUITS_PARALLELE:
+        calcul = compute_credibility_matrices if credibility else compute_concordance_matrices
+        return classify_lambdas(*calcul(X, P), lambda_values)
+    
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    P = np.ascontiguousarray(P, dtype=np.float64)
+    forme_sortie = (len(lambda_values), 2, n)
+    
+    shm_X = _to_shared(X)
+    shm_P = _to_shared(P)
+    shm_sortie = shared_memory.SharedMemory(create=True, size=int(np.prod(forme_sortie)))
+    try:
+        sortie = np.ndarray(forme_sortie, dtype=np.uint8, buffer=shm_sortie.buf)
+        
+        nb_tranches = n_workers * TRANCHES_PAR_PROCESSUS
+        bornes = np.linspace(0, n, nb_tranches + 1, dtype=np.int64)
+        init_args = (
+            dict(CRITERIA),
+            (shm_X.name, X.shape, X.dtype.str),
+            (shm_P.name, P.shape, P.dtype.str),
+            (shm_sortie.name, forme_sortie, np.uint8),
+            list(lambda_values),
+            credibility,
+        )
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=init_args) as pool:
+            # list() propage la première exception levée dans un processus
+            list(pool.map(_classify_range, bornes[:-1].tolist(), bornes[1:].tolist()))
+        
+        resultats = {
+            lambda_val: (sortie[i, 0].copy(), sortie[i, 1].copy())
+            for i, lambda_val in enumerate(lambda_values)
+        }
+        del sortie
+        return resultats
+    finally:
+        for shm in (shm_X, shm_P, shm_sortie):
+            shm.close()
+            shm.unlink()
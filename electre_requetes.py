@@ -0,0 +1,362 @@
+# electre_requetes.py - Base SQLite indexée des résultats ELECTRE TRI et requêtes (API + ligne de commande)
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from electri_fixed import CRITERIA, CLASSES, LAMBDA_VALUES, NUTRISCORE_LETTRES, PROCEDURES, ElectreResults
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+STORE_RESULTATS = "electre_tri_resultats.sqlite"
+# Lignes insérées par appel à executemany
+TAILLE_LOT_INSERTION = 100_000
+OPERATEURS = ("<=", ">=", "<", ">", "=")
+# Au-dessous de cette part des produits retenue par un filtre produits (Nutri-Score,
+# critère), la requête part de produits et lit chaque résultat par la clé (λ, id)
+SELECTIVITE_PRODUITS = 0.01
+LIMITE_AFFICHAGE = 20
+
+# =============================================================================
+# SCHÉMA
+# =============================================================================
+# produits  : une ligne par produit (id = position dans classify_products), Nutri-Score
+#             en code (0 = A .. 4 = E, -1 = absent), un index par critère (plages de valeurs)
+# resultats : une ligne par (λ, produit), classes en codes (0 = A' .. 4 = E'), écart
+#             |pessimiste - optimiste| ; clé (λ, id) et index (λ, classe) par procédure,
+#             (λ, écart) pour les désaccords
+# meta      : profils, critères et λ de l'exécution (JSON)
+
+def _quote(nom):
+    return '"' + nom.replace('"', '""') + '"'
+
+def _create_schema(connexion):
+    colonnes = ", ".join(f"{_quote(critere)} REAL" for critere in CRITERIA)
+    connexion.executescript(f"""
+        DROP TABLE IF EXISTS resultats;
+        DROP TABLE IF EXISTS produits;
+        DROP TABLE IF EXISTS meta;
+        CREATE TABLE produits (id INTEGER PRIMARY KEY, product_name TEXT, nutriscore INTEGER, {colonnes});
+        CREATE TABLE resultats (
+            lambda REAL, id INTEGER, pessimiste INTEGER, optimiste INTEGER, ecart INTEGER,
+            PRIMARY KEY (lambda, id)
+        ) WITHOUT ROWID;
+        CREATE TABLE meta (cle TEXT PRIMARY KEY, valeur TEXT);
+    """)
+
+def _create_indexes(connexion):
+    """Index créés après le chargement (bien plus rapide que de les tenir à jour ligne à ligne)."""
+    instructions = [
+        # Index couvrants : les deux classes sont lues sans revenir à la table
+        "CREATE INDEX idx_resultats_pessimiste ON resultats (lambda, pessimiste, optimiste)",
+        "CREATE INDEX idx_resultats_optimiste ON resultats (lambda, optimiste, pessimiste)",
+        "CREATE INDEX idx_resultats_ecart ON resultats (lambda, ecart, pessimiste, optimiste)",
+        "CREATE INDEX idx_produits_nutriscore ON produits (nutriscore)",
+    ]
+    instructions += [f"CREATE INDEX idx_produits_critere_{j} ON produits ({_quote(critere)})"
+                     for j, critere in enumerate(CRITERIA)]
+    for instruction in instructions:
+        connexion.execute(instruction)
+    # Statistiques (échantillonnées) pour que SQLite choisisse l'index le plus sélectif
+    connexion.execute("PRAGMA analysis_limit = 1000")
+    connexion.execute("ANALYZE")
+
+# =============================================================================
+# ÉCRITURE
+# =============================================================================
+
+def _store_columns(df_results, lambda_values):
+    """(noms, codes Nutri-Score, {critère: valeurs}, codes λ × procédure × produit) d'un résultat."""
+    if isinstance(df_results, ElectreResults):
+        indices = [df_results.lambda_values.index(lambda_val) for lambda_val in lambda_values]
+        criteres = {c: df_results.df_criteria[c].to_numpy(dtype=np.float64) for c in CRITERIA}
+        return (np.asarray(df_results.product_names, dtype=object), df_results.nutriscore,
+                criteres, df_results.codes[indices])
+    # DataFrame long : classify_products empile les produits dans le même ordre pour chaque λ
+    blocs = [df_results[df_results['lambda'] == lambda_val] for lambda_val in lambda_values]
+    premier = blocs[0]
+    codes = np.stack([np.stack([pd.Categorical(bloc[f'classe_{procedure}'], categories=CLASSES).codes
+                                for procedure in PROCEDURES]) for bloc in blocs]).astype(np.uint8)
+    nutriscore = pd.Categorical(premier['nutriscore_original'], categories=NUTRISCORE_LETTRES).codes
+    criteres = {c: premier[c].to_numpy(dtype=np.float64) for c in CRITERIA}
+    return premier['product_name'].to_numpy(dtype=object), nutriscore, criteres, codes
+
+def _batches(lignes, taille=TAILLE_LOT_INSERTION):
+    lot = []
+    for ligne in lignes:
+        lot.append(ligne)
+        if len(lot) == taille:
+            yield lot
+            lot = []
+    if lot:
+        yield lot
+
+def write_store(df_results, store_path=STORE_RESULTATS, profiles=None, lambda_values=None):
+    """
+    Écrit les résultats de classify_products dans une base SQLite indexée (remplace son contenu).
+
+    Args:
+        df_results: ElectreResults, ou DataFrame au format long
+        profiles: profils utilisés (gardés dans la table meta)
+
+    Returns:
+        Path: base écrite
+    """
+    if lambda_values is None:
+        lambda_values = df_results.lambda_values if isinstance(df_results, ElectreResults) else LAMBDA_VALUES
+    noms, nutriscore, criteres, codes = _store_columns(df_results, lambda_values)
+    n = len(noms)
+    debut = time.perf_counter()
+
+    connexion = sqlite3.connect(store_path)
+    try:
+        # Chargement en bloc : pas de journal synchrone, une seule transaction
+        connexion.execute("PRAGMA synchronous = OFF")
+        connexion.execute("PRAGMA journal_mode = MEMORY")
+        with connexion:
+            _create_schema(connexion)
+            colonnes = ", ".join(_quote(critere) for critere in CRITERIA)
+            marqueurs = ", ".join("?" * (3 + len(CRITERIA)))
+            valeurs = [np.where(np.isnan(v), None, v.astype(object)).tolist() for v in criteres.values()]
+            produits = zip(range(n), (None if pd.isna(nom) else str(nom) for nom in noms),
+                           np.asarray(nutriscore).tolist(), *valeurs)
+            for lot in _batches(produits):
+                connexion.executemany(f"INSERT INTO produits (id, product_name, nutriscore, {colonnes}) "
+                                      f"VALUES ({marqueurs})", lot)
+            for i, lambda_val in enumerate(lambda_values):
+                pessimiste, optimiste = codes[i].astype(np.int64)
+                resultats = zip([float(lambda_val)] * n, range(n), pessimiste.tolist(), optimiste.tolist(),
+                                np.abs(pessimiste - optimiste).tolist())
+                for lot in _batches(resultats):
+                    connexion.executemany("INSERT INTO resultats VALUES (?, ?, ?, ?, ?)", lot)
+            meta = {"lambda_values": [float(v) for v in lambda_values], "classes": CLASSES,
+                    "profils": profiles, "criteres": CRITERIA, "produits": n}
+            connexion.executemany("INSERT INTO meta VALUES (?, ?)",
+                                  [(cle, json.dumps(valeur, ensure_ascii=False)) for cle, valeur in meta.items()])
+            _create_indexes(connexion)
+    finally:
+        connexion.close()
+    print(f"🗄️  Base indexée {store_path}: {n} produits × {len(lambda_values)} λ "
+          f"en {time.perf_counter() - debut:.1f} s")
+    return Path(store_path)
+
+# =============================================================================
+# REQUÊTES
+# =============================================================================
+
+def open_store(store_path=STORE_RESULTATS):
+    """Connexion en lecture seule à une base écrite par write_store."""
+    if not Path(store_path).exists():
+        raise FileNotFoundError(f"❌ Base introuvable : {store_path}")
+    return sqlite3.connect(f"file:{Path(store_path).as_posix()}?mode=ro", uri=True)
+
+def store_metadata(connexion):
+    """Contenu de la table meta (λ, classes, profils, critères, nombre de produits)."""
+    return {cle: json.loads(valeur) for cle, valeur in connexion.execute("SELECT cle, valeur FROM meta")}
+
+def parse_condition(texte):
+    """'sugars_100g>15' → ('sugars_100g', '>', 15.0)."""
+    correspondance = re.fullmatch(r"\s*([^<>=\s]+)\s*(<=|>=|<|>|=)\s*(-?[0-9.eE+-]+)\s*", texte)
+    if correspondance is None:
+        raise ValueError(f"❌ Condition invalide : {texte!r} (ex. 'sugars_100g>15')")
+    critere, operateur, valeur = correspondance.groups()
+    return critere, operateur, float(valeur)
+
+def _class_code(classe):
+    """"A'" ou "A" → 0."""
+    libelle = classe if classe in CLASSES else f"{str(classe).upper()}'"
+    if libelle not in CLASSES:
+        raise ValueError(f"❌ Classe inconnue : {classe} (attendu : {', '.join(CLASSES)})")
+    return CLASSES.index(libelle)
+
+def _as_list(valeur):
+    return None if valeur is None else list(valeur) if isinstance(valeur, (list, tuple, set)) else [valeur]
+
+def _nutriscore_code(lettre):
+    """"a" ou "A" → 0."""
+    libelle = str(lettre).upper()
+    if libelle not in NUTRISCORE_LETTRES:
+        raise ValueError(f"❌ Nutri-Score inconnu : {lettre} (attendu : {', '.join(NUTRISCORE_LETTRES)})")
+    return NUTRISCORE_LETTRES.index(libelle)
+
+def _where(lambda_val, classes, procedure, nutriscores, conditions, desaccord_min):
+    """
+    Filtres validés (noms de critères et opérateurs dans le SQL, valeurs liées), séparés par table.
+
+    Returns:
+        (clauses, paramètres) sur resultats, et [(clause, paramètres, index)] sur produits
+    """
+    clauses, parametres = [], []
+    if lambda_val is not None:
+        clauses.append("r.lambda = ?")
+        parametres.append(float(lambda_val))
+    if classes is not None:
+        if procedure not in PROCEDURES:
+            raise ValueError(f"❌ Procédure inconnue : {procedure} (attendu : {', '.join(PROCEDURES)})")
+        codes = [_class_code(c) for c in classes]
+        clauses.append(f"r.{procedure} IN ({', '.join('?' * len(codes))})")
+        parametres += codes
+    if desaccord_min is not None:
+        clauses.append("r.ecart >= ?")
+        parametres.append(int(desaccord_min))
+    filtres_produits = []
+    if nutriscores is not None:
+        codes = [_nutriscore_code(n) for n in nutriscores]
+        filtres_produits.append((f"p.nutriscore IN ({', '.join('?' * len(codes))})", codes, "idx_produits_nutriscore"))
+    criteres = list(CRITERIA)
+    for critere, operateur, valeur in conditions or []:
+        if critere not in CRITERIA:
+            raise ValueError(f"❌ Critère inconnu : {critere}")
+        if operateur not in OPERATEURS:
+            raise ValueError(f"❌ Opérateur inconnu : {operateur} (attendu : {' '.join(OPERATEURS)})")
+        filtres_produits.append((f"p.{_quote(critere)} {operateur} ?", [float(valeur)],
+                                 f"idx_produits_critere_{criteres.index(critere)}"))
+    return (clauses, parametres), filtres_produits
+
+def _selective_index(connexion, filtres_produits, limit):
+    """
+    Index du filtre produits le plus sélectif s'il retient moins de SELECTIVITE_PRODUITS
+    des produits, None sinon. Chaque filtre est compté sur son propre index et le comptage
+    s'arrête au seuil : quelques millisecondes, quelle que soit la taille de la base.
+
+    Avec une limite, le seuil baisse jusqu'à sqrt(limit / n) : partir de resultats
+    s'arrête alors après environ limit / part lignes, sans trier les lignes retenues.
+    """
+    if not filtres_produits:
+        return None
+    n = (connexion.execute("SELECT MAX(id) FROM produits").fetchone()[0] or 0) + 1
+    seuil = SELECTIVITE_PRODUITS if limit is None else min(SELECTIVITE_PRODUITS, (max(limit, 1) / n) ** 0.5)
+    plafond = int(seuil * n) + 1
+    meilleur, retenus_min = None, plafond
+    for clause, parametres, index in filtres_produits:
+        retenus = connexion.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM produits p INDEXED BY {index} WHERE {clause} LIMIT ?)",
+            parametres + [plafond]).fetchone()[0]
+        if retenus < retenus_min:
+            meilleur, retenus_min = index, retenus
+    return meilleur
+
+def _from_where(connexion, filtres, limit=None):
+    """
+    FROM ... WHERE ... de query_store et ses paramètres.
+
+    Sans statistiques sur les plages de valeurs, SQLite part de resultats par l'index
+    (λ, classe) même quand seuls des filtres produits sont donnés : toutes les lignes du λ
+    sont alors jointes. Quand un filtre produits est sélectif, la requête part de produits
+    par l'index de ce filtre (CROSS JOIN fixe l'ordre des tables) et lit les résultats
+    par la clé (λ, id).
+    """
+    (clauses, parametres), filtres_produits = _where(
+        filtres.get("lambda_val"), _as_list(filtres.get("classes")), filtres.get("procedure", "pessimiste"),
+        _as_list(filtres.get("nutriscores")), filtres.get("conditions"), filtres.get("desaccord_min"))
+    clauses_produits = [clause for clause, _, _ in filtres_produits]
+    parametres_produits = [valeur for _, valeurs, _ in filtres_produits for valeur in valeurs]
+    index = _selective_index(connexion, filtres_produits, limit)
+    if index is not None:
+        jointure = f"FROM produits p INDEXED BY {index} CROSS JOIN resultats r ON r.id = p.id"
+        clauses, parametres = clauses_produits + clauses, parametres_produits + parametres
+    else:
+        jointure = "FROM resultats r JOIN produits p ON p.id = r.id"
+        clauses, parametres = clauses + clauses_produits, parametres + parametres_produits
+    return jointure + ((" WHERE " + " AND ".join(clauses)) if clauses else ""), parametres
+
+def query_store(connexion, lambda_val=None, classes=None, procedure="pessimiste", nutriscores=None,
+                conditions=None, desaccord_min=None, limit=None, count=False):
+    """
+    Produits correspondant à tous les filtres donnés, résolus par les index de la base.
+
+    Args:
+        connexion: base ouverte par open_store
+        lambda_val: seuil λ (None = tous)
+        classes: classe(s) ELECTRE ("A'" ou "A") pour la procédure donnée
+        nutriscores: lettre(s) Nutri-Score
+        conditions: [(critère, opérateur, valeur)], ex. [("sugars_100g", ">", 15)] (voir parse_condition)
+        desaccord_min: écart minimal |pessimiste - optimiste| en nombre de classes
+        limit: nombre maximal de lignes
+        count: ne renvoyer que le nombre de lignes
+
+    Returns:
+        DataFrame (une ligne par produit et par λ, classes en libellés), ou int si count
+    """
+    filtres = dict(lambda_val=lambda_val, classes=classes, procedure=procedure, nutriscores=nutriscores,
+                   conditions=conditions, desaccord_min=desaccord_min)
+    source, parametres = _from_where(connexion, filtres, None if count else limit)
+    if count:
+        return connexion.execute(f"SELECT COUNT(*) {source}", parametres).fetchone()[0]
+    colonnes = ", ".join(f"p.{_quote(critere)}" for critere in CRITERIA)
+    requete = (f"SELECT r.id, p.product_name, p.nutriscore, r.lambda, r.pessimiste, r.optimiste, {colonnes} "
+               f"{source} ORDER BY r.lambda, r.id")
+    if limit is not None:
+        requete += f" LIMIT {int(limit)}"
+    df = pd.DataFrame(connexion.execute(requete, parametres).fetchall(),
+                      columns=["id", "product_name", "nutriscore_original", "lambda",
+                               "classe_pessimiste", "classe_optimiste", *CRITERIA])
+    # Codes → libellés (-1 = Nutri-Score absent : dernier élément 'N/A')
+    df["nutriscore_original"] = np.array(NUTRISCORE_LETTRES + ["N/A"], dtype=object)[
+        df["nutriscore_original"].to_numpy(dtype=np.int64)]
+    for procedure in PROCEDURES:
+        df[f"classe_{procedure}"] = np.array(CLASSES, dtype=object)[df[f"classe_{procedure}"].to_numpy(dtype=np.int64)]
+    return df
+
+def query_plan(connexion, limit=None, **filtres):
+    """Plan d'exécution SQLite de query_store (pour vérifier les index utilisés)."""
+    source, parametres = _from_where(connexion, filtres, limit)
+    lignes = connexion.execute(f"EXPLAIN QUERY PLAN SELECT r.id {source}", parametres).fetchall()
+    return [ligne[-1] for ligne in lignes]
+
+# =============================================================================
+# LIGNE DE COMMANDE
+# =============================================================================
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Requêtes sur une base de résultats ELECTRE TRI (SQLite indexée)")
+    parser.add_argument("base", help="base écrite par write_store (ex. python electre_cli.py produits.csv -f sqlite)")
+    parser.add_argument("-l", "--lambda", dest="lambda_val", type=float, help="seuil λ")
+    parser.add_argument("-c", "--classe", action="append", help="classe ELECTRE (A' à E', répétable)")
+    parser.add_argument("-p", "--procedure", choices=PROCEDURES, default="pessimiste")
+    parser.add_argument("-n", "--nutriscore", action="append", help="Nutri-Score (A à E, répétable)")
+    parser.add_argument("-w", "--critere", action="append", type=parse_condition, metavar="CONDITION",
+                        help="condition sur un critère, ex. 'sugars_100g>15' (répétable)")
+    parser.add_argument("-d", "--desaccord", type=int, metavar="K",
+                        help="écart pessimiste / optimiste d'au moins K classes")
+    parser.add_argument("--limite", type=int, default=LIMITE_AFFICHAGE, help="lignes affichées")
+    parser.add_argument("--compter", action="store_true", help="afficher seulement le nombre de lignes")
+    parser.add_argument("-o", "--sortie", help="écrire toutes les lignes trouvées en CSV")
+    parser.add_argument("--plan", action="store_true", help="afficher le plan d'exécution SQLite")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    filtres = dict(lambda_val=args.lambda_val, classes=args.classe, procedure=args.procedure,
+                   nutriscores=args.nutriscore, conditions=args.critere, desaccord_min=args.desaccord)
+    connexion = open_store(args.base)
+    try:
+        if args.plan:
+            for etape in query_plan(connexion, **filtres):
+                print(f"🧭 {etape}")
+        debut = time.perf_counter()
+        nombre = query_store(connexion, count=True, **filtres)
+        print(f"🔎 {nombre} lignes ({(time.perf_counter() - debut) * 1000:.1f} ms)")
+        if args.compter or nombre == 0:
+            return 0
+        debut = time.perf_counter()
+        df = query_store(connexion, limit=None if args.sortie else args.limite, **filtres)
+        duree = (time.perf_counter() - debut) * 1000
+        if args.sortie:
+            df.to_csv(args.sortie, index=False)
+            print(f"💾 {len(df)} lignes écrites dans {args.sortie} ({duree:.1f} ms)")
+        else:
+            print(df.to_string(index=False))
+    finally:
+        connexion.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
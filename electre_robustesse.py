@@ -0,0 +1,196 @@
+# electre_robustesse.py - Robustesse des classes aux poids des critères (Monte Carlo)
+import numpy as np
+import pandas as pd
+
+from electri_fixed import (
+    CRITERIA, CLASSES, LAMBDA_VALUES, DEFAULT_PROFILES, PROCEDURES, INPUT_XLSX,
+    read_input, extract_criteria_values, build_criteria_matrix, build_profiles_matrix,
+    get_product_names, clean_nutriscore_series, classify_lambdas, compute_concordance_matrices,
+)
+from electre_calibration import batch_pass_masks, lookup_verdicts
+from electre_compile import weight_tables, pessimistic_codes, optimistic_codes
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+N_TIRAGES = 10_000            # Nombre de vecteurs de poids tirés
+CONCENTRATION = 100.0         # Dirichlet : plus grand = tirages plus proches des poids actuels
+AMPLITUDE_UNIFORME = 0.3      # Perturbation uniforme : ±30 % sur chaque poids avant normalisation
+TAILLE_BLOC_PRODUITS = 200_000
+TAILLE_BLOC_TIRAGES = 1_000
+# Taille maximale d'un tableau intermédiaire tirages × signatures × profils
+MAX_ELEMENTS_LOT = 20_000_000
+
+# =============================================================================
+# TIRAGE DES POIDS
+# =============================================================================
+
+def sample_weights(n_tirages, distribution="dirichlet", rng=None, concentration=CONCENTRATION,
+                   amplitude=AMPLITUDE_UNIFORME):
+    """
+    Tire n_tirages vecteurs de poids (somme 1) autour des poids de CRITERIA.
+    
+    Args:
+        distribution: "dirichlet" (Dirichlet(concentration × poids)), "uniforme"
+            (chaque poids multiplié par U(1-amplitude, 1+amplitude) puis normalisé)
+            ou une fonction (rng, n_tirages) → tableau n_tirages × critères
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    poids = np.array([config["weight"] for config in CRITERIA.values()])
+    
+    if callable(distribution):
+        W = np.asarray(distribution(rng, n_tirages), dtype=np.float64)
+    elif distribution == "dirichlet":
+        W = rng.dirichlet(concentration * poids, n_tirages)
+    elif distribution == "uniforme":
+        W = poids * rng.uniform(1 - amplitude, 1 + amplitude, (n_tirages, len(poids)))
+    else:
+        raise ValueError(f"❌ Distribution inconnue : {distribution}")
+    return W / W.sum(axis=1, keepdims=True)
+
+# =============================================================================
+# ANALYSE
+# =============================================================================
+
+def distinct_verdict_tables(W, seuil_majorite, taille_bloc=TAILLE_BLOC_TIRAGES):
+    """
+    Tables de verdicts (masque → concordance >= λ) distinctes parmi les tirages.
+    
+    Deux vecteurs de poids donnant la même table classent tous les produits
+    de la même façon : chaque table distincte n'est évaluée qu'une fois.
+    
+    Returns:
+        (verdicts, effectifs): tables distinctes (T × 2^m) et nombre de tirages de chacune
+    """
+    paquets = np.concatenate([
+        np.packbits(weight_tables(W[debut:debut + taille_bloc]) >= seuil_majorite, axis=1)
+        for debut in range(0, W.shape[0], taille_bloc)
+    ])
+    distincts, effectifs = np.unique(paquets, axis=0, return_counts=True)
+    verdicts = np.unpackbits(distincts, axis=1, count=2 ** W.shape[1]).astype(bool)
+    return verdicts, effectifs
+
+def _weighted_class_counts(codes, effectifs, n_classes):
+    """Nombre de tirages par classe (tables × signatures, pondéré par l'effectif des tables)."""
+    return np.stack([effectifs @ (codes == classe) for classe in range(n_classes)], axis=-1)
+
+def weight_robustness(X, P, W, lambda_values=None, taille_bloc_produits=TAILLE_BLOC_PRODUITS):
+    """
+    Probabilité de chaque classe pour chaque produit quand les poids varient.
+    
+    Deux regroupements évitent de classer tirages × produits un par un :
+    - les profils étant fixes, la classe d'un produit ne dépend que de ses
+      masques de critères favorables (4 profils × 2 sens) : les produits sont
+      regroupés par signature de masques ;
+    - la classe ne dépend d'un tirage que par sa table de verdicts : les
+      tirages sont regroupés par table identique (distinct_verdict_tables).
+    Produits, signatures et tables sont traités par blocs, sans jamais
+    construire le tenseur tirages × produits complet.
+    
+    Args:
+        X: produits × critères
+        P: profils × critères
+        W: tirages × critères
+    
+    Returns:
+        dict: λ → procédure → matrice produits × classes de probabilités (float32)
+    """
+    if lambda_values is None:
+        lambda_values = LAMBDA_VALUES
+    n_produits, n_classes = X.shape[0], len(CLASSES)
+    probabilites = {
+        lambda_val: {procedure: np.zeros((n_produits, n_classes), dtype=np.float32) for procedure in PROCEDURES}
+        for lambda_val in lambda_values
+    }
+    tables_par_lambda = {lambda_val: distinct_verdict_tables(W, lambda_val) for lambda_val in lambda_values}
+    
+    for debut in range(0, n_produits, taille_bloc_produits):
+        fin = min(debut + taille_bloc_produits, n_produits)
+        M_ab, M_ba = batch_pass_masks(X[debut:fin], P[np.newaxis])
+        
+        # Regrouper les produits par signature (4 masques a S b + 4 masques b S a = 8 octets)
+        signatures = np.concatenate([M_ab[0], M_ba[0]], axis=1).view(np.uint64).ravel()
+        uniques, premiers, inverse = np.unique(signatures, return_index=True, return_inverse=True)
+        M_ab_u = M_ab[:, premiers]
+        M_ba_u = M_ba[:, premiers]
+        
+        for lambda_val, (verdicts, effectifs) in tables_par_lambda.items():
+            comptes = {procedure: np.zeros((len(uniques), n_classes), dtype=np.int64) for procedure in PROCEDURES}
+            # Blocs de signatures et de tables dimensionnés pour respecter MAX_ELEMENTS_LOT
+            bloc_signatures = max(1, min(len(uniques), MAX_ELEMENTS_LOT // 4))
+            bloc_tables = max(1, MAX_ELEMENTS_LOT // (4 * bloc_signatures))
+            for debut_table in range(0, len(effectifs), bloc_tables):
+                tables = slice(debut_table, debut_table + bloc_tables)
+                for debut_sig in range(0, len(uniques), bloc_signatures):
+                    sig = slice(debut_sig, debut_sig + bloc_signatures)
+                    a_S_b = lookup_verdicts(verdicts[tables], M_ab_u[:, sig])
+                    b_S_a = lookup_verdicts(verdicts[tables], M_ba_u[:, sig])
+                    comptes["pessimiste"][sig] += _weighted_class_counts(
+                        pessimistic_codes(a_S_b), effectifs[tables], n_classes)
+                    comptes["optimiste"][sig] += _weighted_class_counts(
+                        optimistic_codes(a_S_b, b_S_a), effectifs[tables], n_classes)
+            
+            for procedure in PROCEDURES:
+                probabilites[lambda_val][procedure][debut:fin] = comptes[procedure][inverse] / W.shape[0]
+    
+    return probabilites
+
+def robustness_summary(probabilites, codes_nominaux, noms=None):
+    """
+    Résumé par produit : classe nominale, classe la plus probable et stabilité.
+    
+    Args:
+        probabilites: résultat de weight_robustness
+        codes_nominaux: λ → (codes pessimistes, codes optimistes) avec les poids actuels
+        noms: noms des produits (optionnel)
+    
+    Returns:
+        DataFrame au format long (une ligne par produit et par λ)
+    """
+    labels = np.array(CLASSES, dtype=object)
+    blocs = []
+    for lambda_val, par_procedure in probabilites.items():
+        bloc = {'lambda': lambda_val}
+        if noms is not None:
+            bloc = {'product_name': noms, **bloc}
+        for i, procedure in enumerate(PROCEDURES):
+            probas = par_procedure[procedure]
+            nominal = codes_nominaux[lambda_val][i]
+            bloc[f'classe_{procedure}'] = labels[nominal]
+            bloc[f'classe_{procedure}_probable'] = labels[probas.argmax(axis=1)]
+            # Stabilité = probabilité de garder la classe obtenue avec les poids actuels
+            bloc[f'stabilite_{procedure}'] = probas[np.arange(len(nominal)), nominal]
+            for classe, label in enumerate(CLASSES):
+                bloc[f'p_{procedure}_{label}'] = probas[:, classe]
+        blocs.append(pd.DataFrame(bloc))
+    return pd.concat(blocs, ignore_index=True)
+
+def run_weight_robustness(input_file=INPUT_XLSX, profiles=None, lambda_values=None, n_tirages=N_TIRAGES,
+                          distribution="dirichlet", seed=0, **options):
+    """Charge le fichier d'entrée, tire les poids et retourne le résumé de robustesse."""
+    if profiles is None:
+        profiles = DEFAULT_PROFILES
+    if lambda_values is None:
+        lambda_values = LAMBDA_VALUES
+    
+    print(f"🎲 Analyse de robustesse des poids ({n_tirages} tirages, distribution {distribution})")
+    df = read_input(input_file)
+    df_criteria = extract_criteria_values(df)
+    X = build_criteria_matrix(df_criteria)
+    P = build_profiles_matrix(profiles)
+    
+    W = sample_weights(n_tirages, distribution, np.random.default_rng(seed), **options)
+    probabilites = weight_robustness(X, P, W, lambda_values)
+    codes_nominaux = classify_lambdas(*compute_concordance_matrices(X, P), lambda_values)
+    resume = robustness_summary(probabilites, codes_nominaux, get_product_names(df))
+    resume.insert(1, 'nutriscore_original', np.tile(clean_nutriscore_series(df), len(lambda_values)))
+    
+    for lambda_val in lambda_values:
+        du_lambda = resume[resume['lambda'] == lambda_val]
+        for procedure in PROCEDURES:
+            stables = (du_lambda[f'stabilite_{procedure}'] >= 0.95).mean() * 100
+            print(f"  λ = {lambda_val} {procedure}: {stables:.1f}% des produits gardent leur classe dans ≥95% des tirages")
+    return resume
+
+if __name__ == "__main__":
+    run_weight_robustness()
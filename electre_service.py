@@ -0,0 +1,282 @@
+# electre_service.py - Service HTTP asyncio de classification ELECTRE TRI (produit seul ou par lots)
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from electri_fixed import (
+    CRITERIA, CLASSES, LAMBDA_VALUES, DEFAULT_PROFILES,
+    build_profiles_matrix, compute_credibility_matrices, classify_lambdas,
+)
+from electre_compile import CompiledClassifier
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+HOTE = "127.0.0.1"
+PORT = 8080
+# Taille maximale d'un corps de requête (octets)
+TAILLE_MAX_CORPS = 64 * 1024 * 1024
+# Nombre de dernières requêtes gardées par route pour les percentiles de latence
+FENETRE_LATENCES = 10_000
+PERCENTILES = (50, 90, 99, 99.9)
+
+LIBELLES_CLASSES = np.array(CLASSES, dtype=object)
+STATUTS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+# =============================================================================
+# MODÈLE
+# =============================================================================
+
+class ElectreScorer:
+    """
+    Classifieur chargé une fois : profils, seuils λ et mode (concordance ou crédibilité).
+
+    En concordance classique, le calcul passe par le classifieur compilé (masques
+    de bits et tables, voir electre_compile.py) : mêmes classes et mêmes concordances
+    que classify_products. Un critère absent vaut 0, comme dans extract_criteria_values.
+    """
+
+    def __init__(self, profiles=None, lambda_values=None, credibility=False):
+        self.profiles = DEFAULT_PROFILES if profiles is None else profiles
+        self.lambda_values = list(LAMBDA_VALUES if lambda_values is None else lambda_values)
+        self.credibility = credibility
+        self.P = build_profiles_matrix(self.profiles)
+        self.criteres = list(CRITERIA.keys())
+        self.compile = None if credibility else CompiledClassifier(self.P, self.lambda_values)
+
+    def config(self):
+        return {"criteres": CRITERIA, "profils": self.profiles, "lambda_values": self.lambda_values,
+                "classes": CLASSES, "credibility": self.credibility}
+
+    def matrix_from_products(self, produits):
+        """Liste de dicts {critère: valeur} → matrice produits × critères."""
+        X = np.array([[produit.get(c) for c in self.criteres] for produit in produits], dtype=np.float64)
+        X[np.isnan(X)] = 0.0  # None ou absent → 0
+        return X
+
+    def matrix_from_columns(self, colonnes):
+        """Colonnes {critère: [valeurs]} → matrice produits × critères."""
+        longueurs = {len(v) for v in colonnes.values()}
+        if len(longueurs) > 1:
+            raise ValueError("colonnes de longueurs différentes")
+        n = longueurs.pop() if longueurs else 0
+        X = np.zeros((n, len(self.criteres)))
+        for j, critere in enumerate(self.criteres):
+            if critere in colonnes:
+                X[:, j] = np.asarray(colonnes[critere], dtype=np.float64)
+        X[np.isnan(X)] = 0.0
+        return X
+
+    def score(self, X):
+        """Concordances et codes de classe d'une matrice produits × critères."""
+        if self.compile is not None:
+            return self.compile.score(X)
+        C_ab, C_ba = compute_credibility_matrices(X, self.P)
+        return C_ab, C_ba, classify_lambdas(C_ab, C_ba, self.lambda_values)
+
+    def score_product(self, produit):
+        """Un produit : classes par λ et détail de la concordance avec chaque profil."""
+        C_ab, C_ba, codes = self.score(self.matrix_from_products([produit]))
+        return {
+            "classes": {str(lam): {"pessimiste": CLASSES[pess[0]], "optimiste": CLASSES[opt[0]]}
+                        for lam, (pess, opt) in codes.items()},
+            "concordance": {"c_ab": C_ab[0].tolist(), "c_ba": C_ba[0].tolist()},
+        }
+
+    def score_batch(self, X, details=False):
+        """Un lot, en colonnes : une liste de classes par λ et par procédure."""
+        if self.compile is not None and not details:
+            codes = self.compile.classify(X)  # b2 à b5 seulement, sans concordances
+        else:
+            C_ab, C_ba, codes = self.score(X)
+        reponse = {
+            "n": len(X),
+            "classes": {str(lam): {"pessimiste": LIBELLES_CLASSES[pess].tolist(),
+                                   "optimiste": LIBELLES_CLASSES[opt].tolist()}
+                        for lam, (pess, opt) in codes.items()},
+        }
+        if details:
+            reponse["concordance"] = {"c_ab": C_ab.tolist(), "c_ba": C_ba.tolist()}
+        return reponse
+
+# =============================================================================
+# LATENCES
+# =============================================================================
+
+class LatencyRecorder:
+    """Temps de traitement des dernières requêtes d'une route, et produits classés."""
+
+    def __init__(self, fenetre=FENETRE_LATENCES):
+        self.durees = deque(maxlen=fenetre)
+        self.requetes = 0
+        self.produits = 0
+        self.temps_total = 0.0
+
+    def add(self, duree, produits=1):
+        self.durees.append(duree)
+        self.requetes += 1
+        self.produits += produits
+        self.temps_total += duree
+
+    def summary(self):
+        resume = {"requetes": self.requetes, "produits": self.produits,
+                  "produits_par_s": self.produits / self.temps_total if self.temps_total > 0 else None}
+        if self.durees:
+            valeurs = np.percentile(np.fromiter(self.durees, dtype=np.float64), PERCENTILES) * 1000
+            resume["latence_ms"] = {f"p{p:g}": float(v) for p, v in zip(PERCENTILES, valeurs)}
+        return resume
+
+# =============================================================================
+# SERVEUR HTTP
+# =============================================================================
+
+def _encode(reponse):
+    return json.dumps(reponse, ensure_ascii=False).encode("utf-8")
+
+class ScoringServer:
+    """
+    Serveur HTTP/1.1 minimal (asyncio, connexions persistantes) autour d'un ElectreScorer.
+
+    Routes :
+        POST /classer       {"produit": {critère: valeur}}                 → classes + concordances
+        POST /classer/lot   {"produits": [{...}, ...]} ou {"colonnes": {critère: [...]}},
+                            "details": true pour les concordances          → classes en colonnes
+        GET  /latences      percentiles de latence et débit par route
+        GET  /config        critères, profils et λ chargés
+
+    La latence mesurée est le temps de traitement d'une requête (décodage JSON,
+    classification, encodage), hors réseau. Le calcul s'exécute sur la boucle
+    d'événements : un processus par cœur pour monter en charge.
+    """
+
+    def __init__(self, scorer):
+        self.scorer = scorer
+        self.latences = {"/classer": LatencyRecorder(), "/classer/lot": LatencyRecorder()}
+        self.routes = {
+            ("POST", "/classer"): self._classer,
+            ("POST", "/classer/lot"): self._classer_lot,
+            ("GET", "/latences"): self._latences,
+            ("GET", "/config"): lambda corps: (self.scorer.config(), 0),
+        }
+
+    def _classer(self, corps):
+        requete = json.loads(corps)
+        produit = requete.get("produit", requete)
+        if not isinstance(produit, dict):
+            raise ValueError("'produit' doit être un objet {critère: valeur}")
+        return self.scorer.score_product(produit), 1
+
+    def _classer_lot(self, corps):
+        requete = json.loads(corps)
+        if "colonnes" in requete:
+            X = self.scorer.matrix_from_columns(requete["colonnes"])
+        elif "produits" in requete:
+            X = self.scorer.matrix_from_products(requete["produits"])
+        else:
+            raise ValueError("clé 'produits' ou 'colonnes' attendue")
+        return self.scorer.score_batch(X, requete.get("details", False)), len(X)
+
+    def _latences(self, corps):
+        return {route: enregistreur.summary() for route, enregistreur in self.latences.items()}, 0
+
+    def dispatch(self, methode, chemin, corps):
+        """Traite une requête : (statut, réponse JSON encodée)."""
+        chemin = chemin.split("?", 1)[0]
+        gestionnaire = self.routes.get((methode, chemin))
+        if gestionnaire is None:
+            connues = {c for _, c in self.routes}
+            if chemin in connues:
+                return 405, _encode({"erreur": f"méthode {methode} non prise en charge"})
+            return 404, _encode({"erreur": f"route inconnue: {chemin}"})
+        debut = time.perf_counter()
+        try:
+            reponse, produits = gestionnaire(corps)
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            return 400, _encode({"erreur": str(e)})
+        donnees = _encode(reponse)
+        if chemin in self.latences:
+            self.latences[chemin].add(time.perf_counter() - debut, produits)
+        return 200, donnees
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                ligne = await reader.readline()
+                if not ligne:
+                    break
+                try:
+                    methode, chemin, version = ligne.decode("latin-1").split()
+                except ValueError:
+                    break
+                entetes = {}
+                while True:
+                    entete = await reader.readline()
+                    if entete in (b"\r\n", b"\n", b""):
+                        break
+                    nom, _, valeur = entete.decode("latin-1").partition(":")
+                    entetes[nom.strip().lower()] = valeur.strip()
+
+                longueur = int(entetes.get("content-length", 0))
+                if longueur > TAILLE_MAX_CORPS:
+                    statut, donnees = 413, _encode({"erreur": f"corps limité à {TAILLE_MAX_CORPS} octets"})
+                    garder = False
+                else:
+                    corps = await reader.readexactly(longueur) if longueur else b""
+                    try:
+                        statut, donnees = self.dispatch(methode, chemin, corps)
+                    except Exception as e:
+                        statut, donnees = 500, _encode({"erreur": f"{type(e).__name__}: {e}"})
+                    connexion = entetes.get("connection", "").lower()
+                    garder = connexion == "keep-alive" if version == "HTTP/1.0" else connexion != "close"
+
+                writer.write(
+                    f"HTTP/1.1 {statut} {STATUTS[statut]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(donnees)}\r\n"
+                    f"Connection: {'keep-alive' if garder else 'close'}\r\n\r\n".encode("latin-1") + donnees)
+                await writer.drain()
+                if not garder:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, hote=HOTE, port=PORT):
+        serveur = await asyncio.start_server(self.handle_connection, hote, port)
+        adresse = serveur.sockets[0].getsockname()
+        print(f"🌐 Service ELECTRE TRI sur http://{adresse[0]}:{adresse[1]} "
+              f"(λ = {self.scorer.lambda_values}, {'crédibilité' if self.scorer.credibility else 'concordance'})")
+        async with serveur:
+            await serveur.serve_forever()
+
+# =============================================================================
+# LIGNE DE COMMANDE
+# =============================================================================
+
+def main(argv=None):
+    from electre_cli import load_profiles, parse_lambdas
+
+    parser = argparse.ArgumentParser(description="Service HTTP de classification ELECTRE TRI")
+    parser.add_argument("--hote", default=HOTE)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("-l", "--lambdas", type=parse_lambdas, help="seuils λ, ex. '0.6,0.7'")
+    parser.add_argument("-p", "--profils", help="profils limites b1 à b6 (JSON)")
+    parser.add_argument("--credibilite", action="store_true", help="indice de crédibilité σ (seuils q, p, v)")
+    args = parser.parse_args(argv)
+
+    scorer = ElectreScorer(load_profiles(args.profils) if args.profils else None, args.lambdas, args.credibilite)
+    try:
+        asyncio.run(ScoringServer(scorer).serve(args.hote, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Service arrêté")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
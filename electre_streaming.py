@@ -0,0 +1,227 @@
+# electre_streaming.py - Classification ELECTRE TRI par blocs (mémoire constante)
+import csv
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from electri_fixed import (
+    CRITERIA, CLASSES, LAMBDA_VALUES, DEFAULT_PROFILES, INPUT_XLSX, NUTRISCORE_LETTRES,
+    get_column_values, build_criteria_matrix, build_profiles_matrix,
+    compute_concordance_matrices, classify_lambdas, clean_nutriscore_series,
+    get_product_names, print_comparison_results,
+)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+OUTPUT_CSV = "electre_tri_resultats.csv"
+CHUNK_SIZE = 50_000
+
+# Seules colonnes lues dans le fichier d'entrée
+COLONNES_UTILES = ["product_name", "nutriscore_grade", *CRITERIA.keys()]
+
+# Lettre Nutri-Score → code (0 = A .. 4 = E), dérivé de NUTRISCORE_LETTRES
+NUTRISCORE_CODES = {lettre: code for code, lettre in enumerate(NUTRISCORE_LETTRES)}
+
+# =============================================================================
+# LECTURE PAR BLOCS
+# =============================================================================
+
+def iter_input_chunks(input_file, chunksize=CHUNK_SIZE):
+    """
+    Lit le fichier d'entrée par blocs de chunksize lignes (CSV ou Excel).
+    
+    L'index de chaque bloc continue celui du bloc précédent, comme si le
+    fichier avait été lu en entier.
+    """
+    suffixe = Path(input_file).suffix.lower()
+    if suffixe in (".csv", ".tsv", ".txt"):
+        sep = "\t" if suffixe == ".tsv" else ","
+        yield from pd.read_csv(input_file, sep=sep, chunksize=chunksize,
+                               usecols=lambda col: col in COLONNES_UTILES)
+    elif suffixe in (".xlsx", ".xlsm"):
+        yield from _iter_excel_chunks(input_file, chunksize)
+    elif suffixe == ".parquet":
+        yield from _iter_parquet_chunks(input_file, chunksize)
+    else:
+        raise ValueError(f"❌ Format d'entrée non supporté : {input_file}")
+
+def _iter_excel_chunks(input_file, chunksize):
+    """Lecture Excel en mode read_only d'openpyxl (ligne par ligne, sans tout charger)."""
+    from openpyxl import load_workbook
+    
+    classeur = load_workbook(input_file, read_only=True, data_only=True)
+    try:
+        lignes = classeur.active.iter_rows(values_only=True)
+        entete = next(lignes, None)
+        if entete is None:
+            return
+        positions = {nom: i for i, nom in enumerate(entete) if nom in COLONNES_UTILES}
+        
+        debut = 0
+        bloc = []
+        for ligne in lignes:
+            bloc.append([ligne[i] if i < len(ligne) else None for i in positions.values()])
+            if len(bloc) == chunksize:
+                yield _bloc_to_frame(bloc, positions, debut)
+                debut += len(bloc)
+                bloc = []
+        if bloc:
+            yield _bloc_to_frame(bloc, positions, debut)
+    finally:
+        classeur.close()
+
+def _iter_parquet_chunks(input_file, chunksize):
+    """Lecture Parquet par lots de lignes (pyarrow), colonnes utiles seulement."""
+    import pyarrow.parquet as pq
+    
+    fichier = pq.ParquetFile(input_file)
+    colonnes = [c for c in fichier.schema_arrow.names if c in COLONNES_UTILES]
+    debut = 0
+    for lot in fichier.iter_batches(batch_size=chunksize, columns=colonnes):
+        bloc = lot.to_pandas()
+        bloc.index = pd.RangeIndex(debut, debut + len(bloc))
+        debut += len(bloc)
+        yield bloc
+
+def _bloc_to_frame(bloc, positions, debut):
+    """Convertit une liste de lignes en DataFrame indexé à partir de debut."""
+    return pd.DataFrame(bloc, columns=list(positions.keys()),
+                        index=pd.RangeIndex(debut, debut + len(bloc)))
+
+# =============================================================================
+# AGRÉGATS CUMULÉS
+# =============================================================================
+
+def init_aggregates(lambda_values):
+    """Compteurs cumulés par λ : répartition des classes et matrices de confusion."""
+    return {
+        lambda_val: {
+            'nb_produits': 0,
+            'repartition_pessimiste': np.zeros(len(CLASSES), dtype=np.int64),
+            'repartition_optimiste': np.zeros(len(CLASSES), dtype=np.int64),
+            # Lignes = Nutri-Score (A..E), colonnes = classes ELECTRE (A'..E')
+            'confusion_pessimiste': np.zeros((len(CLASSES), len(CLASSES)), dtype=np.int64),
+            'confusion_optimiste': np.zeros((len(CLASSES), len(CLASSES)), dtype=np.int64),
+        }
+        for lambda_val in lambda_values
+    }
+
+def update_aggregates(agregats, lambda_val, codes_pessimiste, codes_optimiste, codes_nutriscore):
+    """Ajoute un bloc de codes de classes aux compteurs du seuil lambda_val."""
+    nb_classes = len(CLASSES)
+    stats = agregats[lambda_val]
+    stats['nb_produits'] += len(codes_pessimiste)
+    stats['repartition_pessimiste'] += np.bincount(codes_pessimiste, minlength=nb_classes)
+    stats['repartition_optimiste'] += np.bincount(codes_optimiste, minlength=nb_classes)
+    
+    valides = codes_nutriscore >= 0
+    lignes = codes_nutriscore[valides] * nb_classes
+    for procedure, codes in (('pessimiste', codes_pessimiste), ('optimiste', codes_optimiste)):
+        stats[f'confusion_{procedure}'] += np.bincount(
+            lignes + codes[valides], minlength=nb_classes * nb_classes
+        ).reshape(nb_classes, nb_classes)
+
+def aggregates_to_comparison_stats(agregats):
+    """Statistiques au même format que compare_with_nutriscore, à partir des agrégats."""
+    from electre_accord import comparison_stats_from_confusions
+    confusions = np.array([[agregat['confusion_pessimiste'], agregat['confusion_optimiste']]
+                           for agregat in agregats.values()], dtype=np.int64)
+    return comparison_stats_from_confusions(confusions.reshape(len(agregats), 2, len(CLASSES), len(CLASSES)),
+                                            list(agregats))
+
+def _repartition_dict(compteurs):
+    """Répartition {classe: effectif} triée par effectif, comme value_counts().to_dict()."""
+    ordre = np.argsort(-compteurs, kind='stable')
+    return {CLASSES[i]: int(compteurs[i]) for i in ordre if compteurs[i] > 0}
+
+# =============================================================================
+# PIPELINE EN FLUX
+# =============================================================================
+
+def classify_chunk(df_chunk, P, lambda_values):
+    """
+    Classe un bloc de produits.
+    
+    Returns:
+        (df_resultats, codes_nutriscore, codes_par_lambda)
+    """
+    # Même conversion que extract_criteria_values, sans les affichages par bloc
+    df_criteria = pd.DataFrame({critere: get_column_values(df_chunk, critere) for critere in CRITERIA.keys()})
+    C_ab, C_ba = compute_concordance_matrices(build_criteria_matrix(df_criteria), P)
+    codes_par_lambda = classify_lambdas(C_ab, C_ba, lambda_values)
+    
+    noms = get_product_names(df_chunk)
+    nutriscores = clean_nutriscore_series(df_chunk)
+    # Mêmes codes que nutriscore_codes (-1 = absent), sans nettoyer la colonne une seconde fois
+    codes_nutriscore = pd.Categorical(nutriscores, categories=NUTRISCORE_LETTRES).codes.astype(np.int64)
+    labels = np.array(CLASSES, dtype=object)
+    
+    blocs = []
+    for lambda_val, (codes_pessimiste, codes_optimiste) in codes_par_lambda.items():
+        bloc = pd.DataFrame({
+            'product_name': noms,
+            'nutriscore_original': nutriscores,
+            'lambda': lambda_val,
+            'classe_pessimiste': labels[codes_pessimiste],
+            'classe_optimiste': labels[codes_optimiste],
+        })
+        for critere in CRITERIA.keys():
+            bloc[critere] = df_criteria[critere].to_numpy()
+        blocs.append(bloc)
+    
+    return pd.concat(blocs, ignore_index=True), codes_nutriscore, codes_par_lambda
+
+def run_electre_tri_streaming(input_file=INPUT_XLSX, output_file=OUTPUT_CSV, profiles=None,
+                              lambda_values=None, chunksize=CHUNK_SIZE):
+    """
+    Variante de run_electre_tri à mémoire constante.
+    
+    Le fichier est lu par blocs de chunksize produits ; chaque bloc est classé,
+    ajouté au CSV de sortie puis oublié. Seuls les compteurs (répartition,
+    accords, matrices de confusion) sont conservés d'un bloc à l'autre.
+    Les lignes du CSV sont groupées par bloc puis par λ.
+    
+    Returns:
+        dict: statistiques au format de compare_with_nutriscore
+    """
+    if profiles is None:
+        profiles = DEFAULT_PROFILES
+    if lambda_values is None:
+        lambda_values = LAMBDA_VALUES
+    
+    print("🔄 Début de l'analyse ELECTRE TRI (mode flux)")
+    print(f"📂 Fichier d'entrée: {input_file} (blocs de {chunksize} produits)")
+    
+    P = build_profiles_matrix(profiles)
+    agregats = init_aggregates(lambda_values)
+    nb_produits = 0
+    
+    with open(output_file, 'w', newline='', encoding='utf-8') as sortie:
+        for numero_bloc, df_chunk in enumerate(iter_input_chunks(input_file, chunksize)):
+            df_resultats, codes_nutriscore, codes_par_lambda = classify_chunk(df_chunk, P, lambda_values)
+            df_resultats.to_csv(sortie, header=(numero_bloc == 0), index=False, quoting=csv.QUOTE_MINIMAL)
+            
+            for lambda_val, (codes_pessimiste, codes_optimiste) in codes_par_lambda.items():
+                update_aggregates(agregats, lambda_val, codes_pessimiste, codes_optimiste, codes_nutriscore)
+            
+            nb_produits += len(df_chunk)
+            print(f"  Bloc {numero_bloc + 1}: {nb_produits} produits traités")
+    
+    print(f"✅ Analyse terminée ! Résultats sauvegardés dans {output_file}")
+    
+    comparison_stats = aggregates_to_comparison_stats(agregats)
+    print("\n📊 Comparaison avec le Nutri-Score original:")
+    if comparison_stats:
+        print_comparison_results(comparison_stats)
+    
+    print("\n📈 Répartition des classifications ELECTRE TRI:")
+    for lambda_val, agregat in agregats.items():
+        print(f"  λ = {lambda_val}:")
+        print(f"    Pessimiste: {_repartition_dict(agregat['repartition_pessimiste'])}")
+        print(f"    Optimiste:  {_repartition_dict(agregat['repartition_optimiste'])}")
+    
+    return comparison_stats
+
+if __name__ == "__main__":
+    run_electre_tri_streaming()
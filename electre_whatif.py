@@ -0,0 +1,215 @@
+# electre_whatif.py - Session « et si ? » : reclassification incrémentale après modification d'un profil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from electri_fixed import (
+    CRITERIA, CLASSES, LAMBDA_VALUES, DEFAULT_PROFILES, PROCEDURES, INPUT_XLSX,
+    read_input, extract_criteria_values, build_criteria_matrix, build_profiles_matrix, get_product_names,
+)
+from electre_compile import PROFILS_MOBILES, N_PROFILS_MOBILES, CompiledClassifier, pass_masks
+
+# =============================================================================
+# SESSION
+# =============================================================================
+# En concordance classique, la relation d'un produit à un profil se résume au
+# masque de ses critères favorables (un bit par critère, voir electre_compile.py).
+# Déplacer la valeur v d'un profil sur le critère j ne change le bit j que pour
+# les produits dont x_j est compris entre l'ancienne et la nouvelle valeur :
+# avec chaque colonne triée une fois, deux recherches dichotomiques les trouvent.
+# On met à jour leur bit (la concordance gagne ou perd le poids du critère, lue
+# dans la table des poids : mêmes flottants qu'un recalcul complet), puis leur
+# verdict de surclassement sur ce profil, puis leur classe.
+
+class WhatIfSession:
+    """
+    Session interactive de réglage des profils (concordance classique).
+
+    État gardé en mémoire :
+    - pour chaque critère, l'ordre de tri des produits et les valeurs triées ;
+    - les masques (produit, profil) dans les deux sens, uint8 profils × produits ;
+    - pour chaque λ, les verdicts de surclassement sur b2..b5 (4 bits par produit et
+      par sens, index des tables de classes de electre_compile) ;
+    - les codes de classe courants, uint8 λ × procédure × produit (comme ElectreResults.codes).
+
+    set_profile_value modifie une valeur de profil et renvoie les produits dont la
+    classe a changé ; undo annule la dernière modification.
+    """
+
+    def __init__(self, X, profiles=None, lambda_values=None, product_names=None):
+        self.X = np.asarray(X, dtype=np.float64)
+        self.colonnes = np.ascontiguousarray(self.X.T)
+        self.P = build_profiles_matrix(DEFAULT_PROFILES if profiles is None else profiles)
+        self.lambda_values = list(LAMBDA_VALUES if lambda_values is None else lambda_values)
+        self.product_names = product_names
+        self.criteres = list(CRITERIA.keys())
+        self.historique = []
+
+        debut = time.perf_counter()
+        # Index triés : ordre des produits (int32) et valeurs correspondantes, par critère
+        self.ordres = []
+        self.valeurs_triees = []
+        for colonne in self.colonnes:
+            ordre = np.argsort(colonne, kind="stable").astype(np.int32)
+            self.ordres.append(ordre)
+            self.valeurs_triees.append(colonne[ordre])
+        self.M_ab, self.M_ba = pass_masks(self.X, self.P)
+        # Les tables (poids, verdicts, classes) ne dépendent que de CRITERIA et de λ,
+        # pas des profils : elles servent telles quelles après chaque modification
+        self.tables = CompiledClassifier(self.P, self.lambda_values).prepare()
+        n_lambdas = len(self.lambda_values)
+        self.index_ab = np.zeros((n_lambdas, self.n_products), dtype=np.uint8)
+        self.index_ba = np.zeros_like(self.index_ab)
+        for k in range(PROFILS_MOBILES.start, PROFILS_MOBILES.stop):
+            for i in range(n_lambdas):
+                self.index_ab[i] |= self._verdicts(i, k, self.M_ab[k])
+                self.index_ba[i] |= self._verdicts(i, k, self.M_ba[k])
+        self.codes = np.stack([self._classes(i, self.index_ab[i], self.index_ba[i]) for i in range(n_lambdas)])
+        self.temps_initialisation = time.perf_counter() - debut
+
+    @property
+    def n_products(self):
+        return self.X.shape[0]
+
+    @property
+    def profiles(self):
+        """Profils courants en liste de dicts (format de DEFAULT_PROFILES)."""
+        return [{critere: float(v) for critere, v in zip(self.criteres, profil)} for profil in self.P]
+
+    def _verdicts(self, i, k, masques):
+        """Verdicts (λ_i) sur le profil k ∈ b2..b5, déjà décalés à leur bit dans l'index."""
+        return self.tables.verdicts_decales[i, k - PROFILS_MOBILES.start][masques]
+
+    def _classes(self, i, index_ab, index_ba):
+        """Codes (pessimiste, optimiste) d'après les index de verdicts."""
+        return np.stack((self.tables.table_pessimiste[index_ab],
+                         self.tables.table_optimiste[index_ab | (index_ba << N_PROFILS_MOBILES)]))
+
+    def affected_products(self, critere, ancienne, nouvelle):
+        """Produits dont x_critère est entre ancienne et nouvelle (bornes incluses), par dichotomie."""
+        j = self.criteres.index(critere)
+        bas, haut = min(ancienne, nouvelle), max(ancienne, nouvelle)
+        valeurs = self.valeurs_triees[j]
+        return self.ordres[j][np.searchsorted(valeurs, bas, "left"):np.searchsorted(valeurs, haut, "right")]
+
+    def set_profile_value(self, profil, critere, valeur):
+        """
+        Modifie la valeur du profil b<profil+1> (indice 0 à 5) sur un critère.
+
+        Returns:
+            dict: profil, critere, ancienne_valeur, nouvelle_valeur, produits_testes,
+            produits (indices des produits dont au moins une classe a changé),
+            avant / apres (codes λ × procédure × produits changés), temps_ms
+        """
+        debut = time.perf_counter()
+        if critere not in CRITERIA:
+            raise ValueError(f"❌ Critère inconnu : {critere}")
+        if not 0 <= profil < self.P.shape[0]:
+            raise ValueError(f"❌ Profil b{profil + 1} inexistant (indices 0 à {self.P.shape[0] - 1})")
+        j = self.criteres.index(critere)
+        ancienne = float(self.P[profil, j])
+        self.P[profil, j] = valeur
+        candidats = self.affected_products(critere, ancienne, valeur)
+
+        # Bit j recalculé pour les seuls candidats (x entre les deux valeurs), triés
+        # pour que les lectures et écritures dispersées restent proches en mémoire
+        candidats = np.sort(candidats)
+        x = self.colonnes[j][candidats]
+        if CRITERIA[critere]["direction"] == "benefit":
+            a_meilleur, b_meilleur = x >= valeur, valeur >= x
+        else:
+            a_meilleur, b_meilleur = x <= valeur, valeur <= x
+        masque = np.uint8(~(1 << j) & 0xFF)
+        m_ab = (self.M_ab[profil, candidats] & masque) | (a_meilleur.astype(np.uint8) << j)
+        m_ba = (self.M_ba[profil, candidats] & masque) | (b_meilleur.astype(np.uint8) << j)
+        self.M_ab[profil, candidats] = m_ab
+        self.M_ba[profil, candidats] = m_ba
+
+        changes = np.empty(0, dtype=np.int64)
+        avant = apres = np.empty((len(self.lambda_values), len(PROCEDURES), 0), dtype=np.uint8)
+        # b1 et b6 ferment le modèle : seuls b2..b5 interviennent dans les procédures
+        if PROFILS_MOBILES.start <= profil < PROFILS_MOBILES.stop and len(candidats):
+            bit = np.uint8(~(1 << (profil - PROFILS_MOBILES.start)) & 0xFF)
+            nouveaux = np.empty((len(self.lambda_values), len(PROCEDURES), len(candidats)), dtype=np.uint8)
+            for i in range(len(self.lambda_values)):
+                index_ab = (self.index_ab[i, candidats] & bit) | self._verdicts(i, profil, m_ab)
+                index_ba = (self.index_ba[i, candidats] & bit) | self._verdicts(i, profil, m_ba)
+                self.index_ab[i, candidats] = index_ab
+                self.index_ba[i, candidats] = index_ba
+                nouveaux[i] = self._classes(i, index_ab, index_ba)
+            anciens = np.take(self.codes, candidats, axis=2)
+            differents = (nouveaux != anciens).any(axis=(0, 1))
+            changes = candidats[differents].astype(np.int64)
+            avant, apres = anciens[:, :, differents], nouveaux[:, :, differents]
+            self.codes[:, :, changes] = apres
+
+        self.historique.append((profil, critere, ancienne))
+        return {
+            "profil": profil, "critere": critere,
+            "ancienne_valeur": ancienne, "nouvelle_valeur": float(valeur),
+            "produits_testes": len(candidats), "produits": changes,
+            "avant": avant, "apres": apres,
+            "temps_ms": (time.perf_counter() - debut) * 1000,
+        }
+
+    def undo(self):
+        """Annule la dernière modification (None s'il n'y en a pas)."""
+        if not self.historique:
+            return None
+        profil, critere, ancienne = self.historique.pop()
+        changement = self.set_profile_value(profil, critere, ancienne)
+        self.historique.pop()
+        return changement
+
+    def classes(self, lambda_val, procedure="pessimiste"):
+        """Codes de classe courants d'une procédure pour un λ."""
+        return self.codes[self.lambda_values.index(lambda_val), PROCEDURES.index(procedure)]
+
+    def changes_frame(self, changement):
+        """Détail d'une modification : une ligne par produit changé, λ et procédure."""
+        labels = np.array(CLASSES, dtype=object)
+        produits = changement["produits"]
+        lignes = []
+        for i, lambda_val in enumerate(self.lambda_values):
+            for p, procedure in enumerate(PROCEDURES):
+                differents = changement["avant"][i, p] != changement["apres"][i, p]
+                bloc = pd.DataFrame({
+                    "produit": produits[differents],
+                    "lambda": lambda_val,
+                    "procedure": procedure,
+                    "avant": labels[changement["avant"][i, p][differents]],
+                    "apres": labels[changement["apres"][i, p][differents]],
+                })
+                if self.product_names is not None:
+                    bloc.insert(1, "product_name", np.asarray(self.product_names, dtype=object)[bloc["produit"]])
+                lignes.append(bloc)
+        return pd.concat(lignes, ignore_index=True)
+
+def open_session(input_file=INPUT_XLSX, profiles=None, lambda_values=None):
+    """Charge un fichier d'entrée et ouvre une session sur ses produits."""
+    df = read_input(input_file)
+    X = build_criteria_matrix(extract_criteria_values(df))
+    session = WhatIfSession(X, profiles, lambda_values, get_product_names(df))
+    print(f"🧪 Session ouverte : {session.n_products} produits indexés en {session.temps_initialisation:.2f} s")
+    return session
+
+def print_change(session, changement, limite=20):
+    """Affiche le résumé d'une modification et les premiers produits changés."""
+    print(f"🎚️  b{changement['profil'] + 1} {changement['critere']}: "
+          f"{changement['ancienne_valeur']:g} → {changement['nouvelle_valeur']:g} : "
+          f"{len(changement['produits'])} produits changent de classe "
+          f"({changement['produits_testes']} testés, {changement['temps_ms']:.2f} ms)")
+    if len(changement["produits"]):
+        print(session.changes_frame(changement).head(limite).to_string(index=False))
+
+# =============================================================================
+# EXEMPLE D'UTILISATION
+# =============================================================================
+
+if __name__ == "__main__":
+    session = open_session(sys.argv[1] if len(sys.argv) > 1 else INPUT_XLSX)
+    # b3 (indice 2), sucres : 20 → 18
+    print_change(session, session.set_profile_value(2, "sugars_100g", 18))
+    print_change(session, session.undo())
@@ -3,8 +3,7 @@ import pandas as pd
 import numpy as np
 import ast
 import json
-import matplotlib.pyplot as plt
-import seaborn as sns
+import hashlib
 from pathlib import Path
 
 # =============================================================================
@@ -15,16 +14,19 @@ OUTPUT_XLSX = "electre_tri_resultats.xlsx"
 
 # Critères ELECTRE TRI - Poids équilibrés pour meilleure discrimination
 CRITERIA = {
-    "energy-kcal_100g": {"direction": "cost", "weight": 0.12},      # Énergie - importance modérée
-    "sugars_100g": {"direction": "cost", "weight": 0.12},      # Sucres - réduit pour éviter sur-pénalisation  
-    "fat_100g": {"direction": "cost", "weight": 0.12}, # Graisses saturées - réduit
-    "sodium_100g": {"direction": "cost", "weight": 0.08},      # Sodium - moins important pour pâtes à tartiner
-    "fruits_vegetables_nuts_100g": {"direction": "benefit", "weight": 0.18}, # Noix/fruits - très important !
-    "fiber_100g": {"direction": "benefit", "weight": 0.15},    # Fibres - valorisées
-    "proteins_100g": {"direction": "benefit", "weight": 0.13}, # Protéines - augmentées
-    "additives_n": {"direction": "cost", "weight": 0.10}       # Additifs - conservé
+    "energy-kcal_100g": {"direction": "cost", "weight": 0.12, "q": 10, "p": 50, "v": 300},      # Énergie - importance modérée
+    "sugars_100g": {"direction": "cost", "weight": 0.12, "q": 1, "p": 5, "v": 30},      # Sucres - réduit pour éviter sur-pénalisation  
+    "fat_100g": {"direction": "cost", "weight": 0.12, "q": 0.5, "p": 2, "v": 15}, # Graisses saturées - réduit
+    "sodium_100g": {"direction": "cost", "weight": 0.08, "q": 0.02, "p": 0.1, "v": 1.0},      # Sodium - moins important pour pâtes à tartiner
+    "fruits_vegetables_nuts_100g": {"direction": "benefit", "weight": 0.18, "q": 2, "p": 10, "v": None}, # Noix/fruits - très important !
+    "fiber_100g": {"direction": "benefit", "weight": 0.15, "q": 0.3, "p": 1.0, "v": None},    # Fibres - valorisées
+    "proteins_100g": {"direction": "benefit", "weight": 0.13, "q": 0.5, "p": 2.0, "v": None}, # Protéines - augmentées
+    "additives_n": {"direction": "cost", "weight": 0.10, "q": 0, "p": 1, "v": 5}       # Additifs - conservé
 }
 # Total: cost = 0.54, benefit = 0.46 (plus équilibré)
+# q / p / v : seuils d'indifférence, de préférence et de veto (None = pas de veto), dans
+# l'unité du critère. Utilisés uniquement par le mode crédibilité (credibility=True) ;
+# le mode classique équivaut à q = p = 0 sans veto.
 
 # Classes ELECTRE TRI (5 classes de A' à E')
 CLASSES = ["A'", "B'", "C'", "D'", "E'"]  # A' = excellent, E' = à éviter
@@ -88,7 +90,7 @@ def get_column_values(df, column_name):
         return values
     else:
         # Si la colonne n'existe pas, créer une série de zéros
-        return pd.Series([0] * len(df))
+        return pd.Series([0] * len(df), index=df.index)
 
 def extract_criteria_values(df):
     """Extrait les valeurs nutritionnelles pour chaque critère ELECTRE TRI."""
@@ -179,6 +181,54 @@ def calculate_concordance(product_values, profile_values):
     
     return total_score
 
+def calculate_credibility(product_values, profile_values):
+    """
+    Indice de crédibilité σ(a, b) de « a surclasse b » (ELECTRE TRI complet).
+
+    Utilise les seuils q (indifférence), p (préférence) et v (veto) de CRITERIA :
+    - concordance partielle : 1 si b ne dépasse a que de q au plus, 0 au-delà de p,
+      linéaire entre les deux
+    - discordance : 0 jusqu'à p, 1 à partir de v, linéaire entre les deux
+    - σ = C × Π (1 - d_j) / (1 - C) sur les critères où d_j > C
+    Avec q = p = 0 et sans veto, σ est égal à calculate_concordance.
+    """
+    concordance = 0.0
+    discordances = []
+
+    for critere_nom, critere_config in CRITERIA.items():
+        poids = critere_config["weight"]
+        q = critere_config.get("q", 0)
+        p = critere_config.get("p", q)
+        v = critere_config.get("v")
+
+        valeur_produit = product_values.get(critere_nom, 0)
+        valeur_profil = profile_values.get(critere_nom, 0)
+
+        # Avance de b sur a, dans le sens du critère (> 0 = b meilleur)
+        if critere_config["direction"] == "benefit":
+            ecart = valeur_profil - valeur_produit
+        else:
+            ecart = valeur_produit - valeur_profil
+
+        # Concordance partielle c_j(a, b)
+        if ecart <= q:
+            c_j = 1.0
+        elif ecart >= p:
+            c_j = 0.0
+        else:
+            c_j = (p - ecart) / (p - q)
+        concordance += poids * c_j
+
+        # Discordance d_j(a, b)
+        if v is not None and ecart > p:
+            discordances.append(1.0 if ecart >= v else (ecart - p) / (v - p))
+
+    credibilite = concordance
+    for d_j in discordances:
+        if d_j > concordance:
+            credibilite *= (1.0 - d_j) / (1.0 - concordance)
+    return credibilite
+
 def classify_pessimistic(product_values, profiles, seuil_majorite):
     """
     Classification pessimiste : commence par les profils les plus hauts.
@@ -233,263 +283,396 @@ def classify_optimistic(product_values, profiles, seuil_majorite):
     # Si aucun profil n'est strictement meilleur, c'est le top
     return "A'"
 
-def compare_with_nutriscore(df_results):
+# =============================================================================
+# MOTEUR VECTORISÉ - MÊMES RÉSULTATS QUE LES FONCTIONS CI-DESSUS
+# =============================================================================
+# Les classes sont représentées par leur indice dans CLASSES (0 = A', 4 = E').
+
+def build_criteria_matrix(df_criteria):
+    """Construit la matrice produits × critères (float64) dans l'ordre de CRITERIA."""
+    return np.column_stack([
+        df_criteria[critere].to_numpy(dtype=np.float64) for critere in CRITERIA.keys()
+    ])
+
+def build_profiles_matrix(profiles):
+    """Construit la matrice profils × critères (float64), 0 si un critère manque."""
+    return np.array([
+        [profil.get(critere, 0) for critere in CRITERIA.keys()] for profil in profiles
+    ], dtype=np.float64)
+
+def compute_concordance_matrices(X, P):
     """
-    Compare les classifications ELECTRE TRI avec le Nutri-Score original.
+    Calcule toutes les concordances produits/profils dans les deux sens.
     
     Args:
-        df_results: DataFrame avec les résultats ELECTRE TRI
+        X: matrice produits × critères
+        P: matrice profils × critères
     
     Returns:
-        dict: statistiques de comparaison et matrices de confusion
-    """
-    # Mapping Nutri-Score vers nos classes ELECTRE TRI
-    nutriscore_mapping = {'A': "A'", 'B': "B'", 'C': "C'", 'D': "D'", 'E': "E'"}
+        (C_ab, C_ba): matrices produits × profils de c(a, b) et c(b, a)
     
-    stats = {}
+    Les poids sont ajoutés critère par critère dans l'ordre de CRITERIA,
+    comme dans calculate_concordance, pour obtenir exactement les mêmes
+    sommes flottantes (et donc les mêmes comparaisons avec λ).
+    """
+    C_ab = np.zeros((X.shape[0], P.shape[0]))
+    C_ba = np.zeros((X.shape[0], P.shape[0]))
     
-    for lambda_val in LAMBDA_VALUES:
-        df_lambda = df_results[df_results['lambda'] == lambda_val]
-        
-        # Mapper le Nutri-Score original
-        df_lambda = df_lambda.copy()
-        df_lambda['nutriscore_mapped'] = df_lambda['nutriscore_original'].map(nutriscore_mapping)
+    for j, critere_config in enumerate(CRITERIA.values()):
+        poids = critere_config["weight"]
+        produits = X[:, j, np.newaxis]  # (n, 1)
+        profils = P[np.newaxis, :, j]   # (1, p)
         
-        # Filtrer les produits avec un Nutri-Score valide
-        df_valid = df_lambda.dropna(subset=['nutriscore_mapped'])
+        if critere_config["direction"] == "benefit":
+            a_meilleur = produits >= profils
+            b_meilleur = profils >= produits
+        else:
+            a_meilleur = produits <= profils
+            b_meilleur = profils <= produits
         
-        if len(df_valid) > 0:
-            # Comparaisons simples
-            accord_pessimiste = (df_valid['classe_pessimiste'] == df_valid['nutriscore_mapped']).sum()
-            accord_optimiste = (df_valid['classe_optimiste'] == df_valid['nutriscore_mapped']).sum()
-            
-            total = len(df_valid)
-            
-            # === MATRICES DE CONFUSION ===
-            # Matrice pour pessimiste
-            confusion_pessimiste = pd.crosstab(
-                df_valid['nutriscore_mapped'], 
-                df_valid['classe_pessimiste'], 
-                rownames=['Nutri-Score'], 
-                colnames=['ELECTRE TRI Pessimiste'],
-                margins=True
-            )
-            
-            # Matrice pour optimiste
-            confusion_optimiste = pd.crosstab(
-                df_valid['nutriscore_mapped'], 
-                df_valid['classe_optimiste'], 
-                rownames=['Nutri-Score'], 
-                colnames=['ELECTRE TRI Optimiste'],
-                margins=True
-            )
-            
-            stats[f'lambda_{lambda_val}'] = {
-                'total_produits': total,
-                'accord_pessimiste': accord_pessimiste,
-                'accord_optimiste': accord_optimiste,
-                'taux_accord_pessimiste': round(accord_pessimiste / total * 100, 1),
-                'taux_accord_optimiste': round(accord_optimiste / total * 100, 1),
-                'desaccord_pessimiste': total - accord_pessimiste,
-                'desaccord_optimiste': total - accord_optimiste,
-                'matrice_confusion_pessimiste': confusion_pessimiste,
-                'matrice_confusion_optimiste': confusion_optimiste
-            }
-    
-    return stats
-
-def generate_visualizations(df_results, comparison_stats, output_dir="graphiques"):
+        C_ab += np.where(a_meilleur, poids, 0.0)
+        C_ba += np.where(b_meilleur, poids, 0.0)
+    
+    return C_ab, C_ba
+
+# Nombre de produits traités à la fois par compute_credibility_matrices
+# (les tableaux intermédiaires d'un bloc restent dans le cache processeur)
+TAILLE_BLOC_CREDIBILITE = 4096
+
+def _partial_indices(ecart, q, p, v, poids, C, discordances):
     """
-    Génère les graphiques et visualisations pour l'analyse ELECTRE TRI.
+    Ajoute à C la concordance partielle pondérée d'un critère et, s'il a un veto,
+    mémorise sa discordance dans discordances. ecart = avance de b sur a (n × profils).
+    """
+    if p > q:
+        c_j = np.subtract(p, ecart)
+        c_j /= p - q
+        np.clip(c_j, 0.0, 1.0, out=c_j)
+        c_j *= poids
+        C += c_j
+    else:
+        C += np.where(ecart <= q, poids, 0.0)
+    if v is not None:
+        d_j = np.subtract(ecart, p)
+        d_j /= v - p
+        discordances.append(np.clip(d_j, 0.0, 1.0, out=d_j))
+
+def _apply_veto(C, discordances):
+    """σ = C × Π (1 - d_j) / (1 - C) sur les critères où d_j > C (même ordre que calculate_credibility)."""
+    S = C.copy()
+    un_moins_C = 1.0 - C
+    facteur = np.empty_like(C)
+    # C = 1 donne une division par zéro, mais jamais retenue (d_j ne peut pas dépasser 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for d_j in discordances:
+            np.subtract(1.0, d_j, out=facteur)
+            facteur /= un_moins_C
+            # facteur = 1 hors discordance : la multiplication laisse alors σ inchangé
+            S *= np.where(d_j > C, facteur, 1.0)
+    return S
+
+def compute_credibility_matrices(X, P):
+    """
+    Version vectorisée de calculate_credibility, dans les deux sens.
+
+    Returns:
+        (S_ab, S_ba): matrices produits × profils de σ(a, b) et σ(b, a), à utiliser
+        à la place de (C_ab, C_ba) dans les procédures pessimiste et optimiste
+    """
+    n = X.shape[0]
+    S_ab = np.empty((n, P.shape[0]))
+    S_ba = np.empty((n, P.shape[0]))
+    criteres = [
+        (j, config["weight"], config.get("q", 0), config.get("p", config.get("q", 0)), config.get("v"),
+         config["direction"] == "benefit")
+        for j, config in enumerate(CRITERIA.values())
+    ]
+
+    for debut in range(0, n, TAILLE_BLOC_CREDIBILITE):
+        fin = min(debut + TAILLE_BLOC_CREDIBILITE, n)
+        C_ab = np.zeros((fin - debut, P.shape[0]))
+        C_ba = np.zeros((fin - debut, P.shape[0]))
+        D_ab, D_ba = [], []
+
+        for j, poids, q, p, v, benefice in criteres:
+            # Avance de b sur a dans le sens du critère ; celle de a sur b est son opposé
+            profils = P[np.newaxis, :, j]
+            produits = X[debut:fin, j, np.newaxis]
+            ecart_ab = profils - produits if benefice else produits - profils
+            _partial_indices(ecart_ab, q, p, v, poids, C_ab, D_ab)
+            np.negative(ecart_ab, out=ecart_ab)
+            _partial_indices(ecart_ab, q, p, v, poids, C_ba, D_ba)
+
+        S_ab[debut:fin] = _apply_veto(C_ab, D_ab)
+        S_ba[debut:fin] = _apply_veto(C_ba, D_ba)
+
+    return S_ab, S_ba
+
+def classify_pessimistic_batch(C_ab, seuil_majorite):
+    """
+    Version vectorisée de classify_pessimistic (indices dans CLASSES).
     
-    Args:
-        df_results: DataFrame avec les résultats ELECTRE TRI
-        comparison_stats: statistiques de comparaison avec Nutri-Score
-        output_dir: dossier de sortie pour les graphiques
+    C_ab peut avoir des axes supplémentaires en tête (ex. candidats × produits × profils) :
+    seul le dernier axe (profils) est lu.
+    """
+    codes = np.full(C_ab.shape[:-1], len(CLASSES) - 1, dtype=np.uint8)  # E' par défaut
+    # On monte de b2 vers b5 : le profil le plus haut surclassé l'emporte
+    for numero_profil in range(2, 6):
+        a_S_b = C_ab[..., numero_profil - 1] >= seuil_majorite
+        codes[a_S_b] = 5 - numero_profil  # b5 → A', b4 → B', b3 → C', b2 → D'
+    return codes
+
+def classify_optimistic_batch(C_ab, C_ba, seuil_majorite):
+    """Version vectorisée de classify_optimistic (indices dans CLASSES), mêmes formes que ci-dessus."""
+    codes = np.zeros(C_ab.shape[:-1], dtype=np.uint8)  # A' par défaut
+    # On descend de b5 vers b2 : le premier profil strictement préféré l'emporte
+    for numero_profil in range(5, 1, -1):
+        b_S_a = C_ba[..., numero_profil - 1] >= seuil_majorite
+        a_S_b = C_ab[..., numero_profil - 1] >= seuil_majorite
+        b_P_a = b_S_a & ~a_S_b
+        codes[b_P_a] = 6 - numero_profil  # b2 → E', b3 → D', b4 → C', b5 → B'
+    return codes
+
+def classify_matrix(X, P, seuil_majorite, credibility=False):
+    """Classe toute une matrice de produits : retourne (codes pessimistes, codes optimistes)."""
+    C_ab, C_ba = get_concordance_matrices(X, P, credibility)
+    return (classify_pessimistic_batch(C_ab, seuil_majorite),
+            classify_optimistic_batch(C_ab, C_ba, seuil_majorite))
+
+def classify_lambdas(C_ab, C_ba, lambda_values):
     """
-    # Créer le dossier de sortie
-    Path(output_dir).mkdir(exist_ok=True)
+    Classe les produits pour plusieurs seuils λ à partir des mêmes concordances.
     
-    # Configuration matplotlib
-    plt.style.use('default')
-    plt.rcParams['figure.figsize'] = (12, 8)
-    plt.rcParams['font.size'] = 10
+    La concordance ne dépend pas de λ : chaque seuil supplémentaire ne coûte
+    qu'une comparaison des matrices déjà calculées.
     
-    # === 1. RÉPARTITION DES CLASSIFICATIONS ===
-    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-    fig.suptitle('Répartition des Classifications ELECTRE TRI', fontsize=16, fontweight='bold')
+    Returns:
+        dict: λ → (codes pessimistes, codes optimistes)
+    """
+    return {
+        lambda_val: (classify_pessimistic_batch(C_ab, lambda_val),
+                     classify_optimistic_batch(C_ab, C_ba, lambda_val))
+        for lambda_val in lambda_values
+    }
+
+# Code utilisé pour compléter les tableaux de classes de longueur variable
+CODE_ABSENT = np.iinfo(np.uint8).max
+
+def compute_lambda_breakpoints(C_ab, C_ba, lambda_min=0.5, lambda_max=1.0):
+    """
+    Classe de chaque produit en fonction de λ sur [lambda_min, lambda_max].
     
-    for idx, lambda_val in enumerate(LAMBDA_VALUES):
-        df_lambda = df_results[df_results['lambda'] == lambda_val]
-        
-        # Pessimiste
-        pess_counts = df_lambda['classe_pessimiste'].value_counts()
-        axes[idx, 0].pie(pess_counts.values, labels=pess_counts.index, autopct='%1.1f%%', 
-                        colors=['#2E8B57', '#32CD32', '#FFD700', '#FF8C00', '#DC143C'])
-        axes[idx, 0].set_title(f'Pessimiste λ={lambda_val}')
-        
-        # Optimiste
-        opt_counts = df_lambda['classe_optimiste'].value_counts()
-        axes[idx, 1].pie(opt_counts.values, labels=opt_counts.index, autopct='%1.1f%%',
-                        colors=['#2E8B57', '#32CD32', '#FFD700', '#FF8C00', '#DC143C'])
-        axes[idx, 1].set_title(f'Optimiste λ={lambda_val}')
+    Les procédures ne comparent λ qu'aux concordances c(a, bk) et c(bk, a)
+    des profils b2 à b5 : la classe est donc constante entre ces valeurs.
+    Chaque produit n'a au plus que 8 points de rupture, calculés d'un seul
+    coup pour tous les produits (pas de grille de λ).
     
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/repartition_classifications.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    Returns:
+        dict: procédure ('pessimiste', 'optimiste') → {
+            'breakpoints': matrice produits × K des λ de rupture triés (NaN en complément),
+            'classes': matrice produits × (K+1) des codes de classe par intervalle
+                       (CODE_ABSENT en complément),
+            'n_breakpoints': nombre de ruptures par produit
+        }
+        Le premier intervalle est [lambda_min, t1], puis ]t1, t2], ..., ]tK, lambda_max].
+    """
+    n = C_ab.shape[0]
+    # Seules valeurs de λ où une comparaison « concordance >= λ » peut basculer
+    seuils = np.sort(np.hstack([C_ab[:, 1:5], C_ba[:, 1:5]]), axis=1)
+    # Chaque intervalle ]t_j, t_j+1] est représenté par sa borne droite
+    representants = np.hstack([seuils, np.nextafter(seuils[:, -1:], np.inf)])
+    dans_domaine = (seuils >= lambda_min) & (seuils < lambda_max)
     
-    # === 2. COMPARAISON PESSIMISTE VS OPTIMISTE ===
-    fig, ax = plt.subplots(1, 1, figsize=(12, 8))
+    procedures = {
+        'pessimiste': lambda seuil: classify_pessimistic_batch(C_ab, seuil),
+        'optimiste': lambda seuil: classify_optimistic_batch(C_ab, C_ba, seuil),
+    }
     
-    lambda_labels = [f'λ={lam}' for lam in LAMBDA_VALUES]
-    x = np.arange(len(lambda_labels))
+    sweep = {}
+    for nom, classer in procedures.items():
+        classes = np.column_stack([classer(representants[:, j]) for j in range(representants.shape[1])])
+        rupture = dans_domaine & (classes[:, :-1] != classes[:, 1:])
+        
+        # Tasser les vraies ruptures à gauche (tri stable : l'ordre croissant est conservé)
+        n_ruptures = rupture.sum(axis=1)
+        largeur = int(n_ruptures.max()) if n else 0
+        colonnes = np.argsort(~rupture, axis=1, kind='stable')[:, :largeur]
+        valides = np.arange(largeur) < n_ruptures[:, np.newaxis]
+        
+        breakpoints = np.where(valides, np.take_along_axis(seuils, colonnes, axis=1), np.nan)
+        classes_apres = np.where(valides, np.take_along_axis(classes[:, 1:], colonnes, axis=1), CODE_ABSENT)
+        classe_depart = classer(np.full(n, lambda_min))
+        
+        sweep[nom] = {
+            'breakpoints': breakpoints,
+            'classes': np.column_stack([classe_depart, classes_apres]).astype(np.uint8),
+            'n_breakpoints': n_ruptures,
+        }
+    return sweep
+
+def classes_at_lambda(sweep_procedure, lambda_val):
+    """Codes de classe à un λ donné, lus dans le résultat de compute_lambda_breakpoints."""
+    intervalle = (sweep_procedure['breakpoints'] < lambda_val).sum(axis=1)
+    return sweep_procedure['classes'][np.arange(len(intervalle)), intervalle]
+
+# Cache des matrices de concordance (clé = empreinte des produits, profils et critères),
+# borné en octets : au-delà, les matrices ne sont ni gardées ni hachées (le hachage
+# de X coûterait autant qu'un recalcul sans jamais servir)
+_CONCORDANCE_CACHE = {}
+_CONCORDANCE_CACHE_MAX = 4
+_CONCORDANCE_CACHE_MAX_OCTETS = 256 * 1024 * 1024
+
+def _concordance_key(X, P, credibility=False):
+    """Empreinte des données qui déterminent la concordance."""
+    empreinte = hashlib.blake2b(digest_size=16)
+    empreinte.update(b'credibilite' if credibility else b'concordance')
+    empreinte.update(str(X.shape).encode())
+    empreinte.update(np.ascontiguousarray(X).tobytes())
+    empreinte.update(np.ascontiguousarray(P).tobytes())
+    empreinte.update(json.dumps(CRITERIA, sort_keys=True).encode())
+    return empreinte.hexdigest()
+
+def _cache_bytes():
+    return sum(C_ab.nbytes + C_ba.nbytes for C_ab, C_ba in _CONCORDANCE_CACHE.values())
+
+def get_concordance_matrices(X, P, credibility=False, use_cache=True):
+    """
+    compute_concordance_matrices avec cache : un seul calcul par couple (produits, profils).
+    Avec credibility=True, retourne les matrices σ de compute_credibility_matrices.
+
+    Le cache garde au plus _CONCORDANCE_CACHE_MAX entrées et _CONCORDANCE_CACHE_MAX_OCTETS
+    au total ; des matrices plus grandes (ou use_cache=False) sont calculées sans cache.
+    """
+    calcul = compute_credibility_matrices if credibility else compute_concordance_matrices
+    # Deux matrices float64 produits × profils
+    octets = 2 * X.shape[0] * P.shape[0] * np.dtype(np.float64).itemsize
+    if not use_cache or octets > _CONCORDANCE_CACHE_MAX_OCTETS:
+        return calcul(X, P)
+    cle = _concordance_key(X, P, credibility)
+    if cle not in _CONCORDANCE_CACHE:
+        while _CONCORDANCE_CACHE and (len(_CONCORDANCE_CACHE) >= _CONCORDANCE_CACHE_MAX
+                                      or _cache_bytes() + octets > _CONCORDANCE_CACHE_MAX_OCTETS):
+            _CONCORDANCE_CACHE.pop(next(iter(_CONCORDANCE_CACHE)))  # plus ancienne entrée
+        _CONCORDANCE_CACHE[cle] = calcul(X, P)
+    return _CONCORDANCE_CACHE[cle]
+
+def clear_concordance_cache():
+    """Vide le cache des concordances (libère la mémoire des matrices gardées)."""
+    _CONCORDANCE_CACHE.clear()
+
+# Dédoublonnage : la classe d'un produit ne dépend que de son vecteur de critères,
+# et beaucoup de produits en partagent un (mêmes valeurs nutritionnelles arrondies,
+# déclinaisons d'une même recette). On classe chaque vecteur distinct une fois.
+_MELANGE_1 = np.uint64(0x9E3779B97F4A7C15)
+_MELANGE_2 = np.uint64(0xBF58476D1CE4E5B9)
+_DECALAGE_MELANGE = np.uint64(31)
+
+def _row_hashes(X):
+    """Empreinte 64 bits de chaque ligne, calculée colonne par colonne sur les bits des flottants."""
+    colonnes = np.ascontiguousarray(X.T, dtype=np.float64).view(np.uint64)
+    empreintes = np.zeros(X.shape[0], dtype=np.uint64)
+    melange = np.empty_like(empreintes)
+    for colonne in colonnes:
+        np.multiply(colonne, _MELANGE_1, out=melange)
+        melange ^= melange >> _DECALAGE_MELANGE
+        empreintes ^= melange
+        empreintes *= _MELANGE_2
+    return colonnes, empreintes
+
+def deduplicate_rows(X):
+    """
+    Vecteurs de critères distincts d'une matrice produits × critères.
+
+    Les lignes sont regroupées par empreinte 64 bits (_row_hashes, puis pd.factorize),
+    et le regroupement est vérifié colonne par colonne : en cas de collision
+    (improbable), on se rabat sur np.unique, exact mais trié donc plus lent.
+
+    Returns:
+        (X_distincts, inverse): X_distincts[inverse] reproduit X ligne à ligne ;
+        les vecteurs distincts sont dans l'ordre de première apparition
+    """
+    n = X.shape[0]
+    colonnes, empreintes = _row_hashes(X)
+    inverse, distinctes = pd.factorize(empreintes)
+    # Première occurrence de chaque vecteur (écritures en ordre inverse : la plus petite gagne)
+    premiers = np.empty(len(distinctes), dtype=np.int64)
+    premiers[inverse[::-1]] = np.arange(n - 1, -1, -1)
+    colonnes = colonnes.view(np.float64)
+    if not all(np.array_equal(colonne[premiers][inverse], colonne, equal_nan=True) for colonne in colonnes):
+        X_distincts, inverse = np.unique(X, axis=0, return_inverse=True)
+        return X_distincts, inverse.reshape(-1)
+    return X[premiers], inverse
+
+# =============================================================================
+# ANALYSE DES RÉSULTATS ET VISUALISATIONS
+# =============================================================================
+
+def compare_with_nutriscore(df_results, lambda_values=None):
+    """
+    Compare les classifications ELECTRE TRI avec le Nutri-Score original.
     
-    pess_counts = []
-    opt_counts = []
+    Toutes les matrices de confusion (λ × procédure) sont comptées en un seul
+    passage (voir electre_accord.py), sans filtrer ni copier les résultats par λ.
     
-    for lambda_val in LAMBDA_VALUES:
-        df_lambda = df_results[df_results['lambda'] == lambda_val]
-        pess_counts.append(df_lambda['classe_pessimiste'].value_counts().to_dict())
-        opt_counts.append(df_lambda['classe_optimiste'].value_counts().to_dict())
+    Args:
+        df_results: DataFrame avec les résultats ELECTRE TRI, ou ElectreResults
+        lambda_values: seuils λ à comparer (LAMBDA_VALUES par défaut)
     
-    # Créer un graphique en barres groupées
-    width = 0.35
-    classes = CLASSES
-    colors = ['#2E8B57', '#32CD32', '#FFD700', '#FF8C00', '#DC143C']
+    Returns:
+        dict: statistiques de comparaison et matrices de confusion, plus accord
+              à une classe près, kappa (simple et pondérés), décalage moyen,
+              précision et rappel par classe
+    """
+    from electre_accord import confusion_tensor, confusion_tensor_from_frame, comparison_stats_from_confusions
     
-    bottom_pess = np.zeros(len(lambda_labels))
-    bottom_opt = np.zeros(len(lambda_labels))
+    if lambda_values is None:
+        lambda_values = LAMBDA_VALUES
     
-    for i, class_name in enumerate(classes):
-        pess_vals = [pess_counts[j].get(class_name, 0) for j in range(len(lambda_labels))]
-        opt_vals = [opt_counts[j].get(class_name, 0) for j in range(len(lambda_labels))]
-        
-        ax.bar(x - width/2, pess_vals, width, bottom=bottom_pess, 
-               label=f'{class_name} (Pess)', color=colors[i], alpha=0.8)
-        ax.bar(x + width/2, opt_vals, width, bottom=bottom_opt,
-               label=f'{class_name} (Opt)', color=colors[i], alpha=0.5)
-        
-        bottom_pess += pess_vals
-        bottom_opt += opt_vals
-    
-    ax.set_xlabel('Seuil Lambda')
-    ax.set_ylabel('Nombre de produits')
-    ax.set_title('Comparaison Pessimiste vs Optimiste par Seuil Lambda')
-    ax.set_xticks(x)
-    ax.set_xticklabels(lambda_labels)
-    ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-    
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/comparaison_pessimiste_optimiste.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # === 3. MATRICES DE CONFUSION GRAPHIQUES ===
-    if comparison_stats:
-        for lambda_key, stats in comparison_stats.items():
-            lambda_val = lambda_key.split('_')[1]
-            
-            # Matrice de confusion Pessimiste
-            fig, ax = plt.subplots(1, 1, figsize=(10, 8))
-            confusion_pess = stats['matrice_confusion_pessimiste'].iloc[:-1, :-1]  # Exclure les totaux
-            
-            sns.heatmap(confusion_pess, annot=True, fmt='d', cmap='Blues', 
-                       ax=ax, cbar_kws={'label': 'Nombre de produits'})
-            ax.set_title(f'Matrice de Confusion - Pessimiste (λ={lambda_val})')
-            ax.set_xlabel('ELECTRE TRI Prédiction')
-            ax.set_ylabel('Nutri-Score Réel')
-            
-            plt.tight_layout()
-            plt.savefig(f'{output_dir}/confusion_pessimiste_lambda_{lambda_val.replace(".", "_")}.png', 
-                       dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            # Matrice de confusion Optimiste
-            fig, ax = plt.subplots(1, 1, figsize=(10, 8))
-            confusion_opt = stats['matrice_confusion_optimiste'].iloc[:-1, :-1]  # Exclure les totaux
-            
-            sns.heatmap(confusion_opt, annot=True, fmt='d', cmap='Oranges',
-                       ax=ax, cbar_kws={'label': 'Nombre de produits'})
-            ax.set_title(f'Matrice de Confusion - Optimiste (λ={lambda_val})')
-            ax.set_xlabel('ELECTRE TRI Prédiction')
-            ax.set_ylabel('Nutri-Score Réel')
-            
-            plt.tight_layout()
-            plt.savefig(f'{output_dir}/confusion_optimiste_lambda_{lambda_val.replace(".", "_")}.png',
-                       dpi=300, bbox_inches='tight')
-            plt.close()
-    
-    # === 4. TAUX D'ACCORD AVEC NUTRI-SCORE ===
-    if comparison_stats:
-        fig, ax = plt.subplots(1, 1, figsize=(10, 6))
-        
-        lambdas = []
-        taux_pess = []
-        taux_opt = []
-        
-        for lambda_key, stats in comparison_stats.items():
-            lambda_val = lambda_key.split('_')[1]
-            lambdas.append(f'λ={lambda_val}')
-            taux_pess.append(stats['taux_accord_pessimiste'])
-            taux_opt.append(stats['taux_accord_optimiste'])
-        
-        x = np.arange(len(lambdas))
-        width = 0.35
-        
-        bars1 = ax.bar(x - width/2, taux_pess, width, label='Pessimiste', 
-                      color='#4169E1', alpha=0.8)
-        bars2 = ax.bar(x + width/2, taux_opt, width, label='Optimiste',
-                      color='#FF6347', alpha=0.8)
-        
-        # Ajouter les valeurs sur les barres
-        for bar in bars1:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-                   f'{height:.1f}%', ha='center', va='bottom')
-        
-        for bar in bars2:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-                   f'{height:.1f}%', ha='center', va='bottom')
-        
-        ax.set_xlabel('Seuil Lambda')
-        ax.set_ylabel('Taux d\'accord (%)')
-        ax.set_title('Taux d\'accord avec le Nutri-Score par Méthode et Seuil')
-        ax.set_xticks(x)
-        ax.set_xticklabels(lambdas)
-        ax.legend()
-        ax.set_ylim(0, 100)
-        ax.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/taux_accord_nutriscore.png', dpi=300, bbox_inches='tight')
-        plt.close()
-    
-    # === 5. DISTRIBUTION DES CRITÈRES ===
-    fig, axes = plt.subplots(2, 4, figsize=(20, 10))
-    fig.suptitle('Distribution des Valeurs des Critères', fontsize=16, fontweight='bold')
-    
-    axes = axes.flatten()
-    for idx, (criterion, config) in enumerate(CRITERIA.items()):
-        df_unique = df_results[df_results['lambda'] == LAMBDA_VALUES[0]]  # Prendre une seule fois
-        values = df_unique[criterion]
-        
-        axes[idx].hist(values, bins=30, alpha=0.7, color='skyblue', edgecolor='black')
-        axes[idx].set_title(f'{criterion}\n({config["direction"]} criterion)')
-        axes[idx].set_xlabel('Valeur')
-        axes[idx].set_ylabel('Fréquence')
-        axes[idx].grid(True, alpha=0.3)
+    if isinstance(df_results, ElectreResults):
+        # Comptage direct sur les codes, sans construire le DataFrame long
+        codes = df_results.codes
+        if list(lambda_values) != df_results.lambda_values:
+            codes = codes[[df_results.lambda_values.index(lambda_val) for lambda_val in lambda_values]]
+        confusions = confusion_tensor(codes, df_results.nutriscore)
+    else:
+        confusions = confusion_tensor_from_frame(df_results, lambda_values)
+    return comparison_stats_from_confusions(confusions, lambda_values)
+
+def generate_visualizations(df_results, comparison_stats, output_dir="graphiques", lambda_values=None,
+                            tiers=("apercu", "publication"), n_workers=None, use_cache=True):
+    """
+    Génère les graphiques et visualisations pour l'analyse ELECTRE TRI.
     
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/distribution_criteres.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    Les entrées des graphiques sont agrégées une seule fois, le rendu est réparti
+    sur un pool de processus et les graphiques inchangés depuis le dernier rendu
+    ne sont pas redessinés (voir electre_graphiques).
     
-    print(f"📊 Graphiques sauvegardés dans le dossier '{output_dir}/'")
-    return output_dir
+    Args:
+        df_results: DataFrame avec les résultats ELECTRE TRI, ou ElectreResults
+        comparison_stats: statistiques de comparaison avec Nutri-Score
+        output_dir: dossier de sortie pour les graphiques
+        lambda_values: seuils λ à représenter (LAMBDA_VALUES par défaut)
+        tiers: niveaux de rendu ('apercu' à 72 dpi dans output_dir/apercu, 'publication' à 300 dpi)
+        n_workers: processus de rendu (None = automatique, 1 = séquentiel)
+        use_cache: ne pas redessiner les graphiques dont les entrées n'ont pas changé
+    """
+    from electre_graphiques import render_charts
+    return render_charts(df_results, comparison_stats, output_dir, lambda_values,
+                         tiers=tiers, n_workers=n_workers, use_cache=use_cache)
 
 # =============================================================================
 # PIPELINE PRINCIPAL ELECTRE TRI
 # =============================================================================
 
+def read_input(input_file):
+    """Charge le fichier d'entrée selon son extension (.csv, .tsv, .txt, .parquet ou Excel)."""
+    suffixe = Path(input_file).suffix.lower()
+    if suffixe in (".csv", ".tsv", ".txt"):
+        return pd.read_csv(input_file, sep="\t" if suffixe == ".tsv" else ",")
+    if suffixe == ".parquet":
+        return pd.read_parquet(input_file)  # nécessite pyarrow (voir electre_ingestion.py)
+    return pd.read_excel(input_file)
+
 def clean_nutriscore_value(row):
     """Nettoie et valide une valeur de Nutri-Score."""
     if 'nutriscore_grade' in row and pd.notna(row['nutriscore_grade']):
@@ -499,44 +682,230 @@ def clean_nutriscore_value(row):
             return raw_value
     return 'N/A'  # Valeurs corrompues → N/A
 
-def classify_products(df, df_criteria, profiles):
-    """Classifie tous les produits avec ELECTRE TRI."""
-    results = []
+def clean_nutriscore_series(df):
+    """Version vectorisée de clean_nutriscore_value pour toute une colonne."""
+    if 'nutriscore_grade' not in df.columns:
+        return np.full(len(df), 'N/A', dtype=object)
+    brut = df['nutriscore_grade']
+    valeurs = brut.astype(str).str.strip().str.upper()
+    valides = brut.notna() & valeurs.isin(['A', 'B', 'C', 'D', 'E'])
+    return valeurs.where(valides, 'N/A').to_numpy(dtype=object)
+
+def get_product_names(df):
+    """Noms des produits, avec 'Produit_<idx>' si la colonne est absente."""
+    if 'product_name' in df.columns:
+        return df['product_name'].to_numpy(dtype=object)
+    return np.array([f'Produit_{idx}' for idx in df.index], dtype=object)
+
+NUTRISCORE_LETTRES = ['A', 'B', 'C', 'D', 'E']
+PROCEDURES = ('pessimiste', 'optimiste')
+
+def nutriscore_codes(df):
+    """Nutri-Score nettoyé en codes int8 : 0 = A, ..., 4 = E, -1 = absent ou invalide."""
+    return pd.Categorical(clean_nutriscore_series(df), categories=NUTRISCORE_LETTRES).codes.astype(np.int8)
+
+class ElectreResults:
+    """
+    Résultats compacts de classify_products.
     
-    print(f"\n🔢 Classification des {len(df)} produits...")
+    - codes : tableau uint8 λ × procédure × produit d'indices dans CLASSES
+      (procédure 0 = pessimiste, 1 = optimiste) ; λ est un axe, pas une colonne répétée
+    - nutriscore : codes int8 (voir nutriscore_codes)
+    - product_names et df_criteria sont référencés, pas copiés
+    - n_distinct : vecteurs de critères distincts classés (None sans dédoublonnage)
+    - traces : ExplanationTraces (4 octets par produit) si classify_products(explain=True)
     
-    # Selon les exigences du projet : λ=0.6 optimiste, λ=0.7 pessimiste
-    for lambda_val in LAMBDA_VALUES:
-        print(f"  Traitement avec seuil λ = {lambda_val}")
-        
-        for idx, row in df.iterrows():
-            # Récupérer les valeurs nutritionnelles du produit
-            product_values = {}
-            for critere in CRITERIA.keys():
-                product_values[critere] = df_criteria.loc[idx, critere]
-            
-            # CORRECTION: Utiliser lambda_val pour voir la différence entre les seuils
-            # Pour chaque valeur de lambda, appliquer aux DEUX méthodes
-            classe_pessimiste = classify_pessimistic(product_values, profiles, lambda_val)
-            classe_optimiste = classify_optimistic(product_values, profiles, lambda_val)
-            
-            # Nettoyer le Nutri-Score
-            nutriscore_value = clean_nutriscore_value(row)
-            
-            # Sauvegarder le résultat
-            results.append({
-                'product_name': row.get('product_name', f'Produit_{idx}'),
-                'nutriscore_original': nutriscore_value,
+    frame (calculé au premier accès) reconstruit le DataFrame long d'origine
+    (une ligne par produit et par λ) pour les appelants qui l'attendent.
+    """
+    
+    def __init__(self, codes, lambda_values, product_names, nutriscore, df_criteria, n_distinct=None,
+                 traces=None):
+        self.codes = codes
+        self.lambda_values = list(lambda_values)
+        self.product_names = product_names
+        self.nutriscore = nutriscore
+        self.df_criteria = df_criteria
+        self.n_distinct = n_distinct
+        self.traces = traces
+        self._frame = None
+    
+    @property
+    def n_products(self):
+        return self.codes.shape[2]
+    
+    @property
+    def dedupe_ratio(self):
+        """Produits par vecteur de critères distinct (None sans dédoublonnage)."""
+        return self.n_products / max(self.n_distinct, 1) if self.n_distinct is not None else None
+    
+    @property
+    def nbytes(self):
+        """Mémoire propre au conteneur (codes de classes, de Nutri-Score et traces)."""
+        return self.codes.nbytes + self.nutriscore.nbytes + (self.traces.nbytes if self.traces is not None else 0)
+    
+    def explain(self, produit, lambda_val):
+        """Explication lisible du classement d'un produit (nécessite classify_products(explain=True))."""
+        if self.traces is None:
+            raise ValueError("❌ Pas de traces d'explication : classer avec classify_products(..., explain=True)")
+        return self.traces.explain(produit, lambda_val)
+    
+    def select_lambdas(self, lambda_values):
+        """Résultats restreints à certains λ (dans l'ordre donné), sans recopier les produits."""
+        lambda_values = list(lambda_values)
+        if lambda_values == self.lambda_values:
+            return self
+        absents = [lambda_val for lambda_val in lambda_values if lambda_val not in self.lambda_values]
+        if absents:
+            raise ValueError(f"❌ λ absent(s) des résultats : {absents} (disponibles : {self.lambda_values})")
+        indices = [self.lambda_values.index(lambda_val) for lambda_val in lambda_values]
+        return ElectreResults(self.codes[indices], lambda_values, self.product_names, self.nutriscore,
+                              self.df_criteria, self.n_distinct, self.traces)
+    
+    def classes(self, lambda_val, procedure='pessimiste'):
+        """Codes de classe (indices dans CLASSES) d'une procédure pour un λ."""
+        return self.codes[self.lambda_values.index(lambda_val), PROCEDURES.index(procedure)]
+    
+    def labels(self, lambda_val, procedure='pessimiste'):
+        """Libellés de classe (A' à E') d'une procédure pour un λ."""
+        return np.array(CLASSES, dtype=object)[self.classes(lambda_val, procedure)]
+    
+    def class_counts(self, lambda_val, procedure='pessimiste'):
+        """Répartition {classe: effectif} triée par effectif décroissant, comme value_counts().to_dict()."""
+        compteurs = np.bincount(self.classes(lambda_val, procedure), minlength=len(CLASSES))
+        ordre = np.argsort(-compteurs, kind='stable')
+        return {CLASSES[i]: int(compteurs[i]) for i in ordre if compteurs[i] > 0}
+    
+    def nutriscore_labels(self):
+        """Nutri-Score nettoyé ('A' à 'E', 'N/A' sinon), comme clean_nutriscore_series."""
+        # Le code -1 indexe le dernier élément : 'N/A'
+        return np.array(NUTRISCORE_LETTRES + ['N/A'], dtype=object)[self.nutriscore]
+    
+    def to_frame(self):
+        """DataFrame long d'origine : une ligne par produit et par λ, colonnes critères recopiées."""
+        labels = np.array(CLASSES, dtype=object)
+        nutriscores = self.nutriscore_labels()
+        blocs = []
+        for i, lambda_val in enumerate(self.lambda_values):
+            bloc = pd.DataFrame({
+                'product_name': self.product_names,
+                'nutriscore_original': nutriscores,
                 'lambda': lambda_val,  # Garder lambda_val pour la compatibilité des analyses
-                'classe_pessimiste': classe_pessimiste,
-                'classe_optimiste': classe_optimiste,
-                **product_values
+                'classe_pessimiste': labels[self.codes[i, 0]],
+                'classe_optimiste': labels[self.codes[i, 1]],
             })
+            for critere in CRITERIA.keys():
+                bloc[critere] = self.df_criteria[critere].to_numpy()
+            blocs.append(bloc)
+        return pd.concat(blocs, ignore_index=True)
+    
+    @property
+    def frame(self):
+        """Vue DataFrame longue, construite une seule fois à la demande."""
+        if self._frame is None:
+            self._frame = self.to_frame()
+        return self._frame
+    
+    def to_wide(self):
+        """Une ligne par produit, une colonne catégorielle par (λ, procédure) (voir electre_export.py)."""
+        wide = pd.DataFrame({
+            'product_name': self.product_names,
+            'nutriscore_original': pd.Categorical.from_codes(self.nutriscore, categories=NUTRISCORE_LETTRES)
+                                     .add_categories('N/A').fillna('N/A'),
+        })
+        for critere in CRITERIA.keys():
+            wide[critere] = self.df_criteria[critere].to_numpy()
+        for i, lambda_val in enumerate(self.lambda_values):
+            for j, procedure in enumerate(PROCEDURES):
+                wide[f'classe_{procedure}_lambda_{lambda_val}'] = pd.Categorical.from_codes(
+                    self.codes[i, j], categories=CLASSES)
+        return wide
+
+def results_frame(df_results):
+    """DataFrame long des résultats, qu'on reçoive un ElectreResults ou déjà un DataFrame."""
+    return df_results.frame if isinstance(df_results, ElectreResults) else df_results
+
+def classify_products(df, df_criteria, profiles, lambda_values=None, n_workers=1, credibility=False,
+                      compiled=False, dedupe=False, explain=False):
+    """
+    Classifie tous les produits avec ELECTRE TRI (moteur vectorisé).
+    
+    Les concordances sont calculées une seule fois puis réutilisées pour
+    chaque λ de lambda_values (LAMBDA_VALUES par défaut).
+    Avec n_workers > 1 (ou None = tous les cœurs), le calcul est réparti
+    sur plusieurs processus (voir electre_parallele.py).
+    Avec credibility=True, les procédures utilisent l'indice de crédibilité σ
+    (seuils q, p, v de CRITERIA) au lieu de la concordance classique.
+    Avec compiled=True (concordance classique uniquement), les produits sont classés
+    par masques de bits et tables précalculées (voir electre_compile.py), en un
+    seul processus : c'est le chemin le plus rapide pour les très gros lots.
+    Avec dedupe=True, chaque vecteur de critères distinct n'est classé qu'une fois
+    (deduplicate_rows), puis les classes sont recopiées sur tous les produits qui le
+    partagent : le coût de classification suit le nombre de vecteurs distincts.
+    Avec explain=True (concordance classique uniquement), les traces d'explication
+    de chaque produit sont gardées dans results.traces (voir electre_explication.py) :
+    results.explain(produit, λ) dit quels critères et quels profils ont décidé de sa classe.
+
+    Returns:
+        ElectreResults: codes de classes compacts ; .frame donne l'ancien DataFrame long
+    """
+    if lambda_values is None:
+        lambda_values = LAMBDA_VALUES
+    if compiled and credibility:
+        raise ValueError("❌ Le classifieur compilé ne s'applique qu'à la concordance classique (credibility=False)")
+    if explain and credibility:
+        raise ValueError("❌ Les traces d'explication ne s'appliquent qu'à la concordance classique (credibility=False)")
     
-    return pd.DataFrame(results)
+    mode = "crédibilité σ" if credibility else "concordance compilée" if compiled else "concordance"
+    print(f"\n🔢 Classification des {len(df)} produits ({mode})...")
+    
+    # Une seule matrice produits × critères et une matrice profils × critères
+    X = build_criteria_matrix(df_criteria)
+    P = build_profiles_matrix(profiles)
+    inverse = None
+    if dedupe:
+        X, inverse = deduplicate_rows(X)
+        print(f"🔁 {len(X)} vecteurs de critères distincts pour {len(df)} produits "
+              f"(ratio {len(df) / max(len(X), 1):.1f}×)")
+    if compiled:
+        from electre_compile import classify_compiled
+        codes_par_lambda = classify_compiled(X, P, lambda_values)
+    elif n_workers == 1:
+        codes_par_lambda = classify_lambdas(*get_concordance_matrices(X, P, credibility), lambda_values)
+    else:
+        from electre_parallele import classify_parallel
+        codes_par_lambda = classify_parallel(X, P, lambda_values, n_workers, credibility)
+
+    # Selon les exigences du projet : λ=0.6 optimiste, λ=0.7 pessimiste
+    codes = np.empty((len(lambda_values), 2, len(df)), dtype=np.uint8)
+    for i, lambda_val in enumerate(lambda_values):
+        print(f"  Traitement avec seuil λ = {lambda_val}")
+        pessimiste, optimiste = codes_par_lambda[lambda_val]
+        if inverse is not None:
+            # Vecteur distinct → tous les produits qui le partagent
+            pessimiste, optimiste = pessimiste[inverse], optimiste[inverse]
+        codes[i, 0], codes[i, 1] = pessimiste, optimiste
+
+    traces = None
+    if explain:
+        from electre_explication import record_traces
+        traces = record_traces(X, P, lambda_values, get_product_names(df))
+        if inverse is not None:
+            traces.traces = traces.traces[inverse]
 
-def save_results_to_excel(df_results, profiles, output_file):
-    """Sauvegarde les résultats dans un fichier Excel."""
+    return ElectreResults(codes, lambda_values, get_product_names(df), nutriscore_codes(df), df_criteria,
+                          n_distinct=len(X) if dedupe else None, traces=traces)
+
+def save_results_to_excel(df_results, profiles, output_file, lambda_values=None):
+    """
+    Sauvegarde les résultats dans un fichier Excel (table longue + une feuille par λ).
+    
+    Ancienne disposition, limitée à 1 048 576 lignes par feuille : run_electre_tri
+    utilise désormais electre_export.write_results.
+    """
+    if lambda_values is None:
+        lambda_values = LAMBDA_VALUES
+    
     print(f"\n💾 Sauvegarde des résultats dans {output_file}...")
     
     with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
@@ -544,7 +913,7 @@ def save_results_to_excel(df_results, profiles, output_file):
         df_results.to_excel(writer, sheet_name='Classifications_ELECTRE_TRI', index=False)
         
         # Feuilles par lambda
-        for lambda_val in LAMBDA_VALUES:
+        for lambda_val in lambda_values:
             df_lambda = df_results[df_results['lambda'] == lambda_val]
             sheet_name = f'Lambda_{str(lambda_val).replace(".", "_")}'
             df_lambda.to_excel(writer, sheet_name=sheet_name, index=False)
@@ -565,18 +934,61 @@ def print_comparison_results(comparison_stats):
         print(f"\n  📊 Seuil λ = {lambda_val} ({stats['total_produits']} produits avec Nutri-Score):")
         print(f"    🎯 Accord Pessimiste: {stats['accord_pessimiste']}/{stats['total_produits']} ({stats['taux_accord_pessimiste']}%)")
         print(f"    🎯 Accord Optimiste:  {stats['accord_optimiste']}/{stats['total_produits']} ({stats['taux_accord_optimiste']}%)")
+        if 'kappa_pessimiste' in stats:
+            for procedure, titre in (('pessimiste', 'Pessimiste'), ('optimiste', 'Optimiste ')):
+                print(f"    📐 {titre}: à une classe près {stats[f'taux_accord_adjacent_{procedure}']}%, "
+                      f"kappa {stats[f'kappa_{procedure}']}, kappa quadratique {stats[f'kappa_quadratique_{procedure}']}, "
+                      f"décalage moyen {stats[f'decalage_moyen_{procedure}']:+.2f} classe")
 
-def run_electre_tri(input_file=INPUT_XLSX, output_file=OUTPUT_XLSX, profiles=None):
-    """Fonction principale : lance l'analyse ELECTRE TRI complète."""
+def run_electre_tri(input_file=INPUT_XLSX, output_file=OUTPUT_XLSX, profiles=None, lambda_values=None,
+                    n_workers=1, use_cache=False, credibility=False, instrumentation=None, output_layout="wide",
+                    plots=True, compiled=False, dedupe=False, explain=False):
+    """
+    Fonction principale : lance l'analyse ELECTRE TRI complète.
+    
+    lambda_values permet d'ajouter des seuils (ex. [0.55, 0.6, 0.65, 0.7, 0.75]) :
+    les concordances n'étant calculées qu'une fois, chaque λ ne coûte qu'une comparaison.
+    n_workers règle le nombre de processus de classification (1 = séquentiel).
+    use_cache relit les critères depuis le cache disque (voir electre_cache.py).
+    credibility active l'indice de crédibilité σ (seuils q, p, v de CRITERIA).
+    instrumentation mesure chaque étape (voir electre_instrumentation.Instrumentation) ;
+    sans elle, aucune mesure n'est prise.
+    output_file peut être un .xlsx, .csv, .parquet ou .arrow ; output_layout = "wide"
+    (une ligne par produit) ou "long" (une ligne par produit et par λ), voir electre_export.py.
+    plots=False saute les graphiques (matplotlib n'est alors jamais importé).
+    compiled=True classe par tables précalculées (voir classify_products).
+    dedupe=True ne classe qu'une fois chaque vecteur de critères distinct (voir classify_products).
+    explain=True garde les traces d'explication de chaque produit (df_results.explain).
+    
+    Returns:
+        ElectreResults: résultats compacts (.frame donne le DataFrame long)
+    """
+    if lambda_values is None:
+        lambda_values = LAMBDA_VALUES
+    if instrumentation is None:
+        from electre_instrumentation import NO_INSTRUMENTATION as instrumentation
+    else:
+        instrumentation.contexte.update(input_file=str(input_file), lambda_values=list(lambda_values),
+                                        n_workers=n_workers, use_cache=use_cache, credibility=credibility,
+                                        compiled=compiled, dedupe=dedupe, explain=explain)
+    
     print("🔄 Début de l'analyse ELECTRE TRI")
     print(f"📂 Fichier d'entrée: {input_file}")
     
-    # Étape 1: Charger les données
-    df = pd.read_excel(input_file)
-    print(f"📊 {len(df)} produits chargés")
-    
-    # Étape 2: Extraire les critères nutritionnels
-    df_criteria = extract_criteria_values(df)
+    # Étapes 1 et 2: Charger les données et extraire les critères nutritionnels
+    if use_cache:
+        from electre_cache import load_input_cached
+        with instrumentation.etape("chargement_cache") as mesure:
+            df, df_criteria = load_input_cached(input_file)
+            mesure['lignes'] = len(df)
+    else:
+        with instrumentation.etape("chargement") as mesure:
+            df = read_input(input_file)
+            mesure['lignes'] = len(df)
+        print(f"📊 {len(df)} produits chargés")
+        
+        with instrumentation.etape("extract_criteria_values", len(df)):
+            df_criteria = extract_criteria_values(df)
     print(f"✅ Critères extraits: {list(df_criteria.columns)}")
     
     # Étape 3: Définir les profils
@@ -585,40 +997,78 @@ def run_electre_tri(input_file=INPUT_XLSX, output_file=OUTPUT_XLSX, profiles=Non
         print("⚙️  Utilisation des profils par défaut")
     
     # Étape 4: Classifier tous les produits
-    df_results = classify_products(df, df_criteria, profiles)
+    with instrumentation.etape("classify_products", len(df)) as mesure:
+        df_results = classify_products(df, df_criteria, profiles, lambda_values, n_workers, credibility, compiled,
+                                       dedupe, explain)
+        if dedupe:
+            mesure['vecteurs_distincts'] = df_results.n_distinct
     
     # Étape 5: Sauvegarder les résultats
-    save_results_to_excel(df_results, profiles, output_file)
+    from electre_export import write_results
+    with instrumentation.etape("write_results", df_results.n_products):
+        write_results(df_results, output_file, profiles, lambda_values, output_layout)
     print(f"✅ Analyse terminée ! Résultats sauvegardés dans {output_file}")
     
     # Étape 6: Analyser les résultats
     print("\n� Comparaison avec le Nutri-Score original:")
-    nutriscore_count = df_results['nutriscore_original'].value_counts()
-    total_with_nutriscore = len(df_results[df_results['nutriscore_original'] != 'N/A'])
+    # Lignes (produit, λ) avec un Nutri-Score valide
+    total_with_nutriscore = int((df_results.nutriscore >= 0).sum()) * len(lambda_values)
     print(f"    Total avec Nutri-Score valide: {total_with_nutriscore}")
     
     if total_with_nutriscore > 0:
-        comparison_stats = compare_with_nutriscore(df_results)
+        with instrumentation.etape("compare_with_nutriscore", df_results.n_products):
+            comparison_stats = compare_with_nutriscore(df_results, lambda_values)
         print_comparison_results(comparison_stats)
     
     # Étape 7: Afficher la répartition des classes
     print("\n📈 Répartition des classifications ELECTRE TRI:")
-    for lambda_val in LAMBDA_VALUES:
-        df_lambda = df_results[df_results['lambda'] == lambda_val]
-        print(f"  λ = {lambda_val}:")
-        print(f"    Pessimiste: {df_lambda['classe_pessimiste'].value_counts().to_dict()}")
-        print(f"    Optimiste:  {df_lambda['classe_optimiste'].value_counts().to_dict()}")
+    with instrumentation.etape("repartition_classes", df_results.n_products):
+        for lambda_val in lambda_values:
+            print(f"  λ = {lambda_val}:")
+            print(f"    Pessimiste: {df_results.class_counts(lambda_val, 'pessimiste')}")
+            print(f"    Optimiste:  {df_results.class_counts(lambda_val, 'optimiste')}")
     
     # Étape 8: Générer les graphiques
-    print("\n📊 Génération des visualisations...")
-    try:
-        graphics_dir = generate_visualizations(df_results, comparison_stats if total_with_nutriscore > 0 else {})
-        print(f"✅ Graphiques créés dans le dossier '{graphics_dir}/'")
-    except Exception as e:
-        print(f"⚠️  Erreur lors de la génération des graphiques: {e}")
+    if plots:
+        print("\n📊 Génération des visualisations...")
+        try:
+            with instrumentation.etape("generate_visualizations", df_results.n_products):
+                graphics_dir = generate_visualizations(df_results,
+                                                       comparison_stats if total_with_nutriscore > 0 else {},
+                                                       lambda_values=lambda_values)
+            print(f"✅ Graphiques créés dans le dossier '{graphics_dir}/'")
+        except Exception as e:
+            print(f"⚠️  Erreur lors de la génération des graphiques: {e}")
+    
+    instrumentation.finish()
     
     return df_results
 
+def run_lambda_sweep(input_file=INPUT_XLSX, profiles=None, lambda_min=0.5, lambda_max=1.0, credibility=False):
+    """
+    Analyse de sensibilité exacte : classe de chaque produit pour tout λ de [lambda_min, lambda_max].
+    
+    Returns:
+        dict: résultat de compute_lambda_breakpoints, complété par 'product_name'
+              et 'nutriscore_original'
+    """
+    print("🔄 Balayage exact des seuils λ")
+    df = read_input(input_file)
+    df_criteria = extract_criteria_values(df)
+    if profiles is None:
+        profiles = DEFAULT_PROFILES
+    
+    C_ab, C_ba = get_concordance_matrices(build_criteria_matrix(df_criteria), build_profiles_matrix(profiles),
+                                          credibility)
+    sweep = compute_lambda_breakpoints(C_ab, C_ba, lambda_min, lambda_max)
+    sweep['product_name'] = get_product_names(df)
+    sweep['nutriscore_original'] = clean_nutriscore_series(df)
+    
+    for procedure in ('pessimiste', 'optimiste'):
+        stables = (sweep[procedure]['n_breakpoints'] == 0).sum()
+        print(f"  {procedure}: {stables}/{len(df)} produits de classe constante sur [{lambda_min}, {lambda_max}]")
+    return sweep
+
 if __name__ == "__main__":
     # Lancement avec les paramètres par défaut
     run_electre_tri()
@@ -631,4 +1081,7 @@ if __name__ == "__main__":
     #      "fruits_vegetables_nuts_100g": 10, "fiber_100g": 1, "proteins_100g": 3, "additives_n": 8}, # π2
     #     # ... 4 autres profils complets
     # ]
-    # run_electre_tri(profiles=profils_custom)
\ No newline at end of file
+    # run_electre_tri(profiles=profils_custom)
+    #
+    # Mode crédibilité (seuils q, p, v de CRITERIA):
+    # run_electre_tri(credibility=True)
\ No newline at end of file
@@ -0,0 +1,104 @@
+import ast
+import json
+import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# Nombre de lignes envoyées à chaque processus
+TAILLE_BLOC = 20_000
+
+def parse_nutriments(brut):
+    """
+    Convertit une valeur de la colonne 'nutriments' en dictionnaire (None si impossible).
+    
+    Essaie d'abord json.loads (rapide), puis ast.literal_eval pour les chaînes
+    au format Python (guillemets simples, True/False/None).
+    """
+    if isinstance(brut, dict):
+        return brut
+    if not isinstance(brut, str):
+        return None
+    try:
+        d = json.loads(brut)
+    except ValueError:
+        try:
+            d = ast.literal_eval(brut)
+        except Exception:
+            return None
+    return d if isinstance(d, dict) else None
+
+def _unite(d, spec):
+    """Unité d'un nutriment : clé '*_unit' lue dans le dictionnaire, sinon unité fixe (ex. '%')."""
+    if spec is None:
+        return None
+    if spec.endswith("_unit"):
+        return d.get(spec)
+    return spec
+
+def _extraire_bloc(args):
+    """Extrait toutes les clés d'un bloc de lignes (un seul parsing par ligne)."""
+    valeurs_brutes, cles, unites = args
+    valeurs = {cle: [] for cle in cles}
+    unites_extraites = {cle: [] for cle in unites}
+    trouvees = dict.fromkeys(cles, 0)
+    illisibles = 0
+    
+    for brut in valeurs_brutes:
+        d = parse_nutriments(brut)
+        if d is None:
+            illisibles += 1
+            d = {}
+        for cle in cles:
+            if cle in d:
+                trouvees[cle] += 1
+            valeurs[cle].append(d.get(cle, 0))  # 0 par défaut, comme extraire_valeur
+        for cle, spec in unites.items():
+            unites_extraites[cle].append(_unite(d, spec))
+    
+    return valeurs, unites_extraites, trouvees, illisibles
+
+def extraire_nutriments(serie, cles, unites=None, n_processus=1, taille_bloc=TAILLE_BLOC):
+    """
+    Extrait plusieurs nutriments de la colonne 'nutriments' en une seule passe.
+    
+    Args:
+        serie: colonne 'nutriments' (dict ou chaînes)
+        cles: clés à extraire
+        unites: dict clé → clé d'unité ('*_unit') ou unité fixe, None pour ignorer
+        n_processus: nombre de processus (None = tous les cœurs)
+        taille_bloc: nombre de lignes par tâche
+    
+    Returns:
+        (df_valeurs, df_unites, comptage) où comptage[cle] = {'trouvees', 'manquantes'}
+        et comptage['_illisibles'] compte les lignes impossibles à parser
+    """
+    cles = list(cles)
+    unites = {cle: spec for cle, spec in (unites or {}).items() if spec is not None}
+    valeurs_brutes = serie.tolist()
+    blocs = [(valeurs_brutes[i:i + taille_bloc], cles, unites)
+             for i in range(0, len(valeurs_brutes), taille_bloc)]
+    
+    n_processus = n_processus or os.cpu_count() or 1
+    if n_processus > 1 and len(blocs) > 1:
+        with ProcessPoolExecutor(max_workers=n_processus) as pool:
+            resultats = list(pool.map(_extraire_bloc, blocs))
+    else:
+        resultats = [_extraire_bloc(bloc) for bloc in blocs]
+    
+    valeurs = {cle: [] for cle in cles}
+    unites_extraites = {cle: [] for cle in unites}
+    comptage = {cle: {'trouvees': 0, 'manquantes': 0} for cle in cles}
+    comptage['_illisibles'] = 0
+    for valeurs_bloc, unites_bloc, trouvees, illisibles in resultats:
+        for cle in cles:
+            valeurs[cle].extend(valeurs_bloc[cle])
+            comptage[cle]['trouvees'] += trouvees[cle]
+        for cle in unites:
+            unites_extraites[cle].extend(unites_bloc[cle])
+        comptage['_illisibles'] += illisibles
+    for cle in cles:
+        comptage[cle]['manquantes'] = len(valeurs_brutes) - comptage[cle]['trouvees']
+    
+    return (pd.DataFrame(valeurs, index=serie.index),
+            pd.DataFrame(unites_extraites, index=serie.index),
+            comptage)
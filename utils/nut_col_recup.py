@@ -1,37 +1,25 @@
 import pandas as pd
 import ast
+import os
+
+try:
+    from utils.extraction_nutriments import extraire_nutriments
+except ImportError:  # Script lancé depuis le dossier utils/
+    from extraction_nutriments import extraire_nutriments
 
-# === Étape 1 : Charger le fichier existant ===
+# === CONFIGURATION ===
 fichier = "combined_spreads_data1.xlsx"
-print(f"🔍 Recherche du fichier : {fichier}")
+output = "collecte_de_donnee_projet/combined_spreads_data2.xlsx"
+N_PROCESSUS = None        # Nombre de processus pour l'extraction (None = tous les cœurs)
+AJOUTER_UNITES = False    # Ajouter aussi une colonne <colonne>_unit par nutriment
 
-# Vérifier si le fichier existe
-import os
-if not os.path.exists(fichier):
-    print(f"❌ Fichier non trouvé : {fichier}")
-    print("📁 Fichiers disponibles dans le dossier :")
-    dossier = "/Users/lev.w/Desktop/M2 MIAGE/Transparence des algo/Projet/"
-    if os.path.exists(dossier):
-        fichiers_excel = [f for f in os.listdir(dossier) if f.endswith('.xlsx')]
-        for f in fichiers_excel:
-            print(f"   - {f}")
-    raise FileNotFoundError(f"Le fichier {fichier} n'existe pas.")
-else:
-    print(f"✅ Fichier trouvé !")
-
-df = pd.read_excel(fichier)
-
-# === Étape 2 : Vérifier la colonne nutriments ===
-if "nutriments" not in df.columns:
-    raise ValueError("❌ La colonne 'nutriments' est introuvable dans le fichier.")
-
-# === Étape 3 : CLÉS COHÉRENTES AVEC ELECTRI_FIXED.PY ===
+# === CLÉS COHÉRENTES AVEC ELECTRI_FIXED.PY ===
 # Les noms de colonnes créées doivent correspondre exactement aux critères ELECTRE TRI
 nutriments_cles = {
     # Clés dans 'nutriments' → Noms de colonnes finaux (identiques aux critères ELECTRE)
     "energy-kcal_100g": "energy-kcal_100g",           # Énergie en kcal
     "sugars_100g": "sugars_100g",                     # Sucres
-    "saturated-fat_100g": "fat_100g",                 # Graisses saturées → fat_100g  
+    "saturated-fat_100g": "fat_100g",                 # Graisses saturées → fat_100g
     "sodium_100g": "sodium_100g",                     # Sodium
     "fruits-vegetables-nuts-estimate-from-ingredients_100g": "fruits_vegetables_nuts_100g",  # Fruits/légumes/noix
     "fiber_100g": "fiber_100g",                       # Fibres
@@ -51,7 +39,15 @@ nutriments_unites = {
     "additives_n": None                               # Pas d'unité (nombre)
 }
 
-# === Étape 4 : Fonction sûre d'extraction ===
+# Critères attendus par ELECTRE TRI (depuis electri_fixed.py)
+criteres_electre = [
+    "energy-kcal_100g", "sugars_100g", "fat_100g", "sodium_100g",
+    "fruits_vegetables_nuts_100g", "fiber_100g", "proteins_100g", "additives_n"
+]
+
+# === Fonction sûre d'extraction (une clé à la fois) ===
+# Conservée pour compatibilité : le script utilise extraire_nutriments,
+# qui ne parse chaque ligne qu'une seule fois pour toutes les clés.
 def extraire_valeur(nutriments, cle):
     """Extrait une valeur nutritionnelle depuis la colonne 'nutriments'."""
     if isinstance(nutriments, dict):
@@ -65,78 +61,113 @@ def extraire_valeur(nutriments, cle):
             return 0  # 0 par défaut en cas d'erreur
     return 0
 
-# === Étape 5 : Extraire et ajouter les colonnes ELECTRE TRI ===
-print(f"📊 Colonnes existantes dans le fichier : {len(df.columns)}")
-print(f"🔍 Extraction des critères ELECTRE TRI...")
-
-colonnes_ajoutees = []
-for cle_nutriments, nom_colonne_finale in nutriments_cles.items():
-    if nom_colonne_finale not in df.columns:  # Éviter de dupliquer
-        # Extraire les valeurs depuis 'nutriments'
-        df[nom_colonne_finale] = df["nutriments"].apply(lambda x: extraire_valeur(x, cle_nutriments))
+def main():
+    # === Étape 1 : Charger le fichier existant ===
+    print(f"🔍 Recherche du fichier : {fichier}")
+
+    # Vérifier si le fichier existe
+    if not os.path.exists(fichier):
+        print(f"❌ Fichier non trouvé : {fichier}")
+        print("📁 Fichiers disponibles dans le dossier :")
+        dossier = "/Users/lev.w/Desktop/M2 MIAGE/Transparence des algo/Projet/"
+        if os.path.exists(dossier):
+            fichiers_excel = [f for f in os.listdir(dossier) if f.endswith('.xlsx')]
+            for f in fichiers_excel:
+                print(f"   - {f}")
+        raise FileNotFoundError(f"Le fichier {fichier} n'existe pas.")
+    else:
+        print(f"✅ Fichier trouvé !")
+
+    df = pd.read_excel(fichier)
+
+    # === Étape 2 : Vérifier la colonne nutriments ===
+    if "nutriments" not in df.columns:
+        raise ValueError("❌ La colonne 'nutriments' est introuvable dans le fichier.")
+
+    # === Étape 3 : Sélection des clés à extraire ===
+    cles_a_extraire = {cle: nom for cle, nom in nutriments_cles.items() if nom not in df.columns}  # Éviter de dupliquer
+    for nom_colonne_finale in nutriments_cles.values():
+        if nom_colonne_finale in df.columns:
+            print(f"   ⚠️  {nom_colonne_finale} existe déjà, pas de modification")
+
+    # === Étape 4 : Extraction en une seule passe ===
+    print(f"📊 Colonnes existantes dans le fichier : {len(df.columns)}")
+    print(f"🔍 Extraction des critères ELECTRE TRI...")
+
+    unites = {cle: nutriments_unites.get(cle) for cle in cles_a_extraire} if AJOUTER_UNITES else None
+    df_valeurs, df_unites, comptage = extraire_nutriments(
+        df["nutriments"], cles_a_extraire.keys(), unites, n_processus=N_PROCESSUS
+    )
+    if comptage['_illisibles']:
+        print(f"   ⚠️  {comptage['_illisibles']} lignes 'nutriments' illisibles (valeurs à 0)")
+
+    # === Étape 5 : Ajouter les colonnes ELECTRE TRI ===
+    colonnes_ajoutees = []
+    for cle_nutriments, nom_colonne_finale in cles_a_extraire.items():
+        df[nom_colonne_finale] = df_valeurs[cle_nutriments]
         colonnes_ajoutees.append(nom_colonne_finale)
-        print(f"   ✅ {nom_colonne_finale} (depuis {cle_nutriments})")
-        
+        print(f"   ✅ {nom_colonne_finale} (depuis {cle_nutriments}): "
+              f"{comptage[cle_nutriments]['trouvees']} trouvées, {comptage[cle_nutriments]['manquantes']} manquantes")
+
+        if cle_nutriments in df_unites.columns:
+            df[f"{nom_colonne_finale}_unit"] = df_unites[cle_nutriments]
+
         # Afficher quelques valeurs pour vérification
         valeurs_non_nulles = df[df[nom_colonne_finale] != 0][nom_colonne_finale].head(3)
         if len(valeurs_non_nulles) > 0:
             print(f"      📋 Exemples: {list(valeurs_non_nulles)}")
         else:
             print(f"      ⚠️  Aucune valeur trouvée pour cette clé")
-    else:
-        print(f"   ⚠️  {nom_colonne_finale} existe déjà, pas de modification")
 
-# === Étape 6 : Vérification de cohérence ELECTRE TRI ===
-print(f"\n🔧 Vérification de cohérence avec ELECTRE TRI...")
-
-# Critères attendus par ELECTRE TRI (depuis electri_fixed.py)
-criteres_electre = [
-    "energy-kcal_100g", "sugars_100g", "fat_100g", "sodium_100g",
-    "fruits_vegetables_nuts_100g", "fiber_100g", "proteins_100g", "additives_n"
-]
+    # === Étape 6 : Vérification de cohérence ELECTRE TRI ===
+    print(f"\n🔧 Vérification de cohérence avec ELECTRE TRI...")
 
-colonnes_manquantes = []
-for critere in criteres_electre:
-    if critere in df.columns:
-        nb_valeurs = (df[critere] != 0).sum()
-        print(f"   ✅ {critere}: {nb_valeurs} valeurs non-nulles")
-    else:
-        colonnes_manquantes.append(critere)
-        print(f"   ❌ {critere}: MANQUANT")
-
-if colonnes_manquantes:
-    print(f"\n⚠️  Colonnes manquantes pour ELECTRE TRI: {', '.join(colonnes_manquantes)}")
-    # Créer ces colonnes avec des valeurs par défaut
-    for col in colonnes_manquantes:
-        df[col] = 0
-        print(f"   🔧 {col} créée avec valeurs par défaut (0)")
-        colonnes_ajoutees.append(col)
-
-# === Étape 7 : Sauvegarde du fichier final ===
-output = "collecte_de_donnee_projet/combined_spreads_data2.xlsx"
-df.to_excel(output, index=False)
-
-print(f"\n✅ Extraction terminée ! Fichier enregistré sous : {output}")
-print(f"📊 Colonnes totales dans le fichier final : {len(df.columns)}")
-print(f"🆕 Nouvelles colonnes ajoutées ({len(colonnes_ajoutees)}) : {', '.join(colonnes_ajoutees)}")
-print(f"📋 Toutes les colonnes originales ont été conservées !")
-
-# === Étape 8 : Test de cohérence finale ===
-print(f"\n🎯 Test de cohérence avec ELECTRE TRI:")
-tous_criteres_presents = all(critere in df.columns for critere in criteres_electre)
-if tous_criteres_presents:
-    print(f"   ✅ SUCCÈS: Tous les critères ELECTRE TRI sont présents !")
-    print(f"   📊 Le fichier est prêt pour l'analyse ELECTRE TRI")
-else:
-    criteres_manquants = [c for c in criteres_electre if c not in df.columns]
-    print(f"   ❌ ÉCHEC: Critères manquants: {criteres_manquants}")
-
-# === Étape 9 : Aperçu des données nutritionnelles ===
-print(f"\n📋 Aperçu des critères ELECTRE TRI (5 premières lignes non-nulles):")
-for critere in criteres_electre:
-    if critere in df.columns:
-        valeurs = df[df[critere] != 0][critere].head(5)
-        if len(valeurs) > 0:
-            print(f"   {critere}: {list(valeurs)}")
+    colonnes_manquantes = []
+    for critere in criteres_electre:
+        if critere in df.columns:
+            nb_valeurs = (df[critere] != 0).sum()
+            print(f"   ✅ {critere}: {nb_valeurs} valeurs non-nulles")
         else:
-            print(f"   {critere}: [Aucune valeur trouvée]")
\ No newline at end of file
+            colonnes_manquantes.append(critere)
+            print(f"   ❌ {critere}: MANQUANT")
+
+    if colonnes_manquantes:
+        print(f"\n⚠️  Colonnes manquantes pour ELECTRE TRI: {', '.join(colonnes_manquantes)}")
+        # Créer ces colonnes avec des valeurs par défaut
+        for col in colonnes_manquantes:
+            df[col] = 0
+            print(f"   🔧 {col} créée avec valeurs par défaut (0)")
+            colonnes_ajoutees.append(col)
+
+    # === Étape 7 : Sauvegarde du fichier final ===
+    df.to_excel(output, index=False)
+
+    print(f"\n✅ Extraction terminée ! Fichier enregistré sous : {output}")
+    print(f"📊 Colonnes totales dans le fichier final : {len(df.columns)}")
+    print(f"🆕 Nouvelles colonnes ajoutées ({len(colonnes_ajoutees)}) : {', '.join(colonnes_ajoutees)}")
+    print(f"📋 Toutes les colonnes originales ont été conservées !")
+
+    # === Étape 8 : Test de cohérence finale ===
+    print(f"\n🎯 Test de cohérence avec ELECTRE TRI:")
+    tous_criteres_presents = all(critere in df.columns for critere in criteres_electre)
+    if tous_criteres_presents:
+        print(f"   ✅ SUCCÈS: Tous les critères ELECTRE TRI sont présents !")
+        print(f"   📊 Le fichier est prêt pour l'analyse ELECTRE TRI")
+    else:
+        criteres_manquants = [c for c in criteres_electre if c not in df.columns]
+        print(f"   ❌ ÉCHEC: Critères manquants: {criteres_manquants}")
+
+    # === Étape 9 : Aperçu des données nutritionnelles ===
+    print(f"\n📋 Aperçu des critères ELECTRE TRI (5 premières lignes non-nulles):")
+    for critere in criteres_electre:
+        if critere in df.columns:
+            valeurs = df[df[critere] != 0][critere].head(5)
+            if len(valeurs) > 0:
+                print(f"   {critere}: {list(valeurs)}")
+            else:
+                print(f"   {critere}: [Aucune valeur trouvée]")
+
+# Point d'entrée protégé : indispensable pour que les processus d'extraction
+# (mode spawn, macOS/Windows) ne relancent pas le script en l'important
+if __name__ == "__main__":
+    main()